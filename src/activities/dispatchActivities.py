@@ -0,0 +1,47 @@
+import os
+from typing import Optional
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.service import RPCError, RPCStatusCode
+
+from util.dataObject import DispatchRequest, DispatchState
+
+
+def dispatch_workflow_id(carrier: str) -> str:
+    return f"dispatch-{carrier}"
+
+
+class DispatchActivities:
+    """Activities that need the worker's Temporal client"""
+
+    def __init__(self, client: Client, batch_size: Optional[int] = None, flush_seconds: Optional[float] = None):
+        self.client = client
+        # Only applied when an aggregator is started; a running one keeps its settings
+        self.batch_size = batch_size or int(os.getenv("DISPATCH_BATCH_SIZE", "50"))
+        self.flush_seconds = flush_seconds or float(os.getenv("DISPATCH_FLUSH_SECONDS", "30"))
+
+    @activity.defn
+    async def request_dispatch(self, carrier: str, request: DispatchRequest) -> str:
+        """Hand a parcel to the carrier's aggregator, starting it if needed (signal-with-start)"""
+        handle = await self.client.start_workflow(
+            "CarrierDispatchWorkflow",
+            args=[carrier, DispatchState(carrier=carrier, batch_size=self.batch_size, flush_seconds=self.flush_seconds)],
+            id=dispatch_workflow_id(carrier),
+            task_queue=activity.info().task_queue,
+            start_signal="enqueue",
+            start_signal_args=[request],
+        )
+        return handle.id
+
+    @activity.defn
+    async def dispatch_status_checked(self, carrier: str, order_id: str) -> str:
+        """Ask the carrier's aggregator about a parcel: queued, dispatched or unknown"""
+        try:
+            return await self.client.get_workflow_handle(dispatch_workflow_id(carrier)).query(
+                "dispatch_status", order_id, result_type=str
+            )
+        except RPCError as e:
+            if e.status == RPCStatusCode.NOT_FOUND:
+                return "unknown"
+            raise
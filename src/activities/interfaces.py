@@ -0,0 +1,101 @@
+"""Activity signatures for workflow code.
+
+Workflows schedule activities through these stubs instead of importing the
+implementations, so loading a workflow module (and re-validating it in the
+sandbox on every run) never pulls in psycopg, the pool, dotenv or the
+Temporal client. Names and signatures must match the implementations that
+workers register in ``worker.py``.
+"""
+from typing import Any, Dict, List
+
+from temporalio import activity
+
+from util.dataObject import (
+    DispatchRequest,
+    DispatchResult,
+    OrderObject,
+    OrderStatusProjection,
+    ReconcileChunk,
+    ReconcileIssue,
+    WorkflowCheck,
+)
+
+
+# OrderActivities (activities/orderActivities.py)
+
+@activity.defn(name="order_received")
+async def order_received(order_data: List[str]) -> OrderObject:
+    """Signature only; implemented by ``OrderActivities.order_received`` in ``activities/orderActivities.py``"""
+    ...
+
+
+@activity.defn(name="order_validated")
+async def order_validated(order: OrderObject) -> bool:
+    """Signature only; implemented by ``OrderActivities.order_validated`` in ``activities/orderActivities.py``"""
+    ...
+
+
+@activity.defn(name="payment_charged")
+async def payment_charged(order: OrderObject) -> Dict[str, Any]:
+    """Signature only; implemented by ``OrderActivities.payment_charged`` in ``activities/orderActivities.py``"""
+    ...
+
+
+@activity.defn(name="status_projected")
+async def status_projected(projection: OrderStatusProjection) -> None:
+    """Signature only; implemented by ``OrderActivities.status_projected`` in ``activities/orderActivities.py``"""
+    ...
+
+
+# Shipping activities (activities/shippingActivities.py)
+
+@activity.defn(name="package_prepared")
+async def package_prepared(order: OrderObject) -> str:
+    """Signature only; implemented by ``package_prepared`` in ``activities/shippingActivities.py``"""
+    ...
+
+
+@activity.defn(name="carrier_dispatched")
+async def carrier_dispatched(order: OrderObject) -> str:
+    """Signature only; implemented by ``carrier_dispatched`` in ``activities/shippingActivities.py``"""
+    ...
+
+
+@activity.defn(name="carriers_dispatched_bulk")
+async def carriers_dispatched_bulk(carrier: str, batch_id: str, requests: List[DispatchRequest]) -> List[DispatchResult]:
+    """Signature only; implemented by ``carriers_dispatched_bulk`` in ``activities/shippingActivities.py``"""
+    ...
+
+
+# DispatchActivities (activities/dispatchActivities.py)
+
+@activity.defn(name="request_dispatch")
+async def request_dispatch(carrier: str, request: DispatchRequest) -> str:
+    """Signature only; implemented by ``DispatchActivities.request_dispatch`` in ``activities/dispatchActivities.py``"""
+    ...
+
+
+@activity.defn(name="dispatch_status_checked")
+async def dispatch_status_checked(carrier: str, order_id: str) -> str:
+    """Signature only; implemented by ``DispatchActivities.dispatch_status_checked`` in ``activities/dispatchActivities.py``"""
+    ...
+
+
+# ReconcileActivities (activities/reconcileActivities.py)
+
+@activity.defn(name="reconcile_rows_scanned")
+async def reconcile_rows_scanned(phase: str, after_id: str, since: str, cutoff: str, limit: int) -> ReconcileChunk:
+    """Signature only; implemented by ``ReconcileActivities.reconcile_rows_scanned`` in ``activities/reconcileActivities.py``"""
+    ...
+
+
+@activity.defn(name="order_workflows_described")
+async def order_workflows_described(order_ids: List[str]) -> List[WorkflowCheck]:
+    """Signature only; implemented by ``ReconcileActivities.order_workflows_described`` in ``activities/reconcileActivities.py``"""
+    ...
+
+
+@activity.defn(name="reconciliation_applied")
+async def reconciliation_applied(issues: List[ReconcileIssue]) -> Dict[str, int]:
+    """Signature only; implemented by ``ReconcileActivities.reconciliation_applied`` in ``activities/reconcileActivities.py``"""
+    ...
@@ -1,62 +1,115 @@
-from typing import Dict, Any
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
 from util.flakyCall import flaky_call
-from temporalio import activity,workflow
-from util.dataObject import OrderObject
+from temporalio import activity
+from util.dataObject import OrderObject, OrderStatusProjection
 from typing import List
 
-from util.db import PostgresDB
-@activity.defn
-async def order_received(order_data:List[str]) -> OrderObject:
-    data = {"items": [{"sku": "ABC", "qty": 1}],"payment_id":order_data[1]}
-    await flaky_call()
-    pgDB = PostgresDB()
-    query = f"""INSERT INTO orders (id, order_data, order_status)
-        VALUES
-        {order_data[0]}, {data}, 'Received'"""
-    await pgDB.query_executor(query, hasReturn=False)
-    return OrderObject(
-        id=order_data[0], 
-        data=data, 
-        created_at=str(workflow.now()), 
-        updated_at=str(workflow.now()), 
-        payment_id=order_data[1], 
-        shipping_address="")
-
-
-@activity.defn
-async def order_validated(order: OrderObject) -> bool:
-    await flaky_call()
-    pgDB = PostgresDB()
-    query = f"""UPDATE orders SET 
-    order_status = 'Validated',
-    updated_at = CURRENT_TIMESTAMP
-    where id  = {order.id}
-    """
-    await pgDB.query_executor(query,False)
-    if not order.data.get("items"):
-        return False
-    return True
-
-
-
-@activity.defn
-async def payment_charged(order: OrderObject) -> Dict[str, Any]:
-    await flaky_call()
-    """Charge payment after simulating an error/timeout first.
-    You must implement your own idempotency logic in the activity or here.
-    """
-    pgDb = PostgresDB()
-    query =  f""" INSERT INTO payments (id, order_id, payment_status, amount)
-    VALUES ({order.payment_id}, {order.id}, 1, {order.data.get("amount", 0)}) ON CONFLICT DO NOTHING
-    """
-    await pgDb.query_executor(query,False)
-    query = f"""UPDATE orders SET 
-    order_status = 'Charged',
-    updated_at = CURRENT_TIMESTAMP
-    where id  = {order.id}
-    """
-    await pgDb.query_executor(query,False)
-    
-    amount = sum(i.get("qty", 1) for i in order.data.get("items", []))
-    return {"status": "charged", "amount": amount}
+from psycopg.types.json import Jsonb
 
+from util.claimCheck import ClaimCheck
+from util.db import PostgresPool
+from util.eventWriter import EventWriter
+from util.idempotency import IdempotencyLedger, current_activity_key
+from util.logDecorator import ioLogger
+from util.statements import INSERT_ORDER, SET_ORDER_STATUS, INSERT_PAYMENT, UPSERT_ORDER_STATUS_VIEW
+
+
+class OrderActivities:
+    """Order activities sharing the worker's connection pool and event writer"""
+
+    def __init__(
+        self,
+        db: PostgresPool,
+        events: EventWriter,
+        claims: Optional[ClaimCheck] = None,
+        ledger: Optional[IdempotencyLedger] = None,
+    ):
+        self.db = db
+        self.events = events
+        # Large order data is passed through history by reference when set
+        self.claims = claims
+        self.ledger = ledger or IdempotencyLedger(db)
+
+    async def _hydrate(self, order: OrderObject) -> OrderObject:
+        return await self.claims.hydrate(order) if self.claims else order
+
+    async def _record_event(self, order_id: str, type: str, payload: Dict[str, Any]) -> None:
+        payload = {**payload, "attempt": activity.info().attempt}
+        await self.events.record(order_id, type, payload)
+
+    @activity.defn
+    @ioLogger
+    async def order_received(self, order_data: List[str]) -> OrderObject:
+        data = {"items": [{"sku": "ABC", "qty": 1}],"payment_id":order_data[1]}
+        await flaky_call()
+        await self.db.run(INSERT_ORDER, (order_data[0], Jsonb(data), Jsonb({})))
+        await self._record_event(order_data[0], "OrderReceived", {"status": "Received"})
+        now = str(datetime.now(timezone.utc))
+        order = OrderObject(
+            id=order_data[0],
+            data=data,
+            created_at=now,
+            updated_at=now,
+            payment_id=order_data[1],
+            shipping_address="")
+        return await self.claims.check_in(order) if self.claims else order
+
+    @activity.defn
+    @ioLogger
+    async def order_validated(self, order: OrderObject) -> bool:
+        await flaky_call()
+        order = await self._hydrate(order)
+        await self.db.run(SET_ORDER_STATUS, ("Validated", order.id))
+        valid = bool(order.data.get("items"))
+        await self._record_event(order.id, "OrderValidated", {"status": "Validated", "valid": valid})
+        return valid
+
+    @activity.defn
+    @ioLogger
+    async def payment_charged(self, order: OrderObject) -> Dict[str, Any]:
+        """Charge payment after simulating an error/timeout first.
+
+        A retry of a charge that already committed returns the recorded
+        result from the idempotency ledger without touching payments again.
+        """
+        ledger_key = current_activity_key(order.payment_id)
+        recorded = await self.ledger.lookup(ledger_key)
+        if recorded is not None:
+            return recorded
+
+        await flaky_call()
+        order = await self._hydrate(order)
+        amount = sum(i.get("qty", 1) for i in order.data.get("items", []))
+        result = {"status": "charged", "amount": amount}
+        # Payment row, status bump and ledger entry commit together
+        async with self.db.connection() as conn:
+            await self.db.run(
+                INSERT_PAYMENT,
+                (order.payment_id, order.id, order.data.get("amount", 0)),
+                conn=conn,
+            )
+            await self.db.run(SET_ORDER_STATUS, ("Charged", order.id), conn=conn)
+            await self.ledger.record(ledger_key, result, conn=conn)
+        # Only cache the charge once it has committed; a failed commit must be retried
+        self.ledger.remember(ledger_key, result)
+
+        await self._record_event(order.id, "PaymentCharged", {"status": "Charged", "amount": amount})
+        return result
+
+    @activity.defn
+    async def status_projected(self, projection: OrderStatusProjection) -> None:
+        """Upsert the order's read-model row; an older version never overwrites a newer one"""
+        await self.db.run(
+            UPSERT_ORDER_STATUS_VIEW,
+            (
+                projection.order_id,
+                projection.workflow_id,
+                projection.status,
+                projection.version,
+                projection.is_cancelled,
+                projection.manual_review_completed,
+                projection.shipping_address,
+                datetime.fromisoformat(projection.changed_at),
+            ),
+        )
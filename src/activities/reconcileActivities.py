@@ -0,0 +1,90 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.service import RPCError, RPCStatusCode
+
+from util.dataObject import ORDER_STATUS_SEARCH_ATTRIBUTE, ReconcileChunk, ReconcileIssue, ReconcileRow, WorkflowCheck
+from util.db import PostgresPool
+from util.statements import REPAIR_ORDER_STATUS, SCAN_ORDERS, SCAN_PAYMENTS, UPSERT_RECONCILIATION_ISSUE
+
+
+class ReconcileActivities:
+    """Activities for ReconciliationWorkflow; they need the pool and the worker's Temporal client"""
+
+    def __init__(self, db: PostgresPool, client: Client, describe_concurrency: Optional[int] = None):
+        self.db = db
+        self.client = client
+        self.describe_concurrency = describe_concurrency or int(os.getenv("RECONCILE_DESCRIBE_CONCURRENCY", "20"))
+
+    @activity.defn
+    async def reconcile_rows_scanned(
+        self,
+        phase: str,
+        after_id: str,
+        since: str,
+        cutoff: str,
+        limit: int,
+    ) -> ReconcileChunk:
+        """Read the next keyset chunk of orders, or of payments in the payments phase"""
+        params = (after_id, datetime.fromisoformat(since), datetime.fromisoformat(cutoff), limit)
+        if phase == "orders":
+            records = await self.db.query(SCAN_ORDERS, params)
+            rows = [ReconcileRow(order_id, status, has_payment) for order_id, status, has_payment in records]
+        else:
+            records = await self.db.query(SCAN_PAYMENTS, params)
+            rows = [
+                ReconcileRow(order_id, None, True, payment_id=payment_id)
+                for payment_id, order_id, status in records
+                if status is None
+            ]
+        last_id = records[-1][0] if len(records) == limit else None
+        return ReconcileChunk(rows=rows, scanned=len(records), last_id=last_id)
+
+    async def _describe(self, workflow_id: str) -> tuple:
+        try:
+            description = await self.client.get_workflow_handle(workflow_id).describe()
+        except RPCError as e:
+            if e.status == RPCStatusCode.NOT_FOUND:
+                return None, None
+            raise
+        return description.status.name, description.typed_search_attributes.get(ORDER_STATUS_SEARCH_ATTRIBUTE)
+
+    @activity.defn
+    async def order_workflows_described(self, order_ids: List[str]) -> List[WorkflowCheck]:
+        """Describe each order's OrderWorkflow and ShippingWorkflow, a bounded number at a time"""
+        semaphore = asyncio.Semaphore(self.describe_concurrency)
+
+        async def check(order_id: str) -> WorkflowCheck:
+            async with semaphore:
+                order_run, order_status = await self._describe(f"order-{order_id}")
+                shipping_run, _ = await self._describe(f"shipping-{order_id}")
+            activity.heartbeat()
+            return WorkflowCheck(order_id, order_run, shipping_run, order_status)
+
+        return list(await asyncio.gather(*(check(order_id) for order_id in order_ids)))
+
+    @activity.defn
+    async def reconciliation_applied(self, issues: List[ReconcileIssue]) -> Dict[str, int]:
+        """Apply repairs and record every issue in one transaction; safe to retry"""
+        counts = {"repaired": 0, "flagged": 0}
+        async with self.db.connection() as conn:
+            for issue in issues:
+                repaired = False
+                if issue.repair_status is not None:
+                    repaired = bool(await self.db.run(
+                        REPAIR_ORDER_STATUS,
+                        (issue.repair_status, issue.order_id, issue.expected_status),
+                        conn=conn,
+                    ))
+                action = "repaired" if repaired else "flagged"
+                counts[action] += 1
+                await self.db.run(
+                    UPSERT_RECONCILIATION_ISSUE,
+                    (issue.order_id, issue.kind, action, issue.detail),
+                    conn=conn,
+                )
+        return counts
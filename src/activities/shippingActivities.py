@@ -1,23 +1,56 @@
-from typing import Dict, Any
+import asyncio
+import os
+from typing import Dict, Any, List
 from temporalio import activity
 from util.flakyCall import flaky_call
-from util.dataObject import OrderObject
+from util.logDecorator import ioLogger
+from util.dataObject import DispatchRequest, DispatchResult, OrderObject
+
+# Parcels of one bulk batch handed to the carrier at once
+BULK_DISPATCH_CONCURRENCY = int(os.getenv("BULK_DISPATCH_CONCURRENCY", "10"))
 
 
 @activity.defn
+@ioLogger
 async def order_shipped(order: OrderObject) -> str:
-    # await flaky_call()
+    await flaky_call()
     # TODO: Implement DB write: update order status to shipped
     return "Shipped"
 
 @activity.defn
+@ioLogger
 async def package_prepared(order: OrderObject) -> str:
-    # await flaky_call()
+    await flaky_call()
     # TODO: Implement DB write: mark package prepared in DB
     return "Package ready"
 
-@activity.defn
-async def carrier_dispatched(order: OrderObject) -> str:
-    # await flaky_call()
+async def _dispatch_parcel(order_id: str, shipping_address: str) -> str:
+    await flaky_call(key=order_id)
     # TODO: Implement DB write: record carrier dispatch status
     return "Dispatched"
+
+@activity.defn
+@ioLogger
+async def carrier_dispatched(order: OrderObject) -> str:
+    return await _dispatch_parcel(order.id, order.shipping_address)
+
+@activity.defn
+@ioLogger
+async def carriers_dispatched_bulk(carrier: str, batch_id: str, requests: List[DispatchRequest]) -> List[DispatchResult]:
+    """Dispatch a batch through the per-parcel carrier call, a bounded number at a time.
+
+    A parcel whose dispatch fails is reported as DispatchFailed rather than
+    failing the batch, so a retry never re-dispatches the parcels that went out.
+    """
+    semaphore = asyncio.Semaphore(BULK_DISPATCH_CONCURRENCY)
+
+    async def dispatch(request: DispatchRequest) -> DispatchResult:
+        async with semaphore:
+            try:
+                status = await _dispatch_parcel(request.order_id, request.shipping_address)
+            except Exception as e:
+                activity.logger.warning(f"Dispatch of {request.order_id} in batch {batch_id} failed: {e}")
+                status = "DispatchFailed"
+        return DispatchResult(order_id=request.order_id, status=status, carrier=carrier, batch_id=batch_id)
+
+    return list(await asyncio.gather(*(dispatch(request) for request in requests)))
@@ -0,0 +1,304 @@
+"""Load and latency benchmark for OrderWorkflow and its ShippingWorkflow child.
+
+Starts N concurrent orders against a local Temporal test environment, sends
+``complete_manual_review`` to each one and reports throughput plus per-phase
+latency percentiles. Results are written as JSON so runs can be compared
+release over release.
+
+    cd src
+    python -m benchmarks.orderLoad --orders 200 --concurrency 50 --out bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import json
+import os
+import platform
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from temporalio import activity
+from temporalio.client import Client, WorkflowHandle
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor, Worker
+
+from util.dataObject import ORDER_STATUS_SEARCH_ATTRIBUTE, OrderOptions, TERMINAL_STATUSES
+from util.flakyCall import FaultInjector, configure_faults, get_injector
+from util.orderSubmit import order_args
+from util.sandbox import workflow_runner
+from util.statusWaiter import wait_for_status
+from util.temporalClient import data_converter
+from workflows.orderWorkflow import OrderWorkflow
+from workflows.shippingWorkflow import ShippingWorkflow
+
+# Phase name -> (start mark, end mark)
+PHASES = {
+    "received": ("submitted", "order_received.end"),
+    "validated": ("order_received.end", "order_validated.end"),
+    "review": ("order_validated.end", "payment_charged.start"),
+    "payment": ("payment_charged.start", "payment_charged.end"),
+    "shipping": ("payment_charged.end", "carrier_dispatched.end"),
+    "total": ("submitted", "completed"),
+}
+
+
+class PhaseTimingInterceptor(Interceptor):
+    """Marks when each activity starts and finishes, keyed by order id"""
+
+    def __init__(self, marks: Dict[str, Dict[str, float]]):
+        self.marks = marks
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _PhaseTimingActivityInbound(next, self.marks)
+
+
+class _PhaseTimingActivityInbound(ActivityInboundInterceptor):
+    def __init__(self, next: ActivityInboundInterceptor, marks: Dict[str, Dict[str, float]]):
+        super().__init__(next)
+        self._marks = marks
+
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        # Workflow ids are "order-<id>" and "shipping-<id>"
+        mark = self._marks.setdefault(info.workflow_id.split("-", 1)[-1], {})
+        mark.setdefault(f"{info.activity_type}.start", time.perf_counter())
+        result = await super().execute_activity(input)
+        mark[f"{info.activity_type}.end"] = time.perf_counter()
+        return result
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize_phases(marks: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    summary = {}
+    for phase, (start, end) in PHASES.items():
+        samples = sorted(
+            (mark[end] - mark[start]) * 1000
+            for mark in marks.values()
+            if start in mark and end in mark
+        )
+        summary[phase] = {
+            "count": len(samples),
+            "p50_ms": round(percentile(samples, 50), 3),
+            "p95_ms": round(percentile(samples, 95), 3),
+            "p99_ms": round(percentile(samples, 99), 3),
+            "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+            "max_ms": round(samples[-1], 3) if samples else 0.0,
+        }
+    return summary
+
+
+async def wait_for_review(handle: WorkflowHandle, args: argparse.Namespace) -> str:
+    if args.wait == "update":
+        record = await wait_for_status(handle, "awaiting_manual_review")
+        return record.workflow_status
+    while True:
+        status = await handle.query(OrderWorkflow.get_status)
+        if status["workflow_status"] in ("awaiting_manual_review",) + TERMINAL_STATUSES:
+            return status["workflow_status"]
+        await asyncio.sleep(args.poll_interval)
+
+
+async def drive_order(
+    client: Client,
+    marks: Dict[str, Dict[str, float]],
+    history_lengths: List[int],
+    args: argparse.Namespace,
+) -> str:
+    """Run one order end to end and return its final status"""
+    order_id = str(uuid.uuid4())
+    mark = marks.setdefault(order_id, {})
+    mark["submitted"] = time.perf_counter()
+    handle = await client.start_workflow(
+        OrderWorkflow.run,
+        args=order_args(
+            order_id,
+            str(uuid.uuid4()),
+            "123 Bench St, City, State 12345",
+            OrderOptions(local_steps=args.local_steps, status_search_attribute=args.status_search_attribute),
+        ),
+        id=f"order-{order_id}",
+        task_queue="order-tq",
+    )
+    if await wait_for_review(handle, args) == "awaiting_manual_review":
+        if args.review_delay:
+            await asyncio.sleep(args.review_delay)
+        await handle.signal(OrderWorkflow.complete_manual_review)
+    result = await handle.result()
+    mark["completed"] = time.perf_counter()
+    if args.count_history:
+        history = await handle.fetch_history()
+        history_lengths.append(len(history.events))
+    return result["status"]
+
+
+@contextlib.asynccontextmanager
+async def start_environment(kind: str):
+    # Honours TEMPORAL_COMPACT_PAYLOADS like the real clients and workers
+    if kind == "time-skipping":
+        env = await WorkflowEnvironment.start_time_skipping(data_converter=data_converter())
+    else:
+        env = await WorkflowEnvironment.start_local(
+            data_converter=data_converter(),
+            # Registered so --status-search-attribute can be benchmarked here
+            search_attributes=[ORDER_STATUS_SEARCH_ATTRIBUTE],
+        )
+    async with env:
+        yield env
+
+
+async def build_activities(args: argparse.Namespace, stack: contextlib.AsyncExitStack):
+    """Return (order activities, shipping activities) for the chosen backend"""
+    if args.activities == "postgres":
+        from activities.orderActivities import OrderActivities
+        from activities.shippingActivities import package_prepared, carrier_dispatched
+        from util.claimCheck import ClaimCheck
+        from util.db import PostgresPool
+        from util.eventWriter import EventWriter
+
+        db = await stack.enter_async_context(PostgresPool(conninfo=args.dsn))
+        events = await stack.enter_async_context(EventWriter(db))
+        order_activities = OrderActivities(db, events, ClaimCheck.from_env(db))
+        return (
+            [
+                order_activities.order_received,
+                order_activities.order_validated,
+                order_activities.payment_charged,
+                order_activities.status_projected,
+            ],
+            [package_prepared, carrier_dispatched],
+        )
+    stubs = importlib.import_module(args.stubs)
+    return stubs.ORDER_ACTIVITIES, stubs.SHIPPING_ACTIVITIES
+
+
+def load_faults(args: argparse.Namespace) -> None:
+    if not args.faults:
+        return
+    if args.faults.lstrip().startswith("{"):
+        config = json.loads(args.faults)
+    else:
+        with open(args.faults) as f:
+            config = json.load(f)
+    configure_faults(FaultInjector.from_config(config, seed=args.fault_seed))
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    load_faults(args)
+    marks: Dict[str, Dict[str, float]] = {}
+    history_lengths: List[int] = []
+    interceptors = [PhaseTimingInterceptor(marks)]
+    async with contextlib.AsyncExitStack() as stack:
+        env = await stack.enter_async_context(start_environment(args.env))
+        order_activities, shipping_activities = await build_activities(args, stack)
+        await stack.enter_async_context(Worker(
+            env.client,
+            task_queue="order-tq",
+            workflows=[OrderWorkflow],
+            activities=order_activities,
+            interceptors=interceptors,
+            workflow_runner=workflow_runner(),
+        ))
+        await stack.enter_async_context(Worker(
+            env.client,
+            task_queue="shipping-tq",
+            workflows=[ShippingWorkflow],
+            activities=shipping_activities,
+            interceptors=interceptors,
+            workflow_runner=workflow_runner(),
+        ))
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded() -> str:
+            async with semaphore:
+                return await drive_order(env.client, marks, history_lengths, args)
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(bounded() for _ in range(args.orders)), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+
+    statuses: Dict[str, int] = {}
+    for outcome in outcomes:
+        key = outcome if isinstance(outcome, str) else f"error:{type(outcome).__name__}"
+        statuses[key] = statuses.get(key, 0) + 1
+    completed = statuses.get("completed", 0)
+    injector = get_injector()
+    return {
+        "benchmark": "orderLoad",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "config": {
+            "orders": args.orders,
+            "concurrency": args.concurrency,
+            "env": args.env,
+            "activities": args.activities,
+            "review_delay": args.review_delay,
+            "wait": args.wait,
+            "local_steps": args.local_steps,
+            "compact_payloads": os.getenv("TEMPORAL_COMPACT_PAYLOADS", "0") == "1",
+            "sandbox": os.getenv("WORKFLOW_SANDBOX", "passthrough"),
+            "fault_seed": injector.seed if injector else None,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "orders_per_sec": round(completed / elapsed, 3) if elapsed else 0.0,
+        "statuses": statuses,
+        "phases": summarize_phases(marks),
+        "history_events": {
+            "orders": len(history_lengths),
+            "mean": round(sum(history_lengths) / len(history_lengths), 2) if history_lengths else 0.0,
+            "max": max(history_lengths, default=0),
+        },
+        "faults": injector.stats() if injector else {},
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=100, help="Orders to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Orders in flight at once")
+    parser.add_argument("--env", choices=["time-skipping", "local"], default="time-skipping")
+    parser.add_argument("--activities", choices=["stub", "postgres"], default="stub")
+    parser.add_argument("--stubs", default="benchmarks.orderStubs",
+                        help="Module exposing ORDER_ACTIVITIES and SHIPPING_ACTIVITIES")
+    parser.add_argument("--dsn", default=None, help="Postgres conninfo (defaults to DB_* env vars)")
+    parser.add_argument("--review-delay", type=float, default=0.0, help="Seconds before approving review")
+    parser.add_argument("--wait", choices=["poll", "update"], default="poll",
+                        help="Query polling or the wait_for_status update (needs --env local)")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between status polls")
+    parser.add_argument("--status-search-attribute", action="store_true",
+                        help="Publish the OrderStatus search attribute (needs --env local)")
+    parser.add_argument("--local-steps", nargs="*", default=["order_validated"],
+                        help="Steps to run as local activities; pass the flag alone for none")
+    parser.add_argument("--count-history", action="store_true",
+                        help="Fetch each finished order's history and report event counts")
+    parser.add_argument("--faults", default=None,
+                        help="Fault profiles as JSON or a JSON file (default: FAULT_PROFILES)")
+    parser.add_argument("--fault-seed", type=int, default=None, help="Seed for the fault profiles")
+    parser.add_argument("--out", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+    if args.status_search_attribute and args.env != "local":
+        parser.error("--status-search-attribute needs --env local, which registers the attribute")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    results = await run_benchmark(args)
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from temporalio import activity
+
+from util.dataObject import DispatchRequest, DispatchResult, OrderObject, OrderStatusProjection
+from util.flakyCall import flaky_call
+
+# Simulated per-call latency for the stubs, in milliseconds
+STUB_LATENCY_MS = float(os.getenv("BENCH_STUB_LATENCY_MS", "0"))
+
+
+async def _simulate_latency() -> None:
+    if STUB_LATENCY_MS:
+        await asyncio.sleep(STUB_LATENCY_MS / 1000)
+    # Fault profiles (FAULT_PROFILES) apply to the stubs as to the real activities
+    await flaky_call()
+
+
+@activity.defn(name="order_received")
+async def order_received(order_data: List[str]) -> OrderObject:
+    await _simulate_latency()
+    now = str(datetime.now(timezone.utc))
+    return OrderObject(
+        id=order_data[0],
+        data={"items": [{"sku": "ABC", "qty": 1}], "payment_id": order_data[1]},
+        created_at=now,
+        updated_at=now,
+        payment_id=order_data[1],
+        shipping_address="")
+
+
+@activity.defn(name="order_validated")
+async def order_validated(order: OrderObject) -> bool:
+    await _simulate_latency()
+    return bool(order.data.get("items"))
+
+
+@activity.defn(name="payment_charged")
+async def payment_charged(order: OrderObject) -> Dict[str, Any]:
+    await _simulate_latency()
+    amount = sum(i.get("qty", 1) for i in order.data.get("items", []))
+    return {"status": "charged", "amount": amount}
+
+
+@activity.defn(name="status_projected")
+async def status_projected(projection: OrderStatusProjection) -> None:
+    await _simulate_latency()
+
+
+@activity.defn(name="package_prepared")
+async def package_prepared(order: OrderObject) -> str:
+    await _simulate_latency()
+    return "Package ready"
+
+
+@activity.defn(name="carrier_dispatched")
+async def carrier_dispatched(order: OrderObject) -> str:
+    await _simulate_latency()
+    return "Dispatched"
+
+
+@activity.defn(name="carriers_dispatched_bulk")
+async def carriers_dispatched_bulk(carrier: str, batch_id: str, requests: List[DispatchRequest]) -> List[DispatchResult]:
+    await _simulate_latency()
+    return [
+        DispatchResult(order_id=request.order_id, status="Dispatched", carrier=carrier, batch_id=batch_id)
+        for request in requests
+    ]
+
+
+ORDER_ACTIVITIES = [order_received, order_validated, payment_charged, status_projected]
+SHIPPING_ACTIVITIES = [package_prepared, carrier_dispatched]
+# For CarrierDispatchWorkflow; request_dispatch and dispatch_status_checked
+# need a client, so they come from activities.dispatchActivities
+DISPATCH_ACTIVITIES = [carriers_dispatched_bulk]
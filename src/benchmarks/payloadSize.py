@@ -0,0 +1,78 @@
+"""Compare payload bytes and encode/decode time: default vs compact converter.
+
+    cd src
+    python -m benchmarks.payloadSize --items 1 10 100 1000 --iterations 2000 --out payload.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from temporalio.converter import DataConverter
+
+from util.dataObject import OrderObject
+from util.payloadConverter import compact_data_converter
+
+
+def sample_order(items: int) -> OrderObject:
+    return OrderObject(
+        id="5f0c7c1e-8a4b-4d7e-9a55-0f3b7c2d9e11",
+        data={
+            "items": [{"sku": f"SKU-{i:06d}", "qty": i % 5 + 1, "price": 19.99} for i in range(items)],
+            "payment_id": "PAY-5f0c7c1e",
+        },
+        created_at="2024-01-01 00:00:00+00:00",
+        updated_at="2024-01-01 00:00:00+00:00",
+        payment_id="PAY-5f0c7c1e",
+        shipping_address="123 Main St, City, State 12345",
+    )
+
+
+async def measure(converter: DataConverter, value: Any, iterations: int) -> Dict[str, float]:
+    payloads = await converter.encode([value])
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await converter.encode([value])
+    encode_s = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await converter.decode(payloads, [type(value)])
+    decode_s = time.perf_counter() - started
+    return {
+        "bytes": sum(p.ByteSize() for p in payloads),
+        "encode_us": round(encode_s / iterations * 1e6, 2),
+        "decode_us": round(decode_s / iterations * 1e6, 2),
+    }
+
+
+async def run(items: List[int], iterations: int) -> List[Dict[str, Any]]:
+    converters = {"default": DataConverter.default, "compact": compact_data_converter()}
+    results = []
+    for count in items:
+        order = sample_order(count)
+        row: Dict[str, Any] = {"items": count}
+        for name, converter in converters.items():
+            row[name] = await measure(converter, order, iterations)
+        row["bytes_ratio"] = round(row["compact"]["bytes"] / row["default"]["bytes"], 3)
+        results.append(row)
+    return results
+
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--out", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = {"benchmark": "payloadSize", "iterations": args.iterations, "results": await run(args.items, args.iterations)}
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,233 @@
+"""Capture representative workflow histories and replay them.
+
+``capture`` runs each scenario against a time-skipping test server with the
+stub activities and saves the OrderWorkflow (every run, across
+continue-as-new), ShippingWorkflow and CarrierDispatchWorkflow histories to
+the fixtures directory. ``replay`` feeds every fixture to the SDK Replayer
+with the current workflow code. It fails with a non-zero exit on
+any non-determinism and reports replay time per workflow and per event,
+which approximates what a worker pays to rebuild evicted or restarted
+workflows.
+
+    cd src
+    python -m benchmarks.replayHistories capture
+    python -m benchmarks.replayHistories replay --iterations 20 --out replay.json
+
+Capture and replay must use the same TEMPORAL_COMPACT_PAYLOADS setting.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from temporalio.api.enums.v1 import EventType
+from temporalio.client import Client, WorkflowHandle, WorkflowHistory
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Replayer, Worker
+
+from activities.dispatchActivities import DispatchActivities, dispatch_workflow_id
+from benchmarks.orderStubs import DISPATCH_ACTIVITIES, ORDER_ACTIVITIES, SHIPPING_ACTIVITIES
+from util.dataObject import OrderOptions, TERMINAL_STATUSES
+from util.orderSubmit import order_args
+from util.sandbox import workflow_runner
+from util.temporalClient import data_converter
+from workflows.dispatchWorkflow import CarrierDispatchWorkflow
+from workflows.orderWorkflow import OrderWorkflow
+from workflows.shippingWorkflow import ShippingWorkflow
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "histories")
+WORKFLOWS = [OrderWorkflow, ShippingWorkflow, CarrierDispatchWorkflow]
+# Fixture suffixes that must all be present, so replay can't pass by checking nothing
+REQUIRED_KINDS = ("order", "shipping", "dispatch")
+# Address updates sent in the signal-heavy scenario; every fifth one is a redelivery
+SIGNAL_HEAVY_UPDATES = 200
+# Low enough that the signal-heavy review continues as new, so the carried-over runs are replayed too
+SIGNAL_HEAVY_MAX_EVENTS = 150
+DISPATCH_CARRIER = "replay-carrier"
+DISPATCH_BATCH_SIZE = 10
+DISPATCH_FLUSH_SECONDS = 1
+
+
+async def wait_for_workflow_status(handle: WorkflowHandle, status: str) -> str:
+    while True:
+        current = (await handle.query(OrderWorkflow.get_status))["workflow_status"]
+        if current == status or current in TERMINAL_STATUSES:
+            return current
+        await asyncio.sleep(0.05)
+
+
+async def happy_path(handle: WorkflowHandle) -> None:
+    await wait_for_workflow_status(handle, "awaiting_manual_review")
+    await handle.signal(OrderWorkflow.complete_manual_review)
+
+
+async def cancel(handle: WorkflowHandle) -> None:
+    await wait_for_workflow_status(handle, "awaiting_manual_review")
+    await handle.signal(OrderWorkflow.cancel_order)
+
+
+async def review_timeout(handle: WorkflowHandle) -> None:
+    # Awaiting the result lets the test server skip past the review deadline
+    pass
+
+
+async def signal_heavy(handle: WorkflowHandle) -> None:
+    await wait_for_workflow_status(handle, "awaiting_manual_review")
+    for i in range(SIGNAL_HEAVY_UPDATES):
+        request_id = f"addr-{i - 1 if i % 5 == 4 else i}"
+        await handle.signal(OrderWorkflow.update_address, args=[f"{i} Signal St", request_id])
+    await handle.signal(OrderWorkflow.complete_manual_review)
+
+
+SCENARIOS: Dict[str, Callable[[WorkflowHandle], Awaitable[None]]] = {
+    "happy_path": happy_path,
+    "cancel": cancel,
+    "review_timeout": review_timeout,
+    "signal_heavy": signal_heavy,
+    # Approved order whose parcel goes through the carrier's CarrierDispatchWorkflow
+    "dispatch": happy_path,
+}
+SCENARIO_OPTIONS: Dict[str, OrderOptions] = {
+    "signal_heavy": OrderOptions(max_history_events=SIGNAL_HEAVY_MAX_EVENTS),
+    "dispatch": OrderOptions(dispatch_carrier=DISPATCH_CARRIER),
+}
+
+
+async def save_history(client: Client, workflow_id: str, fixtures_dir: str, name: str, kind: str) -> Dict[str, int]:
+    """Save each run of a workflow, following continue-as-new from the first.
+
+    The first run is ``<name>__<kind>.json`` and later ones ``<name>-run<n>__<kind>.json``.
+    """
+    saved: Dict[str, int] = {}
+    run_id = (await client.get_workflow_handle(workflow_id).describe()).raw_description.workflow_execution_info.first_run_id
+    while run_id:
+        history = await client.get_workflow_handle(workflow_id, run_id=run_id).fetch_history()
+        label = name if not saved else f"{name}-run{len(saved) + 1}"
+        path = os.path.join(fixtures_dir, f"{label}__{kind}.json")
+        with open(path, "w") as f:
+            f.write(history.to_json())
+        saved[os.path.basename(path)] = len(history.events)
+        last = history.events[-1]
+        run_id = (
+            last.workflow_execution_continued_as_new_event_attributes.new_execution_run_id
+            if last.event_type == EventType.EVENT_TYPE_WORKFLOW_EXECUTION_CONTINUED_AS_NEW
+            else ""
+        )
+    return saved
+
+
+async def capture(fixtures_dir: str, scenarios: List[str]) -> Dict[str, int]:
+    os.makedirs(fixtures_dir, exist_ok=True)
+    captured: Dict[str, int] = {}
+    async with await WorkflowEnvironment.start_time_skipping(data_converter=data_converter()) as env:
+        dispatch = DispatchActivities(env.client, batch_size=DISPATCH_BATCH_SIZE, flush_seconds=DISPATCH_FLUSH_SECONDS)
+        async with Worker(
+            env.client, task_queue="order-tq", workflows=[OrderWorkflow],
+            activities=ORDER_ACTIVITIES, workflow_runner=workflow_runner(),
+        ), Worker(
+            env.client, task_queue="shipping-tq", workflows=[ShippingWorkflow, CarrierDispatchWorkflow],
+            activities=SHIPPING_ACTIVITIES + DISPATCH_ACTIVITIES + [dispatch.request_dispatch, dispatch.dispatch_status_checked],
+            workflow_runner=workflow_runner(),
+        ):
+            for name in scenarios:
+                order_id = str(uuid.uuid4())
+                options = SCENARIO_OPTIONS.get(name)
+                handle = await env.client.start_workflow(
+                    OrderWorkflow.run,
+                    args=order_args(order_id, str(uuid.uuid4()), "123 Replay St, City, State 12345", options),
+                    id=f"order-{order_id}",
+                    task_queue="order-tq",
+                )
+                await SCENARIOS[name](handle)
+                result = await handle.result()
+                workflow_ids = {"order": handle.id}
+                # Only completed orders ran the shipping child, which finished before its parent
+                if result["status"] == "completed":
+                    workflow_ids["shipping"] = f"shipping-{order_id}"
+                    if options is not None and options.dispatch_carrier:
+                        # The aggregator keeps running; its history so far covers the batch
+                        workflow_ids["dispatch"] = dispatch_workflow_id(options.dispatch_carrier)
+                for kind, workflow_id in workflow_ids.items():
+                    captured.update(await save_history(env.client, workflow_id, fixtures_dir, name, kind))
+    return captured
+
+
+def missing_kinds(fixtures_dir: str) -> List[str]:
+    return [
+        kind for kind in REQUIRED_KINDS
+        if not glob.glob(os.path.join(fixtures_dir, f"*__{kind}.json"))
+    ]
+
+
+def load_fixtures(fixtures_dir: str) -> List[WorkflowHistory]:
+    histories = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, "*.json"))):
+        with open(path) as f:
+            histories.append(WorkflowHistory.from_json(os.path.splitext(os.path.basename(path))[0], f.read()))
+    return histories
+
+
+async def replay(fixtures_dir: str, iterations: int) -> Dict[str, Any]:
+    replayer = Replayer(workflows=WORKFLOWS, workflow_runner=workflow_runner(), data_converter=data_converter())
+    results: Dict[str, Any] = {}
+    failures: Dict[str, str] = {}
+    for history in load_fixtures(fixtures_dir):
+        samples: List[float] = []
+        try:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                await replayer.replay_workflow(history)
+                samples.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            failures[history.workflow_id] = f"{type(e).__name__}: {e}"
+            continue
+        events = len(history.events)
+        p50 = statistics.median(samples)
+        results[history.workflow_id] = {
+            "events": events,
+            "replay_p50_ms": round(p50, 3),
+            "replay_max_ms": round(max(samples), 3),
+            "per_event_us": round(p50 * 1000 / events, 2) if events else 0.0,
+        }
+    return {"workflows": results, "failures": failures}
+
+
+async def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["capture", "replay"])
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of history JSON files")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=10, help="Replays per history")
+    parser.add_argument("--out", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        missing = missing_kinds(args.fixtures)
+        if missing:
+            print(f"FAIL: no {', '.join(missing)} histories in {args.fixtures}; run capture first", file=sys.stderr)
+            return 1
+    if args.command == "capture":
+        results: Dict[str, Any] = {"captured": await capture(args.fixtures, args.scenarios)}
+    else:
+        results = {
+            "benchmark": "replayHistories",
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "iterations": args.iterations,
+            **await replay(args.fixtures, args.iterations),
+        }
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 1 if results.get("failures") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,138 @@
+"""Worker cold-start and workflow sandbox overhead.
+
+Measures two things:
+
+* import: wall time to import each workflow module (and ``worker``) in a
+  fresh interpreter, plus which heavy driver modules the import dragged in;
+* sandbox: for each ``WORKFLOW_SANDBOX`` mode, the time to build a worker
+  and the per-run latency of sequential ShippingWorkflows with stubbed
+  activities, where every run pays the sandbox's per-run setup.
+
+Run it on two commits to compare before and after a change:
+
+    cd src
+    python -m benchmarks.startup --repeat 5 --workflows 50 --out startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from benchmarks.orderStubs import SHIPPING_ACTIVITIES
+from util.dataObject import OrderObject
+from util.sandbox import SANDBOX_MODES, workflow_runner
+from workflows.shippingWorkflow import ShippingWorkflow
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TARGETS = ("workflows.orderWorkflow", "workflows.shippingWorkflow", "workflows.dispatchWorkflow", "worker")
+HEAVY_MODULES = ("psycopg", "psycopg_pool", "dotenv", "loguru", "msgpack", "temporalio.client")
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    heavy: List[str] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append(result["seconds"] * 1000)
+        heavy = result["heavy"]
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "heavy_modules": heavy,
+    }
+
+
+def sample_order(index: int) -> OrderObject:
+    return OrderObject(
+        id=f"startup-{index}",
+        data={"items": [{"sku": "ABC", "qty": 1}]},
+        created_at="2024-01-01 00:00:00+00:00",
+        updated_at="2024-01-01 00:00:00+00:00",
+        payment_id=f"PAY-startup-{index}",
+        shipping_address="123 Bench St, City, State 12345",
+    )
+
+
+async def measure_sandbox(env: WorkflowEnvironment, mode: str, workflows: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    worker = Worker(
+        env.client,
+        task_queue="shipping-tq",
+        workflows=[ShippingWorkflow],
+        activities=SHIPPING_ACTIVITIES,
+        workflow_runner=workflow_runner(mode),
+    )
+    worker_build_ms = (time.perf_counter() - started) * 1000
+
+    samples: List[float] = []
+    async with worker:
+        for index in range(workflows):
+            started = time.perf_counter()
+            await env.client.execute_workflow(
+                ShippingWorkflow.run,
+                args=[sample_order(index), None],
+                id=f"startup-{mode}-{index}-{time.time_ns()}",
+                task_queue="shipping-tq",
+            )
+            samples.append((time.perf_counter() - started) * 1000)
+    steady = samples[1:] or samples
+    return {
+        "worker_build_ms": round(worker_build_ms, 2),
+        "first_run_ms": round(samples[0], 2),
+        "run_p50_ms": round(statistics.median(steady), 2),
+        "run_mean_ms": round(statistics.fmean(steady), 2),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    imports = {module: measure_import(module, args.repeat) for module in IMPORT_TARGETS}
+    sandbox: Dict[str, Any] = {}
+    async with await WorkflowEnvironment.start_time_skipping() as env:
+        for mode in args.modes:
+            sandbox[mode] = await measure_sandbox(env, mode, args.workflows)
+    return {
+        "benchmark": "startup",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "imports": imports,
+        "sandbox": sandbox,
+    }
+
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per import measurement")
+    parser.add_argument("--workflows", type=int, default=50, help="Sequential workflow runs per sandbox mode")
+    parser.add_argument("--modes", nargs="+", choices=SANDBOX_MODES, default=list(SANDBOX_MODES))
+    parser.add_argument("--out", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    output = json.dumps(await run(args), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""Order submission latency: start-then-poll against update-with-start and eager start.
+
+Each mode submits orders and times how long the caller waits for "was the
+order received and validated?":
+
+* poll: ``start_workflow`` then ``get_status`` queries every
+  ``--poll-interval`` seconds, the flow clients use today;
+* update-with-start: one ``execute_update_with_start_workflow`` call;
+* eager: ``start_workflow(request_eager_start=True)`` then the
+  ``wait_for_status`` update, with the order worker on the same client;
+* http: update-with-start through ``orderApi.py``, over one keep-alive
+  connection per concurrent caller.
+
+Runs against a local dev server (update-with-start needs a real server)
+with the stub activities; every order is rejected afterwards.
+
+    cd src
+    python -m benchmarks.submitLatency --orders 200 --concurrency 20 --out submit.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from temporalio.client import Client
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Worker
+
+from benchmarks.orderLoad import percentile
+from benchmarks.orderStubs import ORDER_ACTIVITIES
+from orderApi import start_order_api
+from util.dataObject import ORDER_STATUS_SEARCH_ATTRIBUTE, TERMINAL_STATUSES
+from util.orderSubmit import submit_order
+from util.sandbox import workflow_runner
+from util.temporalClient import data_converter
+from workflows.orderWorkflow import OrderWorkflow
+
+MODES = ("poll", "update-with-start", "eager", "http")
+ADDRESS = "123 Bench St, City, State 12345"
+
+
+async def submit_with_polling(client: Client, order_id: str, poll_interval: float) -> str:
+    handle = await client.start_workflow(
+        OrderWorkflow.run,
+        args=[order_id, str(uuid.uuid4()), ADDRESS],
+        id=f"order-{order_id}",
+        task_queue="order-tq",
+    )
+    while True:
+        status = (await handle.query(OrderWorkflow.get_status))["workflow_status"]
+        if status == "awaiting_manual_review" or status in TERMINAL_STATUSES:
+            return status
+        await asyncio.sleep(poll_interval)
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client for orderApi"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode()
+        self._writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await self._writer.drain()
+        head = (await self._reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        length = 0
+        for line in head.split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return json.loads(await self._reader.readexactly(length))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+async def run_mode(client: Client, mode: str, args: argparse.Namespace, api_port: int) -> Dict[str, Any]:
+    """Submit ``--orders`` orders from ``--concurrency`` callers and summarize their latency"""
+    samples: List[float] = []
+    statuses: Dict[str, int] = {}
+    order_ids: List[str] = []
+    remaining = iter(range(args.warmup + args.orders))
+
+    async def caller() -> None:
+        connection = HttpConnection("127.0.0.1", api_port) if mode == "http" else None
+        try:
+            for index in remaining:
+                order_id = str(uuid.uuid4())
+                order_ids.append(order_id)
+                started = time.perf_counter()
+                if mode == "poll":
+                    status = await submit_with_polling(client, order_id, args.poll_interval)
+                elif mode == "http":
+                    response = await connection.post(
+                        "/orders",
+                        {"order_id": order_id, "payment_id": str(uuid.uuid4()), "address": ADDRESS},
+                    )
+                    status = response.get("status", "error")
+                else:
+                    status = (await submit_order(client, order_id, str(uuid.uuid4()), ADDRESS, mode)).status
+                if index >= args.warmup:
+                    samples.append((time.perf_counter() - started) * 1000)
+                    statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            if connection is not None:
+                connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    await reject_orders(client, order_ids, args.concurrency)
+
+    samples.sort()
+    return {
+        "count": len(samples),
+        "statuses": statuses,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "max_ms": round(samples[-1], 3) if samples else 0.0,
+        "orders_per_sec": round(len(order_ids) / elapsed, 3) if elapsed else 0.0,
+    }
+
+
+async def reject_orders(client: Client, order_ids: List[str], concurrency: int) -> None:
+    """Move the benchmark's orders out of review so they finish instead of waiting for the review timeout"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def reject(order_id: str) -> None:
+        async with semaphore:
+            await client.get_workflow_handle(f"order-{order_id}").signal(
+                OrderWorkflow.reject_manual_review, "Benchmark order"
+            )
+
+    await asyncio.gather(*(reject(order_id) for order_id in order_ids), return_exceptions=True)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    async with await WorkflowEnvironment.start_local(
+        data_converter=data_converter(),
+        search_attributes=[ORDER_STATUS_SEARCH_ATTRIBUTE],
+    ) as env:
+        # The worker shares env.client, so eager starts can be handed to it directly
+        async with Worker(
+            env.client,
+            task_queue="order-tq",
+            workflows=[OrderWorkflow],
+            activities=ORDER_ACTIVITIES,
+            workflow_runner=workflow_runner(),
+        ):
+            server = await start_order_api(env.client, args.api_port, "127.0.0.1")
+            async with server:
+                for mode in args.modes:
+                    results[mode] = await run_mode(env.client, mode, args, args.api_port)
+    return {
+        "benchmark": "submitLatency",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "orders": args.orders,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "poll_interval": args.poll_interval,
+        },
+        "modes": results,
+    }
+
+
+async def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200, help="Measured orders per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent callers")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured orders per mode")
+    parser.add_argument("--poll-interval", type=float, default=0.05, help="Seconds between status polls")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--api-port", type=int, default=18080, help="Port for the in-process orderApi")
+    parser.add_argument("--out", default=None, help="Write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    output = json.dumps(await run(args), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,229 @@
+"""Bulk order intake: start many OrderWorkflows over one shared client.
+
+    cd src
+    python bulkIntake.py orders.csv --concurrency 200 --batch-size 1000
+    python bulkIntake.py --generate 10000
+
+Input rows are (order_id, payment_id, address), read lazily from CSV or
+NDJSON, so memory stays bounded by the in-flight limit, not the input size.
+Both ids must be UUIDs. A malformed row is counted as failed and the rest
+of the input is still submitted.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from temporalio.client import Client
+from temporalio.common import WorkflowIDReusePolicy
+from temporalio.exceptions import WorkflowAlreadyStartedError
+
+from util.dataObject import OrderOptions
+from util.orderSubmit import order_args, order_options_for
+from util.temporalClient import connect_client
+
+OrderRow = Tuple[str, str, str]
+# A row as read: CSV fields or an NDJSON line, validated by parse_row
+RawRow = Union[Sequence[Any], str]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchReport:
+    batch: int
+    started: int
+    duplicates: int
+    failed: int
+    elapsed_s: float
+    orders_per_sec: float
+
+
+@dataclass
+class BulkSummary:
+    started: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    elapsed_s: float = 0.0
+    # First few failures only, so a bad input doesn't grow memory without bound
+    failure_samples: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def order_workflow_id(order_id: str) -> str:
+    return f"order-{order_id}"
+
+
+def parse_row(row: RawRow) -> OrderRow:
+    """Validate one input row; raises ValueError when it is malformed"""
+    if isinstance(row, str):
+        try:
+            data = json.loads(row)
+            row = (data["order_id"], data["payment_id"], data["address"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed NDJSON row: {e!r}") from None
+    if len(row) != 3:
+        raise ValueError(f"Expected order_id, payment_id, address; got {len(row)} fields")
+    order_id, payment_id, address = row
+    try:
+        # Both ids are stored in uuid columns
+        return str(uuid.UUID(order_id)), str(uuid.UUID(payment_id)), address
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError(f"order_id and payment_id must be UUIDs: {order_id!r}, {payment_id!r}") from None
+
+
+async def _aiter(orders: Union[Iterable[RawRow], AsyncIterable[RawRow]]) -> AsyncIterator[RawRow]:
+    if hasattr(orders, "__aiter__"):
+        async for row in orders:
+            yield row
+    else:
+        for row in orders:
+            yield row
+
+
+async def submit_orders(
+    client: Client,
+    orders: Union[Iterable[RawRow], AsyncIterable[RawRow]],
+    concurrency: int = 100,
+    batch_size: int = 1000,
+    task_queue: str = "order-tq",
+    on_batch: Optional[Callable[[BatchReport], None]] = None,
+    max_failure_samples: int = 100,
+    options: Optional[OrderOptions] = None,
+) -> BulkSummary:
+    """Start an OrderWorkflow per row with at most ``concurrency`` starts in flight.
+
+    Workflow ids are derived from the order id, so resubmitting an order is
+    reported as a duplicate instead of starting a second run. ``on_batch`` is
+    called after every ``batch_size`` completed submissions. Rows that fail
+    ``parse_row`` count as failed without stopping the run.
+    """
+    summary = BulkSummary()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    on_batch = on_batch or (lambda report: logger.info(f"Bulk intake batch: {report}"))
+    started_at = time.perf_counter()
+    batch = {"number": 0, "done": 0, "started": 0, "duplicates": 0, "failed": 0, "since": started_at}
+
+    def close_batch() -> None:
+        now = time.perf_counter()
+        elapsed = now - batch["since"]
+        batch["number"] += 1
+        on_batch(BatchReport(
+            batch=batch["number"],
+            started=batch["started"],
+            duplicates=batch["duplicates"],
+            failed=batch["failed"],
+            elapsed_s=round(elapsed, 3),
+            orders_per_sec=round(batch["done"] / elapsed, 3) if elapsed else 0.0,
+        ))
+        batch.update(done=0, started=0, duplicates=0, failed=0, since=now)
+
+    def record(outcome: str) -> None:
+        batch[outcome] += 1
+        batch["done"] += 1
+        if batch["done"] >= batch_size:
+            close_batch()
+
+    async def produce() -> None:
+        async for row in _aiter(orders):
+            await queue.put(row)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def consume() -> None:
+        while True:
+            row = await queue.get()
+            if row is None:
+                return
+            # Until the row parses, failures are reported against the raw row
+            order_id = str(row)[:100]
+            try:
+                order_id, payment_id, address = parse_row(row)
+                await client.start_workflow(
+                    "OrderWorkflow",
+                    args=order_args(order_id, payment_id, address, options),
+                    id=order_workflow_id(order_id),
+                    task_queue=task_queue,
+                    id_reuse_policy=WorkflowIDReusePolicy.REJECT_DUPLICATE,
+                )
+            except WorkflowAlreadyStartedError:
+                summary.duplicates += 1
+                record("duplicates")
+            except Exception as e:
+                summary.failed += 1
+                if len(summary.failure_samples) < max_failure_samples:
+                    summary.failure_samples.append((order_id, str(e)))
+                record("failed")
+            else:
+                summary.started += 1
+                record("started")
+
+    consumers = [asyncio.create_task(consume()) for _ in range(concurrency)]
+    try:
+        await produce()
+        await asyncio.gather(*consumers)
+    finally:
+        for consumer in consumers:
+            consumer.cancel()
+    if batch["done"]:
+        close_batch()
+    summary.elapsed_s = round(time.perf_counter() - started_at, 3)
+    return summary
+
+
+def read_orders(path: str) -> Iterator[RawRow]:
+    """Stream raw rows from a CSV (order_id,payment_id,address) or NDJSON file.
+
+    Rows are validated by the consumers (``parse_row``), so one bad line
+    fails that order instead of the whole import.
+    """
+    with open(path, newline="") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in f:
+                if line.strip():
+                    yield line
+        else:
+            for row in csv.reader(f):
+                if row:
+                    yield row
+
+
+def generate_orders(count: int) -> Iterator[OrderRow]:
+    for _ in range(count):
+        order_id = str(uuid.uuid4())
+        yield order_id, str(uuid.uuid4()), "123 Main St, City, State 12345"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="CSV or NDJSON file of orders")
+    parser.add_argument("--generate", type=int, default=0, help="Submit N synthetic orders instead of a file")
+    parser.add_argument("--concurrency", type=int, default=100, help="Workflow starts in flight at once")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Submissions per progress report")
+    parser.add_argument("--task-queue", default="order-tq")
+    parser.add_argument("--status-search-attribute", action=argparse.BooleanOptionalAction, default=None,
+                        help="Publish OrderStatus for the review queue (default: when it is registered)")
+    args = parser.parse_args()
+    if not args.path and not args.generate:
+        parser.error("Pass a file of orders or --generate N")
+
+    logging.basicConfig(level=logging.INFO)
+    client = await connect_client()
+    orders = generate_orders(args.generate) if args.generate else read_orders(args.path)
+    summary = await submit_orders(
+        client,
+        orders,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        task_queue=args.task_queue,
+        options=await order_options_for(client, args.status_search_attribute),
+    )
+    print(f"Bulk intake finished: {summary}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,45 +1,33 @@
 import asyncio
 import time
 from temporalio.client import Client
+from util.temporalClient import connect_client
 from workflows.orderWorkflow import OrderWorkflow
+from util.statusWaiter import wait_for_status
 import uuid
 
 
 
-async def demo_order_workflow():
+async def demo_order_workflow(client: Client):
     """Demonstrate the OrderWorkflow with various signals and scenarios"""
     
-    # Connect to Temporal
-    client = await Client.connect("localhost:7233")
-    
     # Start the order workflow
     order_id = str(uuid.uuid4())
     print(f"Starting order workflow for order: {order_id}")
     
     handle = await client.start_workflow(
         "OrderWorkflow",
-        args=[order_id,"123 Main St, City, State 12345"],
+        args=[order_id, str(uuid.uuid4()), "123 Main St, City, State 12345"],
         id=f"order-{order_id}",
         task_queue="order-tq",
     )
     
     print(f"Workflow started with ID: {handle.id}")
     
-    # Wait a bit for the workflow to start
-    await asyncio.sleep(2)
-    
-    # Query the workflow status
-    status = await handle.query(OrderWorkflow.get_status)
-    print(f"Initial status: {status['workflow_status']}")
-    
-    # Wait for manual review phase
+    # Wait for manual review phase; the workflow pushes the status back to us
     print("Waiting for workflow to reach manual review phase...")
-    while True:
-        status = await handle.query(OrderWorkflow.get_status)
-        if status['workflow_status'] == 'awaiting_manual_review':
-            print("Workflow is now awaiting manual review!")
-            break
-        await asyncio.sleep(1)
+    status = await wait_for_status(handle, "awaiting_manual_review", timeout=60)
+    print(f"Workflow status: {status.workflow_status} (version {status.version})")
     
     # Demonstrate address update signal
     print("Updating shipping address...")
@@ -56,17 +44,15 @@ async def demo_order_workflow():
     print(f"Workflow completed with result: {result}")
 
 
-async def demo_cancellation():
+async def demo_cancellation(client: Client):
     """Demonstrate order cancellation"""
     
-    client = await Client.connect("localhost:7233")
-    
     order_id = str(uuid.uuid4())
     print(f"Starting order workflow for cancellation demo: {order_id}")
     
     handle = await client.start_workflow(
         "OrderWorkflow",
-        args=[order_id,"789 Cancel St, City, State 12345"],  
+        args=[order_id, str(uuid.uuid4()), "789 Cancel St, City, State 12345"],
         id=f"cancel-{order_id}",
         task_queue="order-tq",
     )
@@ -98,12 +84,15 @@ async def main():
     print()
     
     try:
+        # One client shared by every scenario
+        client = await connect_client()
+
         # Run the main demo
-        await demo_order_workflow()
+        await demo_order_workflow(client)
         print("\n" + "="*50 + "\n")
         
         # Run the cancellation demo
-        # await demo_cancellation()
+        # await demo_cancellation(client)
         
     except Exception as e:
         print(f"Demo failed with error: {e}")
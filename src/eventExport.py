@@ -0,0 +1,298 @@
+"""Streaming export of the `events` table to CSV, NDJSON or Parquet.
+
+    cd src
+    python eventExport.py events.ndjson --from 2026-01-01 --to 2026-02-01
+    python eventExport.py events.csv --type PaymentCharged --resume
+    python eventExport.py events.parquet --chunk-size 20000
+
+Rows are read in id order through named server-side cursors and written
+chunk by chunk, so memory stays bounded by ``--chunk-size`` whatever the
+range. Each cursor covers at most ``--segment-rows`` rows, which keeps
+transactions short on a busy table. After every chunk the last exported
+id is saved to ``<output>.checkpoint``; ``--resume`` continues from it.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from util.db import PostgresPool
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ("id", "order_id", "type", "payload", "created_at")
+
+
+@dataclass
+class EventRow:
+    id: int
+    order_id: str
+    type: str
+    payload: Dict[str, Any]
+    created_at: datetime
+
+
+@dataclass
+class ExportSummary:
+    rows: int
+    last_id: int
+    files: List[str]
+    elapsed_s: float
+
+
+def _event_query(
+    created_from: Optional[datetime],
+    created_to: Optional[datetime],
+    types: Optional[Sequence[str]],
+) -> tuple:
+    """SQL and filter params; the resume id and segment limit are bound after them"""
+    # Only fixed fragments are concatenated; every value is a bound parameter
+    conditions: List[str] = []
+    params: list = []
+    if created_from is not None:
+        conditions.append("created_at >= %s")
+        params.append(created_from)
+    if created_to is not None:
+        conditions.append("created_at < %s")
+        params.append(created_to)
+    if types:
+        conditions.append("type = ANY(%s)")
+        params.append(list(types))
+    conditions.append("id > %s")
+    sql = f"SELECT {', '.join(COLUMNS)} FROM events WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s"
+    return sql, params
+
+
+async def iter_event_chunks(
+    db: PostgresPool,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    types: Optional[Sequence[str]] = None,
+    after_id: int = 0,
+    chunk_size: int = 5000,
+    segment_rows: int = 1_000_000,
+) -> AsyncIterator[List[EventRow]]:
+    """Yield events with ``id > after_id`` in id order, ``chunk_size`` rows at a time"""
+    sql, params = _event_query(created_from, created_to, types)
+    last_id = after_id
+    while True:
+        segment = 0
+        async for rows in db.stream(sql, (*params, last_id, segment_rows), chunk_size, name="events_export"):
+            segment += len(rows)
+            last_id = rows[-1][0]
+            yield [EventRow(id, str(order_id), type, payload, created_at) for id, order_id, type, payload, created_at in rows]
+        if segment < segment_rows:
+            return
+
+
+async def iter_events(db: PostgresPool, **kwargs) -> AsyncIterator[EventRow]:
+    """Row-at-a-time view of ``iter_event_chunks``"""
+    async for chunk in iter_event_chunks(db, **kwargs):
+        for row in chunk:
+            yield row
+
+
+class CsvSink:
+    def __init__(self, f, write_header: bool):
+        self._writer = csv.writer(f)
+        if write_header:
+            self._writer.writerow(COLUMNS)
+
+    def write(self, rows: List[EventRow]) -> None:
+        self._writer.writerows(
+            (row.id, row.order_id, row.type, json.dumps(row.payload), row.created_at.isoformat())
+            for row in rows
+        )
+
+
+class NdjsonSink:
+    def __init__(self, f, write_header: bool):
+        self._f = f
+
+    def write(self, rows: List[EventRow]) -> None:
+        self._f.writelines(
+            json.dumps({
+                "id": row.id,
+                "order_id": row.order_id,
+                "type": row.type,
+                "payload": row.payload,
+                "created_at": row.created_at.isoformat(),
+            }) + "\n"
+            for row in rows
+        )
+
+
+TEXT_SINKS = {"csv": CsvSink, "ndjson": NdjsonSink}
+
+
+def _load_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def _format_for(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext == "jsonl":
+        return "ndjson"
+    if ext in ("csv", "ndjson", "parquet"):
+        return ext
+    raise ValueError(f"Cannot infer export format from {path}; pass fmt")
+
+
+async def export_events(
+    db: PostgresPool,
+    path: str,
+    fmt: Optional[str] = None,
+    resume: bool = False,
+    file_rows: int = 1_000_000,
+    **query,
+) -> ExportSummary:
+    """Export events to ``path``, checkpointing after every chunk.
+
+    CSV and NDJSON go to one file; on resume it is truncated back to the
+    last checkpointed byte, so no row is written twice. Parquet files only
+    become readable once closed, so Parquet output is split into parts of
+    up to ``file_rows`` rows (``<stem>-<first id>.parquet``) and checkpointed
+    per part. ``query`` is passed to ``iter_event_chunks``.
+    """
+    fmt = fmt or _format_for(path)
+    checkpoint_path = f"{path}.checkpoint"
+    checkpoint = _load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is not None:
+        query["after_id"] = checkpoint["last_id"]
+        logger.info(f"Resuming export to {path} after id {checkpoint['last_id']}")
+    checkpoint = checkpoint or {"last_id": query.get("after_id", 0), "offset": 0, "rows": 0}
+
+    started = time.perf_counter()
+    if fmt == "parquet":
+        files = await _export_parquet(db, path, checkpoint, checkpoint_path, file_rows, query)
+    else:
+        files = [path]
+        sink_cls = TEXT_SINKS[fmt]
+        with open(path, "r+" if checkpoint["offset"] else "w", newline="", encoding="utf-8") as f:
+            f.truncate(checkpoint["offset"])
+            f.seek(checkpoint["offset"])
+            sink = sink_cls(f, write_header=checkpoint["offset"] == 0)
+            async for chunk in iter_event_chunks(db, **query):
+                sink.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+                checkpoint.update(last_id=chunk[-1].id, offset=f.tell(), rows=checkpoint["rows"] + len(chunk))
+                _save_checkpoint(checkpoint_path, checkpoint)
+    return ExportSummary(
+        rows=checkpoint["rows"],
+        last_id=checkpoint["last_id"],
+        files=files,
+        elapsed_s=round(time.perf_counter() - started, 3),
+    )
+
+
+async def _export_parquet(
+    db: PostgresPool,
+    path: str,
+    checkpoint: Dict[str, Any],
+    checkpoint_path: str,
+    file_rows: int,
+    query: Dict[str, Any],
+) -> List[str]:
+    # Only Parquet output needs pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("order_id", pa.string()),
+        ("type", pa.string()),
+        ("payload", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+    stem, ext = os.path.splitext(path)
+    files: List[str] = []
+    writer = None
+    part_rows = 0
+    try:
+        async for chunk in iter_event_chunks(db, **query):
+            if writer is None:
+                files.append(f"{stem}-{chunk[0].id}{ext}")
+                writer = pq.ParquetWriter(files[-1], schema)
+                part_rows = 0
+            writer.write_batch(pa.record_batch([
+                [row.id for row in chunk],
+                [row.order_id for row in chunk],
+                [row.type for row in chunk],
+                [json.dumps(row.payload) for row in chunk],
+                [row.created_at for row in chunk],
+            ], schema=schema))
+            part_rows += len(chunk)
+            checkpoint["pending"] = {"last_id": chunk[-1].id, "rows": part_rows}
+            if part_rows >= file_rows:
+                writer.close()
+                writer = None
+                _commit_part(checkpoint, checkpoint_path)
+        if writer is not None:
+            writer.close()
+            writer = None
+            _commit_part(checkpoint, checkpoint_path)
+    finally:
+        # An interrupted part isn't checkpointed; resume starts at the same id and overwrites it
+        if writer is not None:
+            writer.close()
+    return files
+
+
+def _commit_part(checkpoint: Dict[str, Any], checkpoint_path: str) -> None:
+    pending = checkpoint.pop("pending")
+    checkpoint.update(last_id=pending["last_id"], rows=checkpoint["rows"] + pending["rows"])
+    _save_checkpoint(checkpoint_path, checkpoint)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Output file; .csv, .ndjson/.jsonl or .parquet")
+    parser.add_argument("--format", choices=["csv", "ndjson", "parquet"], help="Override the format from the extension")
+    parser.add_argument("--from", dest="created_from", type=datetime.fromisoformat, help="created_at lower bound (inclusive)")
+    parser.add_argument("--to", dest="created_to", type=datetime.fromisoformat, help="created_at upper bound (exclusive)")
+    parser.add_argument("--type", dest="types", action="append", help="Only this event type; repeatable")
+    parser.add_argument("--after-id", type=int, default=0, help="Start after this event id")
+    parser.add_argument("--resume", action="store_true", help="Continue from <path>.checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per cursor fetch and write")
+    parser.add_argument("--segment-rows", type=int, default=1_000_000, help="Rows per server-side cursor")
+    parser.add_argument("--file-rows", type=int, default=1_000_000, help="Rows per Parquet part")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    async with PostgresPool(min_size=1, max_size=1, name="event-export") as db:
+        summary = await export_events(
+            db,
+            args.path,
+            fmt=args.format,
+            resume=args.resume,
+            file_rows=args.file_rows,
+            created_from=args.created_from,
+            created_to=args.created_to,
+            types=args.types,
+            after_id=args.after_id,
+            chunk_size=args.chunk_size,
+            segment_rows=args.segment_rows,
+        )
+    print(f"Event export finished: {summary}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,304 @@
+"""Versioned schema migrations and events partition maintenance.
+
+    cd src
+    python migrate.py up                      # apply pending migrations
+    python migrate.py status
+    python migrate.py maintain --ahead 3 --retain-months 12
+
+Migrations are the ``NNNN_name.sql`` files in ``migrations/``, applied in
+order and recorded in ``schema_migrations`` with a checksum. Each file runs
+in one transaction, together with its bookkeeping row. A file starting with
+``-- migrate: no-transaction`` (needed for ``CREATE INDEX CONCURRENTLY``)
+runs statement by statement instead, so every statement in it must be
+idempotent. Runners serialize on an advisory lock, so several workers or
+deploys can call ``up`` at once. ``--dsn`` defaults to the DB_* variables,
+so this runs against a local Postgres as easily as a shared one.
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from psycopg import AsyncConnection, Error as PsycopgError
+from psycopg.errors import CheckViolation, DuplicateTable, InvalidObjectDefinition
+from psycopg.sql import SQL, Identifier, Literal
+
+from util.db import conninfo_from_env
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+NO_TRANSACTION = "-- migrate: no-transaction"
+# Arbitrary constants identifying this repo's advisory locks
+MIGRATION_LOCK = 7_310_001
+MAINTENANCE_LOCK = 7_310_002
+PARTITION_NAME = re.compile(r"^events_p(\d{4})_(\d{2})$")
+CONCURRENT_INDEX = re.compile(
+    r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?("[^"]+"|\w+)',
+    re.IGNORECASE,
+)
+
+CREATE_MIGRATIONS_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations(
+    version int4 PRIMARY KEY,
+    name text NOT NULL,
+    checksum text NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+)"""
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    sql: str
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode()).hexdigest()
+
+    @property
+    def transactional(self) -> bool:
+        return not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+    def statements(self) -> List[str]:
+        """Statements of a no-transaction migration; these files hold no function bodies"""
+        lines = [line for line in self.sql.splitlines() if not line.strip().startswith("--")]
+        return [statement.strip() for statement in "\n".join(lines).split(";") if statement.strip()]
+
+    def concurrent_indexes(self) -> List[str]:
+        """Names of the indexes this migration builds with CREATE INDEX CONCURRENTLY"""
+        names = []
+        for statement in self.statements():
+            match = CONCURRENT_INDEX.match(statement)
+            if match:
+                name = match.group(1)
+                # Unquoted identifiers are folded to lower case
+                names.append(name[1:-1] if name.startswith('"') else name.lower())
+        return names
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.sql"))):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        version, _, name = stem.partition("_")
+        with open(path) as f:
+            migrations.append(Migration(int(version), name, f.read()))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+async def connect(conninfo: Optional[str] = None) -> AsyncConnection:
+    # Autocommit: transactional migrations open their own transaction, the rest can't run in one
+    return await AsyncConnection.connect(conninfo or conninfo_from_env(), autocommit=True)
+
+
+async def applied_migrations(conn: AsyncConnection) -> Dict[int, str]:
+    await conn.execute(CREATE_MIGRATIONS_TABLE)
+    cursor = await conn.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(await cursor.fetchall())
+
+
+async def migrate(conn: AsyncConnection, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """Apply pending migrations in order; returns the names applied"""
+    applied: List[str] = []
+    await conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK,))
+    try:
+        done = await applied_migrations(conn)
+        for migration in load_migrations(directory):
+            label = f"{migration.version:04d}_{migration.name}"
+            if migration.version in done:
+                if done[migration.version] != migration.checksum:
+                    raise RuntimeError(f"Migration {label} changed after it was applied; add a new one instead")
+                continue
+            logger.info(f"Applying migration {label}")
+            if migration.transactional:
+                async with conn.transaction():
+                    await conn.execute(migration.sql)
+                    await _record(conn, migration)
+            else:
+                for statement in migration.statements():
+                    await conn.execute(statement)
+                await _check_indexes_valid(conn, label, migration.concurrent_indexes())
+                await _record(conn, migration)
+            applied.append(label)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK,))
+    return applied
+
+
+async def _record(conn: AsyncConnection, migration: Migration) -> None:
+    await conn.execute(
+        "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+        (migration.version, migration.name, migration.checksum),
+    )
+
+
+async def _check_indexes_valid(conn: AsyncConnection, label: str, names: List[str]) -> None:
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would skip.
+    # Only this migration's indexes on the search path count; other invalid indexes aren't ours to judge.
+    if not names:
+        return
+    cursor = await conn.execute(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+        " WHERE NOT i.indisvalid AND c.relname = ANY(%s) AND pg_table_is_visible(c.oid)",
+        (names,),
+    )
+    invalid = [name for (name,) in await cursor.fetchall()]
+    if invalid:
+        raise RuntimeError(f"Invalid indexes after {label}: {invalid}; drop them and run again")
+
+
+def _month_start(day: date, offset: int) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def maintain_partitions(
+    conn: AsyncConnection,
+    ahead: int = 3,
+    retain_months: int = 0,
+    archive_schema: Optional[str] = "archive",
+) -> Dict[str, List[str]]:
+    """Pre-create monthly events partitions and detach expired ones.
+
+    Creates partitions for this month and the next ``ahead`` months; months
+    already covered (by the legacy partition, say) are skipped. When
+    events_default already holds rows for a month, they are moved into the
+    new partition (see ``_split_default_partition``). With
+    ``retain_months`` set, monthly partitions ending before that many months
+    ago are detached and moved to ``archive_schema``, or dropped when it is
+    None. Detaching can't be concurrent while events_default exists, so each
+    detach briefly locks inserts. Only one maintainer runs at a time; others
+    return at once.
+    """
+    result: Dict[str, List[str]] = {"created": [], "detached": []}
+    cursor = await conn.execute("SELECT pg_try_advisory_lock(%s)", (MAINTENANCE_LOCK,))
+    if not (await cursor.fetchone())[0]:
+        return result
+    try:
+        today = datetime.now(timezone.utc).date()
+        for offset in range(ahead + 1):
+            start, end = _month_start(today, offset), _month_start(today, offset + 1)
+            name = f"events_p{start:%Y_%m}"
+            try:
+                await _create_partition(conn, name, start, end)
+                result["created"].append(name)
+            except DuplicateTable:
+                pass
+            except InvalidObjectDefinition:
+                # Overlaps an existing partition, such as the legacy one
+                logger.info(f"Skipping partition {name}: range already covered")
+            except CheckViolation:
+                try:
+                    moved = await _split_default_partition(conn, name, start, end)
+                except PsycopgError as e:
+                    logger.warning(f"Partition {name} not created; its rows stay in events_default: {e}")
+                    continue
+                logger.warning(f"Moved {moved} rows for {start:%Y-%m} from events_default into {name}")
+                result["created"].append(name)
+
+        if retain_months:
+            cutoff = _month_start(today, -retain_months)
+            cursor = await conn.execute(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'events'::regclass"
+            )
+            for (name,) in await cursor.fetchall():
+                match = PARTITION_NAME.match(name)
+                if not match or _month_start(date(int(match[1]), int(match[2]), 1), 1) > cutoff:
+                    continue
+                await conn.execute(SQL("ALTER TABLE events DETACH PARTITION {}").format(Identifier(name)))
+                if archive_schema:
+                    await conn.execute(SQL("CREATE SCHEMA IF NOT EXISTS {}").format(Identifier(archive_schema)))
+                    await conn.execute(SQL("ALTER TABLE {} SET SCHEMA {}").format(Identifier(name), Identifier(archive_schema)))
+                else:
+                    await conn.execute(SQL("DROP TABLE {}").format(Identifier(name)))
+                result["detached"].append(name)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(%s)", (MAINTENANCE_LOCK,))
+    if result["created"] or result["detached"]:
+        logger.info(f"Events partition maintenance: {result}")
+    return result
+
+
+async def _create_partition(conn: AsyncConnection, name: str, start: date, end: date) -> None:
+    await conn.execute(SQL(
+        "CREATE TABLE {} PARTITION OF events FOR VALUES FROM ({}) TO ({})"
+    ).format(Identifier(name), Literal(start), Literal(end)))
+
+
+async def _split_default_partition(conn: AsyncConnection, name: str, start: date, end: date) -> int:
+    """Create a month's partition when events_default already holds rows for it.
+
+    In one transaction: detach events_default, create the partition, move the
+    month's rows into it and attach events_default again. Inserts into events
+    wait on the lock until it commits. Returns the number of rows moved.
+    """
+    async with conn.transaction():
+        await conn.execute("ALTER TABLE events DETACH PARTITION events_default")
+        await _create_partition(conn, name, start, end)
+        cursor = await conn.execute(SQL(
+            "WITH moved AS ("
+            "DELETE FROM events_default WHERE created_at >= {} AND created_at < {} RETURNING *"
+            ") INSERT INTO events SELECT * FROM moved"
+        ).format(Literal(start), Literal(end)))
+        moved = cursor.rowcount
+        await conn.execute("ALTER TABLE events ATTACH PARTITION events_default DEFAULT")
+    return moved
+
+
+async def maintain_partitions_periodically(interval: float, conninfo: Optional[str] = None, **options):
+    """Run ``maintain_partitions`` every ``interval`` seconds, starting now"""
+    while True:
+        try:
+            conn = await connect(conninfo)
+            async with conn:
+                await maintain_partitions(conn, **options)
+        except Exception as e:
+            logger.error(f"Events partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["up", "status", "maintain"])
+    parser.add_argument("--dsn", default=None, help="Postgres conninfo (defaults to DB_* env vars)")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR, help="Migrations directory")
+    parser.add_argument("--ahead", type=int, default=3, help="Months of events partitions to pre-create")
+    parser.add_argument("--retain-months", type=int, default=0, help="Detach partitions older than this; 0 keeps all")
+    parser.add_argument("--archive-schema", default="archive", help="Schema for detached partitions")
+    parser.add_argument("--drop", action="store_true", help="Drop detached partitions instead of archiving them")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    conn = await connect(args.dsn)
+    async with conn:
+        if args.command == "up":
+            applied = await migrate(conn, args.dir)
+            print(f"Applied {applied}" if applied else "Schema is up to date")
+        elif args.command == "status":
+            done = await applied_migrations(conn)
+            for migration in load_migrations(args.dir):
+                state = "applied" if migration.version in done else "pending"
+                print(f"{migration.version:04d}_{migration.name}: {state}")
+        else:
+            result = await maintain_partitions(
+                conn,
+                ahead=args.ahead,
+                retain_months=args.retain_months,
+                archive_schema=None if args.drop else args.archive_schema,
+            )
+            print(f"Events partition maintenance: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+-- Tables util/tableDetails.sql created before migrations existed: the original orders,
+-- payments and events DDL, plus idempotency_ledger (payment idempotency) and
+-- order_status_view (status read model) added to it later. A no-op on databases created from it.
+CREATE TABLE IF NOT EXISTS orders (
+    id UUID PRIMARY KEY,
+    order_data jsonb NOT NULL,
+    address_json jsonb NOT NULL,
+    order_status VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    id UUID PRIMARY KEY,
+    order_id UUID NOT NULL,
+    payment_status int4 NOT NULL,
+    amount DECIMAL(10, 2) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS events(
+    id int4 GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    order_id UUID NOT NULL,
+    type text NOT NULL,
+    payload jsonb NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS idempotency_ledger(
+    workflow_id text NOT NULL,
+    activity_type text NOT NULL,
+    idempotency_key text NOT NULL,
+    result jsonb NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (workflow_id, activity_type, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_ledger_expires_at_idx ON idempotency_ledger (expires_at);
+
+-- Read model of each order's latest workflow status, projected by OrderWorkflow
+CREATE TABLE IF NOT EXISTS order_status_view(
+    order_id UUID PRIMARY KEY,
+    workflow_id text NOT NULL,
+    status text NOT NULL,
+    version int4 NOT NULL,
+    is_cancelled boolean NOT NULL DEFAULT FALSE,
+    manual_review_completed boolean NOT NULL DEFAULT FALSE,
+    shipping_address text NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL
+);
+
+-- Keyset pages are ordered by (updated_at, order_id), newest first
+CREATE INDEX IF NOT EXISTS order_status_view_status_idx ON order_status_view (status, updated_at DESC, order_id DESC);
+CREATE INDEX IF NOT EXISTS order_status_view_updated_at_idx ON order_status_view (updated_at DESC, order_id DESC);
@@ -0,0 +1,5 @@
+-- migrate: no-transaction
+-- Built concurrently so writes continue while the indexes build.
+-- The events index is created with the partitioned table in 0003.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS payments_order_id_idx ON payments (order_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS orders_order_status_idx ON orders (order_status);
@@ -0,0 +1,41 @@
+-- Range-partition events by created_at, one partition per month.
+--
+-- The existing table becomes the partition for everything before the start of
+-- next month, so no rows are copied. Its id column is widened to bigint and
+-- moved from an identity to a shared sequence, which rewrites it once:
+-- run this in a maintenance window on large tables. Monthly partitions from
+-- next month on are created by `python migrate.py maintain` (also run by the
+-- order worker); rows outside every partition land in events_default.
+DO $$
+DECLARE
+    legacy_until timestamp := date_trunc('month', NOW()) + interval '1 month';
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE relname = 'events' AND relkind = 'r'
+               AND relnamespace = 'public'::regnamespace) THEN
+        ALTER TABLE events RENAME TO events_legacy;
+        ALTER TABLE events_legacy RENAME CONSTRAINT events_pkey TO events_legacy_pkey;
+        ALTER TABLE events_legacy ALTER COLUMN id DROP IDENTITY IF EXISTS;
+        ALTER TABLE events_legacy ALTER COLUMN id TYPE bigint;
+
+        CREATE SEQUENCE IF NOT EXISTS events_id_seq AS bigint;
+        PERFORM setval('events_id_seq', COALESCE((SELECT max(id) FROM events_legacy), 0) + 1, false);
+
+        CREATE TABLE events(
+            id bigint NOT NULL DEFAULT nextval('events_id_seq'),
+            order_id UUID NOT NULL,
+            type text NOT NULL,
+            payload jsonb NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        ALTER SEQUENCE events_id_seq OWNED BY events.id;
+
+        EXECUTE format(
+            'ALTER TABLE events ATTACH PARTITION events_legacy FOR VALUES FROM (MINVALUE) TO (%L)',
+            legacy_until
+        );
+        CREATE TABLE events_default PARTITION OF events DEFAULT;
+    END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS events_order_id_idx ON events (order_id, created_at);
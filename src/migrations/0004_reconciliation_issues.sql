@@ -0,0 +1,13 @@
+-- Mismatches between the orders/payments tables and workflow state, found by ReconciliationWorkflow
+CREATE TABLE IF NOT EXISTS reconciliation_issues(
+    order_id UUID NOT NULL,
+    kind text NOT NULL,
+    -- repaired or flagged
+    action text NOT NULL,
+    detail text NOT NULL,
+    first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (order_id, kind)
+);
+
+CREATE INDEX IF NOT EXISTS reconciliation_issues_last_seen_idx ON reconciliation_issues (last_seen DESC);
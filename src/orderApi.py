@@ -0,0 +1,178 @@
+"""HTTP front door for synchronous order submission.
+
+    cd src
+    python orderApi.py --port 8080
+    python orderApi.py --port 8080 --with-worker --mode eager
+    curl -s localhost:8080/orders -d '{"order_id": "<uuid>", "payment_id": "<uuid>", "address": "1 Main St"}'
+
+POST /orders starts an OrderWorkflow and answers once the order has been
+received and validated (200 with "accepted"), was rejected (200 with its
+final status), or is still processing after --timeout seconds (202). Order
+and payment ids are UUIDs and are generated when omitted. A resubmitted
+order attaches to its running workflow; one that already finished gets 409. The process holds one Temporal client for all requests
+and serves keep-alive connections. ``--with-worker`` also runs the order
+worker on that client, which is what lets ``--mode eager`` hand the first
+workflow task straight to it.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import uuid
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+
+from temporalio.client import Client, WorkflowUpdateFailedError
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError
+
+from util.dataObject import OrderOptions
+from util.orderSubmit import SUBMIT_MODES, order_options_for, submit_order
+from util.temporalClient import connect_client
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    409: "Conflict",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+# Request bodies are small JSON objects
+MAX_BODY_BYTES = 64 * 1024
+
+
+class OrderApi:
+    def __init__(
+        self,
+        client: Client,
+        mode: str = "update-with-start",
+        timeout: float = 10,
+        options: Optional[OrderOptions] = None,
+    ):
+        self.client = client
+        self.mode = mode
+        self.timeout = timeout
+        self.options = options
+
+    async def submit(self, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        try:
+            order = json.loads(body or b"{}")
+            # Both ids are stored in uuid columns
+            order_id = str(uuid.UUID(order.get("order_id") or str(uuid.uuid4())))
+            payment_id = str(uuid.UUID(order.get("payment_id") or str(uuid.uuid4())))
+            address = order["address"]
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return 400, {"error": "Expected a JSON object with address, and optionally UUID order_id and payment_id"}
+        try:
+            result = await submit_order(
+                self.client, order_id, payment_id, address, self.mode, self.timeout, options=self.options,
+            )
+        except WorkflowAlreadyStartedError:
+            return 409, {"error": f"Order {order_id} was already submitted and has finished"}
+        except WorkflowUpdateFailedError as e:
+            # The workflow failed or continued as new while the wait was in flight; resubmitting reattaches
+            logger.warning(f"Waiting on order {order_id} failed: {e.cause or e}")
+            return 503, {"error": f"Order {order_id} status unavailable, retry: {e.cause or e}", "order_id": order_id}
+        except RPCError as e:
+            logger.warning(f"Submitting order {order_id} failed: {e}")
+            return 503, {"error": str(e)}
+        except Exception as e:
+            logger.exception(f"Submitting order {order_id} failed")
+            return 500, {"error": str(e)}
+        return (202 if result.pending else 200), asdict(result)
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if method == "POST" and path == "/orders":
+            return await self.submit(body)
+        if method == "GET" and path == "/healthz":
+            return 200, {"status": "ok"}
+        return 404, {"error": f"No route for {method} {path}"}
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, version = request_line.split(" ", 2)
+                headers = {}
+                for line in header_lines:
+                    if line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_BODY_BYTES:
+                    # The unread body would be parsed as the next request
+                    status, payload, keep_alive = 400, {"error": "Request body too large"}, False
+                else:
+                    status, payload = await self.route(method, path, await reader.readexactly(length))
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def start_order_api(
+    client: Client,
+    port: int,
+    host: str = "0.0.0.0",
+    mode: str = "update-with-start",
+    timeout: float = 10,
+    options: Optional[OrderOptions] = None,
+) -> asyncio.AbstractServer:
+    server = await asyncio.start_server(OrderApi(client, mode, timeout, options).handle, host, port)
+    logger.info(f"Serving orders on {host}:{port} ({mode})")
+    return server
+
+
+async def serve(args: argparse.Namespace):
+    client = await connect_client()
+    async with contextlib.AsyncExitStack() as stack:
+        if args.with_worker:
+            from worker import build_order_worker
+            from util.workerConfig import load_worker_config
+
+            queue = load_worker_config(queues=["order-tq"]).queues[0]
+            order_worker = await build_order_worker(client, queue, [], stack)
+            await stack.enter_async_context(order_worker)
+        options = await order_options_for(client, args.status_search_attribute)
+        server = await start_order_api(client, args.port, args.host, args.mode, args.timeout, options)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--mode", choices=SUBMIT_MODES, default="update-with-start")
+    parser.add_argument("--timeout", type=float, default=10, help="Seconds to wait for validation before answering 202")
+    parser.add_argument("--with-worker", action="store_true", help="Run the order worker in this process")
+    parser.add_argument("--status-search-attribute", action=argparse.BooleanOptionalAction, default=None,
+                        help="Publish OrderStatus for the review queue (default: when it is registered)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Schedule or run the orders/payments reconciliation sweep.
+
+    cd src
+    python reconcile.py schedule --every-hours 6     # create or update the schedule
+    python reconcile.py run --chunk-size 1000        # one sweep now, wait for totals
+    python reconcile.py progress
+
+ReconciliationWorkflow runs on the order worker. The schedule skips a run
+while the previous sweep is still going. Issues land in the
+`reconciliation_issues` table; only stale order statuses are repaired in
+place, everything else is flagged for a person.
+"""
+import argparse
+import asyncio
+import uuid
+from dataclasses import asdict
+from datetime import timedelta
+
+from temporalio.client import (
+    Client,
+    Schedule,
+    ScheduleActionStartWorkflow,
+    ScheduleAlreadyRunningError,
+    ScheduleIntervalSpec,
+    SchedulePolicy,
+    ScheduleOverlapPolicy,
+    ScheduleSpec,
+    ScheduleUpdate,
+)
+
+from util.dataObject import ReconcileState
+from util.temporalClient import connect_client
+from workflows.reconcileWorkflow import ReconciliationWorkflow
+
+SCHEDULE_ID = "reconcile-orders"
+WORKFLOW_ID = "reconcile-orders"
+
+
+def sweep_state(args: argparse.Namespace) -> ReconcileState:
+    return ReconcileState(
+        chunk_size=args.chunk_size,
+        chunks_per_run=args.chunks_per_run,
+        lookback_hours=args.lookback_hours,
+        grace_minutes=args.grace_minutes,
+    )
+
+
+async def schedule_sweep(client: Client, every: timedelta, state: ReconcileState, task_queue: str = "order-tq") -> str:
+    """Create the sweep schedule, or replace its spec and arguments if it exists"""
+    schedule = Schedule(
+        action=ScheduleActionStartWorkflow(
+            ReconciliationWorkflow.run,
+            state,
+            id=WORKFLOW_ID,
+            task_queue=task_queue,
+        ),
+        spec=ScheduleSpec(intervals=[ScheduleIntervalSpec(every=every)]),
+        policy=SchedulePolicy(overlap=ScheduleOverlapPolicy.SKIP),
+    )
+    try:
+        await client.create_schedule(SCHEDULE_ID, schedule)
+        return "created"
+    except ScheduleAlreadyRunningError:
+        await client.get_schedule_handle(SCHEDULE_ID).update(lambda _: ScheduleUpdate(schedule=schedule))
+        return "updated"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["schedule", "run", "progress"])
+    parser.add_argument("--every-hours", type=float, default=6, help="Interval between scheduled sweeps")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows per keyset chunk")
+    parser.add_argument("--chunks-per-run", type=int, default=1, help="Chunks before each continue-as-new")
+    parser.add_argument("--lookback-hours", type=float, default=72, help="Sweep rows updated within this window")
+    parser.add_argument("--grace-minutes", type=float, default=60, help="Skip rows updated more recently than this")
+    parser.add_argument("--task-queue", default="order-tq")
+    args = parser.parse_args()
+
+    client = await connect_client()
+    if args.command == "schedule":
+        outcome = await schedule_sweep(client, timedelta(hours=args.every_hours), sweep_state(args), args.task_queue)
+        print(f"Schedule {SCHEDULE_ID} {outcome}")
+    elif args.command == "run":
+        state = await client.execute_workflow(
+            ReconciliationWorkflow.run,
+            sweep_state(args),
+            id=f"{WORKFLOW_ID}-{uuid.uuid4()}",
+            task_queue=args.task_queue,
+        )
+        print(f"Reconciliation finished: {asdict(state)}")
+    else:
+        # Scheduled runs get the schedule's timestamp appended to WORKFLOW_ID
+        async for execution in client.list_workflows(
+            'WorkflowType = "ReconciliationWorkflow" AND ExecutionStatus = "Running"'
+        ):
+            state = await client.get_workflow_handle(execution.id).query(ReconciliationWorkflow.progress)
+            print(f"{execution.id}: {asdict(state) if state else 'starting'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,238 @@
+"""Manual review queue: list orders awaiting review and approve or reject them in bulk.
+
+    cd src
+    python reviewQueue.py setup                     # register the OrderStatus search attribute once
+    python reviewQueue.py list --limit 50
+    python reviewQueue.py approve --all --concurrency 50
+    python reviewQueue.py reject ORDER_ID [ORDER_ID ...] --reason "Address mismatch"
+    python reviewQueue.py approve --all --batch     # one server-side batch operation
+
+Orders started with ``OrderOptions(status_search_attribute=True)`` publish
+their status in the ``OrderStatus`` search attribute, so the queue is a
+single visibility query instead of a query per workflow. ``bulkIntake.py``
+and ``orderApi.py`` turn the option on once ``setup`` has registered the
+attribute; orders started before that never appear in the queue, and
+``list``, ``--all`` and ``--batch`` refuse to run until it is registered. The default
+fan-out sends the ``review_order`` update to each order with at most
+``--concurrency`` in flight and reports an outcome per order; orders that
+are no longer awaiting review are refused by the workflow and reported as
+``not_pending``. ``--batch`` instead hands the query to a server-side batch
+operation that sends the review signal to every match: one RPC however many
+orders there are, but only aggregate counts come back.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Union
+
+from temporalio.api.batch.v1 import BatchOperationSignal
+from temporalio.api.common.v1 import Payloads
+from temporalio.api.enums.v1 import BatchOperationState, IndexedValueType
+from temporalio.api.operatorservice.v1 import AddSearchAttributesRequest
+from temporalio.api.workflowservice.v1 import DescribeBatchOperationRequest, StartBatchOperationRequest
+from temporalio.client import Client, WorkflowUpdateFailedError
+from temporalio.service import RPCError, RPCStatusCode
+
+from bulkIntake import order_workflow_id
+from util.dataObject import ORDER_STATUS_SEARCH_ATTRIBUTE, OrderStatusRecord
+from util.orderSubmit import order_status_registered
+from util.temporalClient import connect_client
+
+PENDING_REVIEW_QUERY = (
+    'WorkflowType = "OrderWorkflow" AND ExecutionStatus = "Running" '
+    f'AND {ORDER_STATUS_SEARCH_ATTRIBUTE.name} = "awaiting_manual_review"'
+)
+
+
+@dataclass
+class ReviewOutcome:
+    workflow_id: str
+    # approved, rejected, not_pending, not_found or failed
+    outcome: str
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+
+@dataclass
+class ReviewSummary:
+    counts: Dict[str, int] = field(default_factory=dict)
+    elapsed_s: float = 0.0
+    outcomes: List[ReviewOutcome] = field(default_factory=list)
+
+
+async def ensure_search_attribute(client: Client) -> bool:
+    """Register the OrderStatus keyword attribute; returns False if it already existed"""
+    if await order_status_registered(client):
+        return False
+    await client.operator_service.add_search_attributes(AddSearchAttributesRequest(
+        namespace=client.namespace,
+        search_attributes={ORDER_STATUS_SEARCH_ATTRIBUTE.name: IndexedValueType.INDEXED_VALUE_TYPE_KEYWORD},
+    ))
+    return True
+
+
+async def count_pending(client: Client) -> int:
+    return (await client.count_workflows(PENDING_REVIEW_QUERY)).count
+
+
+async def iter_pending(client: Client, limit: Optional[int] = None, page_size: int = 1000) -> AsyncIterator[str]:
+    """Workflow ids of orders awaiting review, paged from visibility"""
+    async for execution in client.list_workflows(PENDING_REVIEW_QUERY, limit=limit, page_size=page_size):
+        yield execution.id
+
+
+async def _aiter(items: Union[Iterable[str], AsyncIterable[str]]) -> AsyncIterator[str]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def review_one(client: Client, workflow_id: str, approved: bool, reason: Optional[str] = None) -> ReviewOutcome:
+    handle = client.get_workflow_handle(workflow_id)
+    try:
+        record = await handle.execute_update(
+            "review_order",
+            args=[approved, reason],
+            result_type=OrderStatusRecord,
+        )
+    except WorkflowUpdateFailedError as e:
+        # The validator refused it: the order was already reviewed, cancelled or not yet in review
+        return ReviewOutcome(workflow_id, "not_pending", detail=str(e.cause or e))
+    except RPCError as e:
+        if e.status == RPCStatusCode.NOT_FOUND:
+            return ReviewOutcome(workflow_id, "not_found", detail=e.message)
+        return ReviewOutcome(workflow_id, "failed", detail=str(e))
+    except Exception as e:
+        return ReviewOutcome(workflow_id, "failed", detail=str(e))
+    return ReviewOutcome(workflow_id, "approved" if approved else "rejected", status=record.workflow_status)
+
+
+async def review_orders(
+    client: Client,
+    workflow_ids: Union[Iterable[str], AsyncIterable[str]],
+    approved: bool,
+    reason: Optional[str] = None,
+    concurrency: int = 50,
+) -> ReviewSummary:
+    """Approve or reject each order with at most ``concurrency`` updates in flight"""
+    summary = ReviewSummary()
+    started_at = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def review(workflow_id: str) -> None:
+        try:
+            summary.outcomes.append(await review_one(client, workflow_id, approved, reason))
+        finally:
+            semaphore.release()
+
+    async for workflow_id in _aiter(workflow_ids):
+        await semaphore.acquire()
+        task = asyncio.create_task(review(workflow_id))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+    summary.counts = dict(Counter(outcome.outcome for outcome in summary.outcomes))
+    summary.elapsed_s = round(time.perf_counter() - started_at, 3)
+    return summary
+
+
+async def review_in_batch(
+    client: Client,
+    approved: bool,
+    reason: Optional[str] = None,
+    query: str = PENDING_REVIEW_QUERY,
+    wait: bool = True,
+    poll_seconds: float = 1.0,
+) -> Dict[str, Any]:
+    """Signal every order matching ``query`` through one server-side batch operation.
+
+    Signals carry no precondition, so an order that left review between the
+    visibility snapshot and the signal still receives it; ``query`` should
+    keep the ``OrderStatus`` filter.
+    """
+    job_id = f"review-{'approve' if approved else 'reject'}-{uuid.uuid4()}"
+    signal, args = ("complete_manual_review", []) if approved else ("reject_manual_review", [reason])
+    await client.workflow_service.start_batch_operation(StartBatchOperationRequest(
+        namespace=client.namespace,
+        job_id=job_id,
+        visibility_query=query,
+        reason=f"Bulk manual review: {'approve' if approved else 'reject'}",
+        signal_operation=BatchOperationSignal(
+            signal=signal,
+            input=Payloads(payloads=await client.data_converter.encode(args)),
+            identity=client.identity,
+        ),
+    ))
+    while True:
+        description = await client.workflow_service.describe_batch_operation(
+            DescribeBatchOperationRequest(namespace=client.namespace, job_id=job_id)
+        )
+        if not wait or description.state != BatchOperationState.BATCH_OPERATION_STATE_RUNNING:
+            break
+        await asyncio.sleep(poll_seconds)
+    return {
+        "job_id": job_id,
+        "state": BatchOperationState.Name(description.state),
+        "total": description.total_operation_count,
+        "completed": description.complete_operation_count,
+        "failed": description.failure_operation_count,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["setup", "list", "approve", "reject"])
+    parser.add_argument("order_ids", nargs="*", help="Order ids to review")
+    parser.add_argument("--all", action="store_true", help="Review every order awaiting review")
+    parser.add_argument("--reason", default=None, help="Rejection reason")
+    parser.add_argument("--concurrency", type=int, default=50, help="Review updates in flight at once")
+    parser.add_argument("--batch", action="store_true", help="Use a server-side batch operation")
+    parser.add_argument("--limit", type=int, default=None, help="Orders to list")
+    args = parser.parse_args()
+    if args.command in ("approve", "reject") and not (args.order_ids or args.all):
+        parser.error("Pass order ids or --all")
+
+    logging.basicConfig(level=logging.INFO)
+    client = await connect_client()
+    if args.command == "setup":
+        added = await ensure_search_attribute(client)
+        print(f"{ORDER_STATUS_SEARCH_ATTRIBUTE.name} {'registered' if added else 'already registered'}")
+        return
+    uses_queue = args.command == "list" or args.all or args.batch
+    if uses_queue and not await order_status_registered(client):
+        # Without the attribute no order publishes its status, so the queue would look empty
+        parser.exit(2, f"{ORDER_STATUS_SEARCH_ATTRIBUTE.name} is not registered in namespace {client.namespace}; "
+                       "run `python reviewQueue.py setup` and start orders with the option on\n")
+    if args.command == "list":
+        print(f"{await count_pending(client)} orders awaiting review")
+        async for workflow_id in iter_pending(client, limit=args.limit):
+            print(workflow_id)
+        return
+
+    approved = args.command == "approve"
+    workflow_ids = [order_workflow_id(order_id) for order_id in args.order_ids]
+    if args.batch:
+        query = PENDING_REVIEW_QUERY
+        if workflow_ids:
+            query += f" AND WorkflowId IN ({', '.join(json.dumps(w) for w in workflow_ids)})"
+        print(json.dumps(await review_in_batch(client, approved, args.reason, query), indent=2))
+        return
+    if args.all:
+        # Snapshot the queue first; paging visibility while the updates move orders out of it could skip some
+        workflow_ids = [workflow_id async for workflow_id in iter_pending(client)]
+    summary = await review_orders(client, workflow_ids, approved, args.reason, args.concurrency)
+    print(json.dumps(asdict(summary), indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
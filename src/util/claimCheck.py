@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, Optional
+
+from util.dataObject import OrderObject
+
+
+class PostgresOrderStore:
+    """Resolves references against `orders.order_data`, which order_received already wrote"""
+
+    prefix = "orders"
+
+    def __init__(self, db):
+        self.db = db
+
+    async def put(self, order_id: str, data: Dict[str, Any]) -> str:
+        return f"{self.prefix}:{order_id}"
+
+    async def get(self, ref: str) -> Dict[str, Any]:
+        order_id = ref.split(":", 1)[1]
+        rows = await self.db.fetch("SELECT order_data FROM orders WHERE id = %s", (order_id,))
+        if not rows:
+            raise LookupError(f"No order data stored for {ref}")
+        return rows[0][0]
+
+
+class FileStore:
+    """Local filesystem stand-in for an object store"""
+
+    prefix = "file"
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def _write(self, key: str, data: Dict[str, Any]) -> None:
+        # Write then rename so readers never see a partial file
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(key))
+
+    def _read(self, key: str) -> Dict[str, Any]:
+        with open(self._path(key)) as f:
+            return json.load(f)
+
+    async def put(self, order_id: str, data: Dict[str, Any]) -> str:
+        await asyncio.to_thread(self._write, order_id, data)
+        return f"{self.prefix}:{order_id}"
+
+    async def get(self, ref: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._read, ref.split(":", 1)[1])
+
+
+class ClaimCheck:
+    """Swaps large `OrderObject.data` for a reference kept in workflow history.
+
+    Activities that need the data call ``hydrate``; hydrated data is kept in
+    a bounded per-worker LRU so consecutive activities for the same order
+    don't refetch it.
+    """
+
+    def __init__(self, store, threshold_bytes: int = 16384, cache_size: int = 1024):
+        self.store = store
+        self.threshold_bytes = threshold_bytes
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._checked_in = 0
+
+    @classmethod
+    def from_env(cls, db) -> Optional["ClaimCheck"]:
+        """CLAIM_CHECK_STORE=postgres|file enables it; unset or 'off' disables it"""
+        kind = os.getenv("CLAIM_CHECK_STORE", "off")
+        if kind == "off":
+            return None
+        if kind == "postgres":
+            store = PostgresOrderStore(db)
+        elif kind == "file":
+            store = FileStore(os.getenv("CLAIM_CHECK_DIR", ".claim-check"))
+        else:
+            raise ValueError(f"Unknown claim-check store: {kind}")
+        return cls(
+            store,
+            threshold_bytes=int(os.getenv("CLAIM_CHECK_THRESHOLD_BYTES", "16384")),
+            cache_size=int(os.getenv("CLAIM_CHECK_CACHE_SIZE", "1024")),
+        )
+
+    async def check_in(self, order: OrderObject) -> OrderObject:
+        if order.data_ref is not None:
+            return order
+        if len(json.dumps(order.data, separators=(",", ":"))) <= self.threshold_bytes:
+            return order
+        ref = await self.store.put(order.id, order.data)
+        self._remember(ref, order.data)
+        self._checked_in += 1
+        return replace(order, data={}, data_ref=ref)
+
+    async def hydrate(self, order: OrderObject) -> OrderObject:
+        if order.data_ref is None:
+            return order
+        data = self._cache.get(order.data_ref)
+        if data is not None:
+            self._hits += 1
+            self._cache.move_to_end(order.data_ref)
+        else:
+            self._misses += 1
+            data = await self.store.get(order.data_ref)
+            self._remember(order.data_ref, data)
+        return replace(order, data=data, data_ref=None)
+
+    def _remember(self, ref: str, data: Dict[str, Any]) -> None:
+        self._cache[ref] = data
+        self._cache.move_to_end(ref)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checked_in": self._checked_in,
+            "cache_hits": self._hits,
+            "cache_misses": self._misses,
+            "cached": len(self._cache),
+        }
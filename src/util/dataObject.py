@@ -1,4 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from temporalio.common import SearchAttributeKey
 # from datetime import datetime
 
 @dataclass
@@ -8,4 +11,168 @@ class OrderObject:
     created_at: str
     updated_at: str
     payment_id: str
-    shipping_address: str
\ No newline at end of file
+    shipping_address: str
+    # Set instead of `data` when the payload is held in the claim-check store
+    data_ref: Optional[str] = None
+
+
+TERMINAL_STATUSES = ("completed", "cancelled", "failed")
+
+# Keyword search attribute holding OrderWorkflow's current status; register it
+# once per namespace with `python reviewQueue.py setup`
+ORDER_STATUS_SEARCH_ATTRIBUTE = SearchAttributeKey.for_keyword("OrderStatus")
+
+
+@dataclass
+class OrderStatusRecord:
+    """Compact order status; version increases on every status change"""
+    workflow_status: str
+    version: int
+    is_cancelled: bool
+    manual_review_completed: bool
+    validation_result: Optional[bool] = None
+
+
+@dataclass
+class OrderStatusProjection:
+    """One status transition for the `order_status_view` read model"""
+    order_id: str
+    workflow_id: str
+    status: str
+    version: int
+    is_cancelled: bool
+    manual_review_completed: bool
+    shipping_address: Optional[str]
+    # ISO timestamp of the transition, in workflow time
+    changed_at: str
+
+
+@dataclass
+class OrderOptions:
+    """Per-run OrderWorkflow settings, fixed at start so replay stays deterministic"""
+    # Short, idempotent DB steps run as local activities instead of
+    # round-tripping through the server
+    local_steps: List[str] = field(default_factory=lambda: ["order_validated"])
+    # Per-attempt cap for local steps; longer work belongs in a regular activity
+    local_attempt_timeout_seconds: float = 10
+    # Hand dispatch to the batching CarrierDispatchWorkflow for this carrier
+    dispatch_carrier: Optional[str] = None
+    # Continue-as-new while awaiting review once history passes either limit
+    max_history_events: int = 2000
+    max_history_bytes: int = 4 * 1024 * 1024
+    # Keep the order's row in `order_status_view` up to date
+    project_status: bool = True
+    # Publish the status in the OrderStatus search attribute for the review
+    # queue. Opt-in: upserting an unregistered attribute fails every workflow
+    # task, so register it first (`python reviewQueue.py setup`)
+    status_search_attribute: bool = False
+
+
+@dataclass
+class DispatchRequest:
+    order_id: str
+    # ShippingWorkflow id that receives the DispatchResult signal
+    reply_to: str
+    shipping_address: str = ""
+
+
+@dataclass
+class DispatchResult:
+    order_id: str
+    status: str
+    carrier: str
+    batch_id: str = ""
+
+
+@dataclass
+class DispatchState:
+    """CarrierDispatchWorkflow state carried across continue-as-new"""
+    carrier: str
+    batch_size: int = 50
+    flush_seconds: float = 30
+    pending: List[DispatchRequest] = field(default_factory=list)
+    batches_flushed: int = 0
+    # Recently dispatched order ids, oldest first, so a redelivered request
+    # isn't dispatched twice; bounded to keep continue-as-new input small
+    dispatched_ids: List[str] = field(default_factory=list)
+    max_dispatched_ids: int = 5000
+
+
+@dataclass
+class OrderCarryOver:
+    """OrderWorkflow state carried into a continue-as-new run during manual review"""
+    order_data: OrderObject
+    validation_result: bool
+    shipping_address: str
+    workflow_status: str
+    status_version: int
+    is_cancelled: bool
+    manual_review_completed: bool
+    # ISO timestamp; the review timeout keeps counting across runs
+    review_deadline: str
+    recent_signal_ids: List[str] = field(default_factory=list)
+
+
+# Keyset start for UUID primary keys
+ZERO_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+@dataclass
+class ReconcileRow:
+    """An orders row picked up by the sweep, or in the payments phase a payment with no order"""
+    order_id: str
+    # None for a payment with no orders row
+    order_status: Optional[str]
+    has_payment: bool
+    payment_id: Optional[str] = None
+
+
+@dataclass
+class ReconcileChunk:
+    rows: List[ReconcileRow]
+    # Rows read, including consistent payments left out of `rows`
+    scanned: int
+    # Keyset position to resume from; None once the table is exhausted
+    last_id: Optional[str]
+
+
+@dataclass
+class WorkflowCheck:
+    """Workflow state behind one order"""
+    order_id: str
+    # WorkflowExecutionStatus names of the latest runs; None when there is no such workflow
+    order_run: Optional[str]
+    shipping_run: Optional[str]
+    # OrderStatus search attribute, when the order workflow publishes it
+    order_status: Optional[str] = None
+
+
+@dataclass
+class ReconcileIssue:
+    order_id: str
+    kind: str
+    detail: str
+    # When set, the orders row is moved from expected_status to repair_status;
+    # otherwise the issue is only flagged for a person
+    repair_status: Optional[str] = None
+    expected_status: Optional[str] = None
+
+
+@dataclass
+class ReconcileState:
+    """ReconciliationWorkflow progress carried across continue-as-new"""
+    # "orders", then "payments"
+    phase: str = "orders"
+    after_id: str = ZERO_UUID
+    chunk_size: int = 500
+    chunks_per_run: int = 1
+    # Rows last touched in [since, cutoff) are swept. Both are fixed when the
+    # sweep starts; keep the lookback within the namespace retention, or
+    # orders whose workflows were deleted are flagged as missing them
+    lookback_hours: float = 72
+    grace_minutes: float = 60
+    since: Optional[str] = None
+    cutoff: Optional[str] = None
+    scanned: int = 0
+    repaired: int = 0
+    flagged: int = 0
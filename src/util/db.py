@@ -1,47 +1,314 @@
-import psycopg2
-from temporalio import workflow
-from dotenv import load_dotenv
-# from loguru import logger
+import asyncio
+import logging
 import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from functools import lru_cache
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence
 
-load_dotenv()
+from psycopg import AsyncConnection, OperationalError
+from psycopg_pool import AsyncConnectionPool
+from temporalio.exceptions import ApplicationError
 
-class PostgresDB:
-    def __init__(self):
-        self.conn = None
-        self.cursor = None
-        self.connect()
-    
-    def connect(self):
-        try:
-            self.conn = psycopg2.connect(
-                host=os.getenv("DB_HOST"),
-                port=os.getenv("DB_PORT"),
-                database=os.getenv("DB_NAME"),
-                user=os.getenv("DB_USER"),
-                password=os.getenv("DB_PASSWORD")
-            )
-            self.cursor = self.conn.cursor()
-            workflow.logger.info("Connected to PostgreSQL")
-        except Exception as e:
-            workflow.logger.error(f"Error connecting to PostgreSQL: {e}")
-            raise e
-        
-    async def query_executor(self, query, hasReturn:bool=True):
-        try:
-            self.cursor.execute(query)
-            self.conn.commit()
-            
-            if hasReturn:
-                return self.cursor.fetchall()
-            else:
+from util.statements import Statement
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load `.env` into the environment once, on first use rather than at import"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def conninfo_from_env() -> str:
+    """Build a libpq connection string from the DB_* environment variables"""
+    load_env()
+    parts = {
+        "host": os.getenv("DB_HOST"),
+        "port": os.getenv("DB_PORT"),
+        "dbname": os.getenv("DB_NAME"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+    }
+    return " ".join(f"{key}={value}" for key, value in parts.items() if value)
+
+
+def database_unavailable(reason: str, retry_after: float) -> ApplicationError:
+    """Retryable activity error that asks Temporal to wait ``retry_after`` before the next attempt"""
+    return ApplicationError(
+        f"Database unavailable: {reason}",
+        type="DatabaseUnavailable",
+        next_retry_delay=timedelta(seconds=max(retry_after, 1)),
+    )
+
+
+class CircuitBreaker:
+    """Stops sending work to a database that is failing or too slow.
+
+    Closed: calls pass, and the outcomes of the last ``window`` calls are kept.
+    Once at least ``min_calls`` are recorded and ``failure_ratio`` of them
+    failed with an OperationalError or took longer than ``slow_call_seconds``,
+    the breaker opens. Open: calls fail fast for ``open_seconds``. Half-open:
+    up to ``half_open_probes`` calls go through; a good one closes the
+    breaker, a bad one opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        window: Optional[int] = None,
+        min_calls: Optional[int] = None,
+        failure_ratio: Optional[float] = None,
+        slow_call_seconds: Optional[float] = None,
+        open_seconds: Optional[float] = None,
+        half_open_probes: Optional[int] = None,
+    ):
+        self.window = window or int(os.getenv("DB_BREAKER_WINDOW", "20"))
+        self.min_calls = min_calls or int(os.getenv("DB_BREAKER_MIN_CALLS", "10"))
+        self.failure_ratio = failure_ratio or float(os.getenv("DB_BREAKER_FAILURE_RATIO", "0.5"))
+        self.slow_call_seconds = slow_call_seconds or float(os.getenv("DB_BREAKER_SLOW_MS", "2000")) / 1000
+        self.open_seconds = open_seconds or float(os.getenv("DB_BREAKER_OPEN_SECONDS", "10"))
+        self.half_open_probes = half_open_probes or int(os.getenv("DB_BREAKER_HALF_OPEN_PROBES", "1"))
+        self.state = self.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=self.window)
+        self._bad = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejections = 0
+        self._times_opened = 0
+
+    def before_call(self) -> bool:
+        """Admit a call or raise; returns whether the call is a half-open probe"""
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self._rejections += 1
+                raise database_unavailable("circuit breaker open", remaining)
+            self.state = self.HALF_OPEN
+            self._probes = 0
+            logger.info("Database circuit breaker half-open, probing")
+        if self.state == self.HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self._rejections += 1
+                raise database_unavailable("circuit breaker probing", self.open_seconds)
+            self._probes += 1
+            return True
+        return False
+
+    def release(self, probe: bool) -> None:
+        """Forget an admitted call that never reached the database"""
+        if probe and self.state == self.HALF_OPEN:
+            self._probes -= 1
+
+    def record(self, probe: bool, ok: bool, elapsed: Optional[float]) -> None:
+        bad = not ok or (elapsed is not None and elapsed > self.slow_call_seconds)
+        if probe:
+            if self.state != self.HALF_OPEN:
                 return
-        except Exception as e:
-            workflow.logger.error(f"Error executing query: {e}")
-            raise e
-    
-    def __del__(self):
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
\ No newline at end of file
+            self._probes -= 1
+            if bad:
+                self._open()
+            else:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._bad = 0
+                logger.info("Database circuit breaker closed")
+            return
+        if self.state != self.CLOSED:
+            # Calls admitted before the breaker opened say nothing new
+            return
+        if len(self._outcomes) == self._outcomes.maxlen:
+            self._bad -= self._outcomes[0]
+        self._outcomes.append(bad)
+        self._bad += bad
+        if len(self._outcomes) >= self.min_calls and self._bad >= self.failure_ratio * len(self._outcomes):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        logger.warning(f"Database circuit breaker open for {self.open_seconds}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._bad,
+            "rejections": self._rejections,
+            "times_opened": self._times_opened,
+        }
+
+
+class PostgresPool:
+    """Shared async connection pool, opened and closed with the worker.
+
+    One instance is created per worker process and injected into the
+    activity classes, so activities borrow a connection instead of paying
+    a connect + auth handshake per call.
+
+    Every borrow goes through a circuit breaker and a bulkhead. The bulkhead
+    caps concurrent borrows at ``bulkhead_limit`` and rejects a borrow that
+    waits longer than ``bulkhead_wait``. Both raise ``DatabaseUnavailable``
+    errors that delay the activity's next retry instead of adding load.
+    """
+
+    def __init__(
+        self,
+        conninfo: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_idle: Optional[float] = None,
+        name: str = "order-db",
+        prepare: Optional[bool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        bulkhead_limit: Optional[int] = None,
+        bulkhead_wait: Optional[float] = None,
+    ):
+        load_env()
+        self.min_size = min_size or int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+        self.max_size = max_size or int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+        self.timeout = timeout or float(os.getenv("DB_POOL_TIMEOUT", "5"))
+        # Server-side prepares don't survive transaction-mode poolers like pgbouncer
+        self.prepare = prepare if prepare is not None else os.getenv("DB_PREPARE_STATEMENTS", "1") == "1"
+        self.breaker = breaker or CircuitBreaker()
+        self.bulkhead_limit = bulkhead_limit or int(os.getenv("DB_BULKHEAD_LIMIT", str(self.max_size)))
+        self.bulkhead_wait = bulkhead_wait or float(os.getenv("DB_BULKHEAD_WAIT", str(self.timeout)))
+        self._bulkhead = asyncio.Semaphore(self.bulkhead_limit)
+        self._bulkhead_in_use = 0
+        self._bulkhead_rejections = 0
+        self._pool = AsyncConnectionPool(
+            conninfo if conninfo is not None else conninfo_from_env(),
+            min_size=self.min_size,
+            max_size=self.max_size,
+            timeout=self.timeout,
+            max_idle=max_idle or float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            check=AsyncConnectionPool.check_connection,
+            name=name,
+            open=False,
+        )
+
+    async def open(self) -> None:
+        await self._pool.open(wait=True)
+        logger.info(
+            "Opened PostgreSQL pool (min=%s, max=%s, timeout=%ss)",
+            self.min_size, self.max_size, self.timeout,
+        )
+
+    async def close(self) -> None:
+        await self._pool.close()
+        logger.info("Closed PostgreSQL pool")
+
+    async def __aenter__(self) -> "PostgresPool":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def connection(self, long_running: bool = False) -> AsyncIterator[AsyncConnection]:
+        """Borrow a connection; the transaction commits when the block exits cleanly.
+
+        ``long_running`` blocks (streams) are exempt from the breaker's slow-call check.
+        """
+        probe = self.breaker.before_call()
+        if self._bulkhead.locked():
+            try:
+                await asyncio.wait_for(self._bulkhead.acquire(), self.bulkhead_wait)
+            except asyncio.TimeoutError:
+                self.breaker.release(probe)
+                self._bulkhead_rejections += 1
+                raise database_unavailable("too many concurrent operations", self.bulkhead_wait) from None
+            except BaseException:
+                self.breaker.release(probe)
+                raise
+        else:
+            await self._bulkhead.acquire()
+        self._bulkhead_in_use += 1
+        started = time.monotonic()
+        ok = True
+        try:
+            async with self._pool.connection(timeout=self.timeout) as conn:
+                yield conn
+        except OperationalError:
+            # Connection, timeout and server-availability errors; not constraint violations
+            ok = False
+            raise
+        finally:
+            self._bulkhead_in_use -= 1
+            self._bulkhead.release()
+            self.breaker.record(probe, ok, None if long_running else time.monotonic() - started)
+
+    async def execute(self, query: str, params: Optional[Sequence[Any]] = None) -> None:
+        async with self.connection() as conn:
+            await conn.execute(query, params)
+
+    async def fetch(self, query: str, params: Optional[Sequence[Any]] = None) -> List[tuple]:
+        async with self.connection() as conn:
+            cursor = await conn.execute(query, params)
+            return await cursor.fetchall()
+
+    async def run(
+        self,
+        statement: Statement,
+        params: Sequence[Any],
+        conn: Optional[AsyncConnection] = None,
+    ) -> int:
+        """Execute a registered statement with bound parameters; returns the row count.
+
+        Pass ``conn`` to run several statements in one transaction.
+        """
+        if conn is not None:
+            cursor = await conn.execute(statement.sql, params, prepare=self.prepare)
+            return cursor.rowcount
+        async with self.connection() as conn:
+            cursor = await conn.execute(statement.sql, params, prepare=self.prepare)
+            return cursor.rowcount
+
+    async def query(self, statement: Statement, params: Sequence[Any]) -> List[tuple]:
+        """Run a registered statement and return all rows"""
+        async with self.connection() as conn:
+            cursor = await conn.execute(statement.sql, params, prepare=self.prepare)
+            return await cursor.fetchall()
+
+    async def stream(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None,
+        chunk_size: int = 1000,
+        name: str = "stream",
+    ) -> AsyncIterator[List[tuple]]:
+        """Yield a result set in chunks read through a named server-side cursor.
+
+        Only ``chunk_size`` rows are held client-side at a time. The cursor
+        lives in one transaction on one pooled connection until the
+        iteration ends, so keep each stream bounded.
+        """
+        async with self.connection(long_running=True) as conn:
+            async with conn.cursor(name=name) as cursor:
+                await cursor.execute(query, params)
+                while True:
+                    rows = await cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool counters plus derived saturation, for sizing min/max, and breaker/bulkhead state"""
+        stats = self._pool.get_stats()
+        size = stats.get("pool_size", 0)
+        in_use = size - stats.get("pool_available", 0)
+        stats["connections_in_use"] = in_use
+        stats["saturation"] = round(in_use / self.max_size, 3) if self.max_size else 0.0
+        stats["bulkhead_in_use"] = self._bulkhead_in_use
+        stats["bulkhead_rejections"] = self._bulkhead_rejections
+        stats["breaker"] = self.breaker.stats()
+        return stats
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from psycopg.types.json import Jsonb
+
+from util.db import PostgresPool
+
+logger = logging.getLogger(__name__)
+
+COPY_EVENTS = "COPY events (order_id, type, payload) FROM STDIN"
+INSERT_EVENT = "INSERT INTO events (order_id, type, payload) VALUES (%s, %s, %s)"
+
+
+@dataclass
+class PendingEvent:
+    order_id: str
+    type: str
+    payload: Dict[str, Any]
+    committed: asyncio.Future
+
+
+_STOP = object()
+
+
+class EventWriter:
+    """Buffers rows for the `events` table and writes them in batches.
+
+    Every activity in the worker shares one writer. A batch is flushed when
+    it reaches ``max_batch`` rows or when ``flush_interval`` seconds have
+    passed since its first row, whichever comes first. The buffer is bounded
+    by ``max_pending``: once full, ``record`` waits, which pushes back on the
+    activities producing events. ``close`` flushes everything still buffered.
+    """
+
+    def __init__(
+        self,
+        db: PostgresPool,
+        max_batch: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        mode: Optional[str] = None,
+    ):
+        self.db = db
+        self.max_batch = max_batch or int(os.getenv("EVENT_BATCH_SIZE", "500"))
+        self.flush_interval = flush_interval or float(os.getenv("EVENT_FLUSH_INTERVAL_MS", "50")) / 1000
+        self.max_pending = max_pending or int(os.getenv("EVENT_MAX_PENDING", "5000"))
+        self.mode = mode or os.getenv("EVENT_WRITER_MODE", "copy")
+        if self.mode not in ("copy", "insert"):
+            raise ValueError(f"Unknown event writer mode: {self.mode}")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # record() calls waiting for buffer space; close() drains until they land
+        self._putting = 0
+        self._events_written = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._largest_batch = 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop accepting events and flush whatever is still buffered.
+
+        Events queued behind the stop marker, including those from ``record``
+        calls that were waiting for buffer space, are flushed here as well.
+        """
+        if self._task is None or self._closed:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        await self._drain()
+        logger.info(f"Event writer closed: {self.stats()}")
+
+    async def __aenter__(self) -> "EventWriter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def record(
+        self,
+        order_id: str,
+        type: str,
+        payload: Dict[str, Any],
+        wait: bool = True,
+    ) -> None:
+        """Queue an event; by default return only once its batch has committed.
+
+        Waiting keeps activity retries correct: an activity does not complete
+        until its event is durable, and a failed flush fails the activity.
+        """
+        if self._queue is None or self._closed:
+            raise RuntimeError("Event writer is not running")
+        committed = asyncio.get_running_loop().create_future()
+        self._putting += 1
+        try:
+            await self._queue.put(PendingEvent(order_id, type, payload, committed))
+        finally:
+            self._putting -= 1
+        if not wait:
+            # Nobody awaits the outcome; retrieve it so failures aren't reported as unhandled
+            committed.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return
+        # Shield so a cancelled activity doesn't cancel the shared flush
+        await asyncio.shield(committed)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "events_written": self._events_written,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "largest_batch": self._largest_batch,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[PendingEvent] = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _drain(self) -> None:
+        """Flush what is left in the queue once the writer task has stopped"""
+        while self._putting or not self._queue.empty():
+            batch: List[PendingEvent] = []
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is not _STOP:
+                    batch.append(item)
+            if batch:
+                await self._flush(batch)
+            else:
+                # Let record() calls that were just given space finish their put
+                await asyncio.sleep(0)
+
+    async def _flush(self, batch: List[PendingEvent]) -> None:
+        try:
+            async with self.db.connection() as conn:
+                async with conn.cursor() as cursor:
+                    if self.mode == "copy":
+                        async with cursor.copy(COPY_EVENTS) as copy:
+                            for event in batch:
+                                await copy.write_row((event.order_id, event.type, Jsonb(event.payload)))
+                    else:
+                        await cursor.executemany(
+                            INSERT_EVENT,
+                            [(event.order_id, event.type, Jsonb(event.payload)) for event in batch],
+                        )
+        except Exception as e:
+            self._failed_batches += 1
+            logger.error(f"Failed to flush {len(batch)} events: {e}")
+            for event in batch:
+                if not event.committed.done():
+                    event.committed.set_exception(e)
+            return
+
+        self._batches += 1
+        self._events_written += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        for event in batch:
+            if not event.committed.done():
+                event.committed.set_result(None)
@@ -1,13 +1,195 @@
-import asyncio, random
-
-async def flaky_call() -> None:
-    rand_num = random.random()
-    # raise RuntimeError("Forced failure for testing")
-    return
-    if rand_num < 0.33:
-        raise RuntimeError("Forced failure for testing")
-
-    if rand_num < 0.67:
-        await asyncio.sleep(30)  # Expect the activity layer to time out before this completes
-	
-    return
+"""Fault and latency injection for activities, for performance testing.
+
+Profiles are set per activity type in JSON, taken from ``FAULT_PROFILES``
+(a JSON string or a path to a JSON file)::
+
+    {
+      "seed": 42,
+      "default": {"latency": "uniform", "latency_ms": 5, "latency_max_ms": 20},
+      "activities": {
+        "payment_charged": {"failure_rate": 0.1, "stall_rate": 0.02, "stall_seconds": 30},
+        "order_received": {"latency": "lognormal", "latency_ms": 15, "latency_sigma": 1.0}
+      }
+    }
+
+With a ``seed`` (or ``FAULT_SEED``), each call draws from a generator
+seeded with the activity type and the call's key: its workflow id,
+activity id and attempt. The same activity attempt then gets the same fault
+in every run, whatever the interleaving. Calls without a key, such as those
+made outside an activity, share one generator per activity type. Those are
+reproducible only when they happen in the same order. Without a config
+nothing is injected.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+from dataclasses import asdict, dataclass, fields
+from typing import Any, Dict, Optional
+
+from temporalio import activity
+
+logger = logging.getLogger(__name__)
+
+LATENCY_KINDS = ("none", "fixed", "uniform", "lognormal")
+
+
+@dataclass
+class FaultProfile:
+    # Share of calls that raise, so the activity is retried
+    failure_rate: float = 0.0
+    # Share of calls that sleep ``stall_seconds``, long enough to hit the activity timeout
+    stall_rate: float = 0.0
+    stall_seconds: float = 30.0
+    # fixed: latency_ms; uniform: latency_ms..latency_max_ms;
+    # lognormal: median latency_ms with latency_sigma, capped at latency_max_ms if set
+    latency: str = "none"
+    latency_ms: float = 0.0
+    latency_max_ms: float = 0.0
+    latency_sigma: float = 1.0
+
+    def __post_init__(self):
+        if self.latency not in LATENCY_KINDS:
+            raise ValueError(f"Unknown latency distribution: {self.latency}")
+
+
+@dataclass
+class FaultCounters:
+    calls: int = 0
+    failures: int = 0
+    stalls: int = 0
+    delayed: int = 0
+    delay_ms: float = 0.0
+
+
+class InjectedFault(RuntimeError):
+    """Raised for an injected failure; retryable like any activity error"""
+
+
+class FaultInjector:
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, FaultProfile]] = None,
+        default: Optional[FaultProfile] = None,
+        seed: Optional[int] = None,
+    ):
+        self.profiles = profiles or {}
+        self.default = default
+        self.seed = seed
+        self._rngs: Dict[str, random.Random] = {}
+        self._counters: Dict[str, FaultCounters] = {}
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], seed: Optional[int] = None) -> "FaultInjector":
+        known = {f.name for f in fields(FaultProfile)}
+
+        def profile(values: Dict[str, Any]) -> FaultProfile:
+            unknown = set(values) - known
+            if unknown:
+                raise ValueError(f"Unknown fault profile fields: {sorted(unknown)}")
+            return FaultProfile(**values)
+
+        return cls(
+            profiles={name: profile(values) for name, values in config.get("activities", {}).items()},
+            default=profile(config["default"]) if "default" in config else None,
+            seed=seed if seed is not None else config.get("seed"),
+        )
+
+    @classmethod
+    def from_env(cls) -> Optional["FaultInjector"]:
+        source = os.getenv("FAULT_PROFILES", "")
+        if not source:
+            return None
+        if source.lstrip().startswith("{"):
+            config = json.loads(source)
+        else:
+            with open(source) as f:
+                config = json.load(f)
+        seed = os.getenv("FAULT_SEED")
+        return cls.from_config(config, int(seed) if seed else None)
+
+    def _rng(self, name: str, key: Optional[str] = None) -> random.Random:
+        if key is not None and self.seed is not None:
+            return random.Random(f"{self.seed}:{name}:{key}")
+        rng = self._rngs.get(name)
+        if rng is None:
+            rng = self._rngs[name] = random.Random(f"{self.seed}:{name}" if self.seed is not None else None)
+        return rng
+
+    def _latency_ms(self, profile: FaultProfile, rng: random.Random) -> float:
+        if profile.latency == "fixed":
+            return profile.latency_ms
+        if profile.latency == "uniform":
+            return rng.uniform(profile.latency_ms, max(profile.latency_ms, profile.latency_max_ms))
+        if profile.latency == "lognormal":
+            delay = rng.lognormvariate(math.log(max(profile.latency_ms, 1e-3)), profile.latency_sigma)
+            return min(delay, profile.latency_max_ms) if profile.latency_max_ms else delay
+        return 0.0
+
+    async def inject(self, name: str, key: Optional[str] = None) -> None:
+        profile = self.profiles.get(name, self.default)
+        if profile is None:
+            return
+        rng = self._rng(name, key)
+        counters = self._counters.setdefault(name, FaultCounters())
+        counters.calls += 1
+        # Fixed draw order keeps each call's outcome reproducible
+        roll = rng.random()
+        delay_ms = self._latency_ms(profile, rng)
+
+        if roll < profile.stall_rate:
+            counters.stalls += 1
+            await asyncio.sleep(profile.stall_seconds)
+        elif roll < profile.stall_rate + profile.failure_rate:
+            counters.failures += 1
+            raise InjectedFault(f"Injected failure in {name}")
+        if delay_ms > 0:
+            counters.delayed += 1
+            counters.delay_ms += delay_ms
+            await asyncio.sleep(delay_ms / 1000)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: asdict(counters) for name, counters in self._counters.items()}
+
+
+_injector: Optional[FaultInjector] = None
+_loaded = False
+
+
+def configure_faults(injector: Optional[FaultInjector]) -> None:
+    """Replace the process-wide injector; None turns injection off"""
+    global _injector, _loaded
+    _injector, _loaded = injector, True
+
+
+def get_injector() -> Optional[FaultInjector]:
+    global _injector, _loaded
+    if not _loaded:
+        _injector, _loaded = FaultInjector.from_env(), True
+        if _injector is not None:
+            logger.info(f"Fault injection enabled for {sorted(_injector.profiles) or 'all activities'}")
+    return _injector
+
+
+async def flaky_call(name: Optional[str] = None, key: Optional[str] = None) -> None:
+    """Apply the fault profile of ``name``, by default the running activity's type.
+
+    ``key`` tells apart several calls made by one activity attempt, such as
+    the parcels of a bulk dispatch.
+    """
+    injector = get_injector()
+    if injector is None:
+        return
+    call_key = None
+    if activity.in_activity():
+        info = activity.info()
+        if name is None:
+            name = info.activity_type
+        call_key = f"{info.workflow_id}:{info.activity_id}:{info.attempt}"
+    elif name is None:
+        name = "default"
+    if key is not None:
+        call_key = f"{call_key}:{key}" if call_key else key
+    await injector.inject(name, call_key)
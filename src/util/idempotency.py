@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from psycopg import AsyncConnection
+from psycopg.types.json import Jsonb
+from temporalio import activity
+
+from util.db import PostgresPool
+from util.statements import INSERT_LEDGER, LOOKUP_LEDGER, PURGE_LEDGER
+
+logger = logging.getLogger(__name__)
+
+# (workflow id, activity type, idempotency key)
+LedgerKey = Tuple[str, str, str]
+
+
+def current_activity_key(idempotency_key: str) -> LedgerKey:
+    info = activity.info()
+    return info.workflow_id, info.activity_type, idempotency_key
+
+
+class IdempotencyLedger:
+    """Results of completed side effects, so a retried activity can return them at once.
+
+    Entries live in the `idempotency_ledger` table and are fronted by a
+    bounded per-worker LRU; both honour the same TTL.
+    """
+
+    def __init__(self, db: PostgresPool, cache_size: Optional[int] = None, ttl: Optional[timedelta] = None):
+        self.db = db
+        self.cache_size = cache_size or int(os.getenv("LEDGER_CACHE_SIZE", "10000"))
+        self.ttl = ttl or timedelta(hours=float(os.getenv("LEDGER_TTL_HOURS", "168")))
+        self._cache: "OrderedDict[LedgerKey, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._cache_hits = 0
+        self._db_hits = 0
+        self._misses = 0
+
+    async def lookup(self, key: LedgerKey) -> Optional[Dict[str, Any]]:
+        cached = self._cache.get(key)
+        if cached is not None:
+            result, expires_at = cached
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                self._cache_hits += 1
+                return result
+            del self._cache[key]
+
+        rows = await self.db.query(LOOKUP_LEDGER, key)
+        if not rows:
+            self._misses += 1
+            return None
+        self._db_hits += 1
+        result = rows[0][0]
+        self.remember(key, result)
+        return result
+
+    async def record(
+        self,
+        key: LedgerKey,
+        result: Dict[str, Any],
+        conn: Optional[AsyncConnection] = None,
+    ) -> Dict[str, Any]:
+        """Store a result; pass ``conn`` to commit it with the side effect it describes.
+
+        With ``conn`` the row is not committed yet, so it is not cached here;
+        call ``remember`` once the caller's transaction has committed.
+        """
+        await self.db.run(INSERT_LEDGER, (*key, Jsonb(result), self.ttl), conn=conn)
+        if conn is None:
+            self.remember(key, result)
+        return result
+
+    async def purge_expired(self, batch_size: int = 10000) -> int:
+        """Delete expired entries in bounded batches; returns how many were removed"""
+        removed = 0
+        while True:
+            count = await self.db.run(PURGE_LEDGER, (batch_size,))
+            removed += count
+            if count < batch_size:
+                break
+        now = time.monotonic()
+        for key in [k for k, (_, expires_at) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+        return removed
+
+    def remember(self, key: LedgerKey, result: Dict[str, Any]) -> None:
+        self._cache[key] = (result, time.monotonic() + self.ttl.total_seconds())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cache_hits": self._cache_hits,
+            "db_hits": self._db_hits,
+            "misses": self._misses,
+            "cached": len(self._cache),
+        }
+
+
+async def purge_ledger_periodically(ledger: IdempotencyLedger, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            removed = await ledger.purge_expired()
+            logger.info(f"Purged {removed} expired idempotency ledger entries; {ledger.stats()}")
+        except Exception as e:
+            logger.error(f"Idempotency ledger purge failed: {e}")
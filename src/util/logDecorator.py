@@ -1,20 +1,109 @@
+import dataclasses
+import inspect
+import itertools
+import reprlib
+import sys
 from functools import wraps
 from loguru import logger
 
-def ioLogger(func):
+
+class _BoundedRepr(reprlib.Repr):
+    """reprlib with dataclass support, so large payloads are never fully rendered"""
+
+    def repr_instance(self, x, level):
+        if dataclasses.is_dataclass(x) and not isinstance(x, type):
+            if level <= 0:
+                return f"{type(x).__name__}(...)"
+            fields = dataclasses.fields(x)
+            parts = [f"{f.name}={self.repr1(getattr(x, f.name), level - 1)}" for f in fields[:self.maxdict]]
+            if len(fields) > self.maxdict:
+                parts.append("...")
+            return f"{type(x).__name__}({', '.join(parts)})"
+        return super().repr_instance(x, level)
+
+
+def _short_repr(value, max_len: int) -> str:
+    bounded = _BoundedRepr()
+    bounded.maxstring = max_len
+    bounded.maxother = max_len
+    bounded.maxlevel = 3
+    text = bounded.repr(value)
+    return text if len(text) <= max_len else text[:max_len] + "..."
+
+
+def configure_logging(sink=sys.stderr, level: str = "INFO", **kwargs):
+    """Replace loguru's default sink with a queued one.
+
+    With ``enqueue=True`` records are handed to a background thread, so the
+    caller (an activity, usually) never waits on log I/O.
+    """
+    logger.remove()
+    return logger.add(sink, level=level, enqueue=True, **kwargs)
+
+
+def ioLogger(func=None, *, level: str = "DEBUG", sample: int = 1, max_len: int = 100):
+    """Log calls, results and errors of sync or async callables.
+
+    Messages are built lazily, only when a sink accepts ``level``. Arguments
+    and results are rendered with a size-capped repr that never builds the
+    full string. ``sample=N`` logs one call in N; errors are always logged.
+    Usable bare (``@ioLogger``) or with options (``@ioLogger(sample=100)``).
+    """
+    if func is None:
+        return lambda f: ioLogger(f, level=level, sample=sample, max_len=max_len)
+
+    name = func.__qualname__
+    counter = itertools.count()
+    log = logger.opt(lazy=True, depth=1)
+
+    def sampled() -> bool:
+        return sample <= 1 or next(counter) % sample == 0
+
+    def log_start(args, kwargs):
+        log.log(
+            level, "Starting {} with args: {} and kwargs: {}",
+            lambda: name, lambda: _short_repr(args, max_len), lambda: _short_repr(kwargs, max_len),
+        )
+
+    def log_result(result):
+        log.log(level, "Finished {} with result: {}", lambda: name, lambda: _short_repr(result, max_len))
+
+    def log_error(e):
+        log.error("Error in {}: {}", lambda: name, lambda: e)
+
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not sampled():
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    log_error(e)
+                    raise e
+            log_start(args, kwargs)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception as e:
+                log_error(e)
+                raise e
+            log_result(result)
+            return result
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger.debug(f"Starting {func.__name__} with args: {args} and kwargs: {kwargs}")
+        if not sampled():
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                log_error(e)
+                raise e
+        log_start(args, kwargs)
         try:
             result = func(*args, **kwargs)
-            result_str = str(result)
-            if len(result_str) > 100:
-                result_str = result_str[:100] + "..."
-                logger.debug(f"Result too long, truncated to: {result_str}")
-            else:
-                logger.debug(f"Finished {func.__name__} with result: {result_str}")
-            return result
         except Exception as e:
-            logger.error(f"Error in {func.__name__}: {e}")
+            log_error(e)
             raise e
-    return wrapper
\ No newline at end of file
+        log_result(result)
+        return result
+    return wrapper
@@ -0,0 +1,362 @@
+"""Latency and throughput metrics for workflows and activities.
+
+Series are keyed by (metric, labels) tuples, where labels are (name, value)
+pairs such as ``(("workflow_type", "OrderWorkflow"),)``. Histograms have
+fixed, preallocated buckets, so recording is a dict lookup, a bisect and a
+few integer adds. Text is only built when metrics are scraped or dumped.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from temporalio import activity, workflow
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import PayloadCodec
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ExecuteActivityInput,
+    ExecuteWorkflowInput,
+    HandleQueryInput,
+    HandleSignalInput,
+    HandleUpdateInput,
+    Interceptor,
+    WorkflowInboundInterceptor,
+    WorkflowInstance,
+    WorkflowInstanceDetails,
+    WorkflowInterceptorClassInput,
+    WorkflowRunner,
+)
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+WORKFLOW_BUCKETS_MS = (100, 1000, 10000, 60000, 300000, 3600000, 86400000)
+ATTEMPT_BUCKETS = (1, 2, 3, 5, 10)
+SIZE_BUCKETS_BYTES = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+# Family name -> (Prometheus type, help text); counters are exposed with a _total suffix
+METRICS: Dict[str, Tuple[str, str]] = {
+    "activity_schedule_to_start_ms": ("histogram", "Time from activity scheduled to started, in ms"),
+    "activity_execution_ms": ("histogram", "Activity attempt execution time, in ms"),
+    "activity_attempt": ("histogram", "Attempt number of executed activities"),
+    "activity_in_flight": ("gauge", "Activities executing on this worker"),
+    "activity_failures": ("counter", "Activity attempts that raised"),
+    "workflow_completed": ("counter", "Workflow runs completed"),
+    "workflow_failed": ("counter", "Workflow runs failed"),
+    "workflow_continued_as_new": ("counter", "Workflow runs continued as new"),
+    "workflow_duration_ms": ("histogram", "Workflow run duration in workflow time, in ms"),
+    "workflows_in_flight": ("gauge", "Workflow runs held in this worker's cache"),
+    "workflow_task_ms": ("histogram", "Time to process one workflow activation on this worker, in ms"),
+    "workflow_signals": ("counter", "Signals handled, by workflow type and handler"),
+    "workflow_queries": ("counter", "Queries handled, by workflow type and handler"),
+    "workflow_updates": ("counter", "Updates handled, by workflow type and handler"),
+    "payload_bytes": ("histogram", "Payload sizes by direction, in bytes"),
+}
+
+
+def _label_text(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Process-wide store of histograms, counters and gauges"""
+
+    def __init__(self):
+        self._histograms: Dict[SeriesKey, Histogram] = {}
+        self._counters: Dict[SeriesKey, int] = {}
+        self._gauges: Dict[SeriesKey, int] = {}
+
+    def histogram(self, metric: str, labels: Labels, bounds: Sequence[float] = LATENCY_BUCKETS_MS) -> Histogram:
+        key = (metric, labels)
+        hist = self._histograms.get(key)
+        if hist is None:
+            hist = self._histograms[key] = Histogram(bounds)
+        return hist
+
+    def inc(self, metric: str, labels: Labels, amount: int = 1) -> None:
+        key = (metric, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add_gauge(self, metric: str, labels: Labels, amount: int) -> None:
+        key = (metric, labels)
+        self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    @staticmethod
+    def _header(lines: List[str], name: str, metric: str) -> None:
+        kind, help_text = METRICS.get(metric, ("untyped", metric))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        last = None
+        for (metric, labels), value in sorted(self._counters.items()):
+            if metric != last:
+                self._header(lines, f"{metric}_total", metric)
+                last = metric
+            lines.append(f"{metric}_total{_label_text(labels)} {value}")
+        for (metric, labels), value in sorted(self._gauges.items()):
+            if metric != last:
+                self._header(lines, metric, metric)
+                last = metric
+            lines.append(f"{metric}{_label_text(labels)} {value}")
+        for (metric, labels), hist in sorted(self._histograms.items()):
+            if metric != last:
+                self._header(lines, metric, metric)
+                last = metric
+            cumulative = 0
+            for bound, count in zip(hist.bounds, hist.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{metric}_bucket{_label_text(labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{metric}_bucket{_label_text(labels, le)} {hist.count}")
+            lines.append(f"{metric}_sum{_label_text(labels)} {hist.sum}")
+            lines.append(f"{metric}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "timestamp": time.time(),
+            "counters": [{"metric": m, "labels": dict(l), "value": v} for (m, l), v in self._counters.items()],
+            "gauges": [{"metric": m, "labels": dict(l), "value": v} for (m, l), v in self._gauges.items()],
+            "histograms": [
+                {"metric": m, "labels": dict(l), "bounds": list(h.bounds), "counts": h.counts, "sum": h.sum, "count": h.count}
+                for (m, l), h in self._histograms.items()
+            ],
+        }
+
+    def dump(self, path: str) -> None:
+        """Write a JSON snapshot, or Prometheus text when the path ends in .prom"""
+        with open(path, "w") as f:
+            if path.endswith(".prom"):
+                f.write(self.render_prometheus())
+            else:
+                json.dump(self.snapshot(), f)
+
+
+REGISTRY = MetricsRegistry()
+
+
+class MetricsInterceptor(Interceptor):
+    """Records activity and workflow metrics into a MetricsRegistry"""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetricsInbound(next, self.registry)
+
+    def workflow_interceptor_class(
+        self, input: WorkflowInterceptorClassInput
+    ) -> Optional[Type[WorkflowInboundInterceptor]]:
+        # Workflow interceptors are built by the SDK, so they record into REGISTRY
+        return _WorkflowMetricsInbound
+
+
+class _ActivityMetricsInbound(ActivityInboundInterceptor):
+    def __init__(self, next: ActivityInboundInterceptor, registry: MetricsRegistry):
+        super().__init__(next)
+        self._registry = registry
+
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        info = activity.info()
+        labels = (("activity_type", info.activity_type),)
+        registry = self._registry
+        if not info.is_local:
+            schedule_to_start = info.started_time - info.current_attempt_scheduled_time
+            registry.histogram("activity_schedule_to_start_ms", labels).observe(
+                schedule_to_start.total_seconds() * 1000
+            )
+        registry.histogram("activity_attempt", labels, ATTEMPT_BUCKETS).observe(info.attempt)
+        registry.add_gauge("activity_in_flight", labels, 1)
+        started = time.perf_counter()
+        try:
+            result = await super().execute_activity(input)
+        except BaseException:
+            registry.inc("activity_failures", labels)
+            raise
+        finally:
+            registry.add_gauge("activity_in_flight", labels, -1)
+            registry.histogram("activity_execution_ms", labels).observe((time.perf_counter() - started) * 1000)
+        return result
+
+
+class _WorkflowMetricsInbound(WorkflowInboundInterceptor):
+    """Counts workflow results and handler calls.
+
+    Nothing is recorded while replaying, and nothing recorded is ever read
+    back by the workflow, so determinism is unaffected. Durations use
+    workflow time.
+    """
+
+    async def execute_workflow(self, input: ExecuteWorkflowInput) -> Any:
+        info = workflow.info()
+        labels = (("workflow_type", info.workflow_type),)
+        try:
+            result = await super().execute_workflow(input)
+        except BaseException as e:
+            if not workflow.unsafe.is_replaying():
+                metric = "workflow_continued_as_new" if isinstance(e, workflow.ContinueAsNewError) else "workflow_failed"
+                REGISTRY.inc(metric, labels)
+            raise
+        if not workflow.unsafe.is_replaying():
+            elapsed: timedelta = workflow.now() - info.start_time
+            REGISTRY.histogram("workflow_duration_ms", labels, WORKFLOW_BUCKETS_MS).observe(
+                elapsed.total_seconds() * 1000
+            )
+            REGISTRY.inc("workflow_completed", labels)
+        return result
+
+    async def handle_signal(self, input: HandleSignalInput) -> None:
+        if not workflow.unsafe.is_replaying():
+            REGISTRY.inc("workflow_signals", (("handler", input.signal), ("workflow_type", workflow.info().workflow_type)))
+        return await super().handle_signal(input)
+
+    async def handle_query(self, input: HandleQueryInput) -> Any:
+        REGISTRY.inc("workflow_queries", (("handler", input.query), ("workflow_type", workflow.info().workflow_type)))
+        return await super().handle_query(input)
+
+    async def handle_update_handler(self, input: HandleUpdateInput) -> Any:
+        if not workflow.unsafe.is_replaying():
+            REGISTRY.inc("workflow_updates", (("handler", input.update), ("workflow_type", workflow.info().workflow_type)))
+        return await super().handle_update_handler(input)
+
+
+class MetricsWorkflowRunner(WorkflowRunner):
+    """Wraps a workflow runner to record workflow task latency and cached runs.
+
+    Each activation handed to a workflow instance is timed on the worker
+    (``workflow_task_ms``), and ``workflows_in_flight`` counts the runs
+    between their first activation and their eviction from the cache.
+    Activations run on the workflow task thread pool, so recording takes a lock.
+    """
+
+    def __init__(self, inner: WorkflowRunner, registry: MetricsRegistry = REGISTRY):
+        self.inner = inner
+        self.registry = registry
+        self.lock = threading.Lock()
+
+    def prepare_workflow(self, defn) -> None:
+        self.inner.prepare_workflow(defn)
+
+    def create_instance(self, det: WorkflowInstanceDetails) -> WorkflowInstance:
+        return _MeteredWorkflowInstance(self.inner.create_instance(det), det.info.workflow_type, self)
+
+    def set_worker_level_failure_exception_types(self, types: Sequence[Type[BaseException]]) -> None:
+        self.inner.set_worker_level_failure_exception_types(types)
+
+
+class _MeteredWorkflowInstance(WorkflowInstance):
+    def __init__(self, inner: WorkflowInstance, workflow_type: str, runner: MetricsWorkflowRunner):
+        self.inner = inner
+        self.runner = runner
+        self.labels = (("workflow_type", workflow_type),)
+        self.evicted = False
+        with runner.lock:
+            runner.registry.add_gauge("workflows_in_flight", self.labels, 1)
+
+    def activate(self, act):
+        if any(job.HasField("remove_from_cache") for job in act.jobs):
+            completion = self.inner.activate(act)
+            # Eviction is retried until it succeeds; count it once
+            if not self.evicted:
+                self.evicted = True
+                with self.runner.lock:
+                    self.runner.registry.add_gauge("workflows_in_flight", self.labels, -1)
+            return completion
+        started = time.perf_counter()
+        completion = self.inner.activate(act)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.runner.lock:
+            self.runner.registry.histogram("workflow_task_ms", self.labels).observe(elapsed_ms)
+        return completion
+
+    def get_serialization_context(self, command_info):
+        return self.inner.get_serialization_context(command_info)
+
+    def get_external_store_context(self, command_info):
+        return self.inner.get_external_store_context(command_info)
+
+    def get_info(self) -> workflow.Info:
+        return self.inner.get_info()
+
+    def get_thread_id(self) -> Optional[int]:
+        return self.inner.get_thread_id()
+
+
+class PayloadSizeCodec(PayloadCodec):
+    """Pass-through codec that records payload sizes, optionally wrapping another codec"""
+
+    def __init__(self, inner: Optional[PayloadCodec] = None, registry: MetricsRegistry = REGISTRY):
+        self.inner = inner
+        self.registry = registry
+
+    async def encode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        hist = self.registry.histogram("payload_bytes", (("direction", "encode"),), SIZE_BUCKETS_BYTES)
+        for payload in payloads:
+            hist.observe(payload.ByteSize())
+        return await self.inner.encode(payloads) if self.inner else list(payloads)
+
+    async def decode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        payloads = await self.inner.decode(payloads) if self.inner else list(payloads)
+        hist = self.registry.histogram("payload_bytes", (("direction", "decode"),), SIZE_BUCKETS_BYTES)
+        for payload in payloads:
+            hist.observe(payload.ByteSize())
+        return payloads
+
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, registry: MetricsRegistry):
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        body = registry.render_prometheus().encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/plain; version=0.0.4\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int, registry: MetricsRegistry = REGISTRY, host: str = "0.0.0.0") -> asyncio.AbstractServer:
+    """Serve Prometheus text format on http://host:port/ (any path)"""
+    server = await asyncio.start_server(lambda r, w: _handle_scrape(r, w, registry), host, port)
+    logger.info(f"Serving metrics on {host}:{port}")
+    return server
+
+
+async def dump_metrics_periodically(path: str, interval: float, registry: MetricsRegistry = REGISTRY):
+    while True:
+        await asyncio.sleep(interval)
+        registry.dump(path)
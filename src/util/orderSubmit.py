@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from temporalio.api.operatorservice.v1 import ListSearchAttributesRequest
+from temporalio.client import Client, WithStartWorkflowOperation
+from temporalio.common import WorkflowIDConflictPolicy, WorkflowIDReusePolicy
+
+from util.dataObject import ORDER_STATUS_SEARCH_ATTRIBUTE, OrderOptions, OrderStatusRecord, TERMINAL_STATUSES
+
+# update-with-start: one round trip that starts the order and waits on it.
+# eager: start with eager workflow start, then wait; the first workflow task
+# runs on a worker in this process without a server poll when one is there.
+SUBMIT_MODES = ("update-with-start", "eager")
+
+
+@dataclass
+class SubmitResult:
+    order_id: str
+    workflow_id: str
+    # Received, validated and now waiting for manual review
+    accepted: bool
+    status: str
+    version: int
+    validation_result: Optional[bool]
+    # Still processing when the wait ran out; the outcome follows on wait_for_status
+    pending: bool
+
+
+async def order_status_registered(client: Client) -> bool:
+    """Whether the OrderStatus search attribute is registered in the client's namespace"""
+    existing = await client.operator_service.list_search_attributes(
+        ListSearchAttributesRequest(namespace=client.namespace)
+    )
+    return ORDER_STATUS_SEARCH_ATTRIBUTE.name in existing.custom_attributes
+
+
+async def order_options_for(client: Client, status_search_attribute: Optional[bool] = None) -> Optional[OrderOptions]:
+    """Options for orders started by a CLI.
+
+    ``status_search_attribute=None`` publishes OrderStatus whenever the
+    attribute is registered (``reviewQueue.py setup``), so the review queue
+    sees new orders without a separate flag; True or False forces it.
+    """
+    if status_search_attribute is None:
+        status_search_attribute = await order_status_registered(client)
+    return OrderOptions(status_search_attribute=True) if status_search_attribute else None
+
+
+def order_args(order_id: str, payment_id: str, address: str, options: Optional[OrderOptions] = None) -> List[Any]:
+    """OrderWorkflow.run arguments, padded to its full signature.
+
+    The SDK only applies run()'s type hints when every parameter is sent, so
+    a shorter list would hand ``options`` to the workflow as a plain dict.
+    """
+    return [order_id, payment_id, address, options, None]
+
+
+def _result(order_id: str, workflow_id: str, record: OrderStatusRecord) -> SubmitResult:
+    return SubmitResult(
+        order_id=order_id,
+        workflow_id=workflow_id,
+        accepted=record.workflow_status == "awaiting_manual_review",
+        status=record.workflow_status,
+        version=record.version,
+        validation_result=record.validation_result,
+        pending=record.workflow_status not in TERMINAL_STATUSES and record.workflow_status != "awaiting_manual_review",
+    )
+
+
+async def submit_order(
+    client: Client,
+    order_id: str,
+    payment_id: str,
+    address: str,
+    mode: str = "update-with-start",
+    timeout: float = 10,
+    task_queue: str = "order-tq",
+    options: Optional[OrderOptions] = None,
+) -> SubmitResult:
+    """Start an OrderWorkflow and return once it is received and validated.
+
+    The ``wait_for_status`` update returns when the order reaches manual
+    review, fails or is cancelled, or after ``timeout`` seconds. Submitting
+    an order whose workflow is still running attaches to it instead of
+    starting another; resubmitting a finished one raises
+    WorkflowAlreadyStartedError. Pass a shared client: it multiplexes every
+    call over one connection.
+    """
+    workflow_id = f"order-{order_id}"
+    args = order_args(order_id, payment_id, address, options)
+    wait_args = ["awaiting_manual_review", -1, timeout]
+    start_options = dict(
+        id=workflow_id,
+        task_queue=task_queue,
+        id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING,
+        id_reuse_policy=WorkflowIDReusePolicy.REJECT_DUPLICATE,
+    )
+    if mode == "update-with-start":
+        record = await client.execute_update_with_start_workflow(
+            "wait_for_status",
+            args=wait_args,
+            start_workflow_operation=WithStartWorkflowOperation("OrderWorkflow", args=args, **start_options),
+            result_type=OrderStatusRecord,
+        )
+    elif mode == "eager":
+        handle = await client.start_workflow("OrderWorkflow", args=args, request_eager_start=True, **start_options)
+        record = await handle.execute_update("wait_for_status", args=wait_args, result_type=OrderStatusRecord)
+    else:
+        raise ValueError(f"Unknown submit mode: {mode}")
+    return _result(order_id, workflow_id, record)
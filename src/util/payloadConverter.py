@@ -0,0 +1,89 @@
+import dataclasses
+import os
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+import msgpack
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import (
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter,
+    EncodingPayloadConverter,
+    PayloadCodec,
+)
+
+from util.dataObject import OrderObject, OrderStatusRecord
+
+COMPACT_ENCODING = b"binary/msgpack-dataclass"
+ZLIB_ENCODING = b"binary/zlib"
+
+# Dataclasses sent as positional msgpack arrays. Only ever append fields
+# (with defaults) to these, so payloads already in history keep decoding.
+COMPACT_TYPES: Dict[str, Type] = {
+    cls.__name__: cls for cls in (OrderObject, OrderStatusRecord)
+}
+
+
+class CompactDataclassConverter(EncodingPayloadConverter):
+    """Encodes registered dataclasses as msgpack arrays of their field values"""
+
+    @property
+    def encoding(self) -> str:
+        return COMPACT_ENCODING.decode()
+
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        cls = type(value)
+        if COMPACT_TYPES.get(cls.__name__) is not cls:
+            return None
+        values = [getattr(value, f.name) for f in dataclasses.fields(cls)]
+        return Payload(
+            metadata={"encoding": COMPACT_ENCODING, "type": cls.__name__.encode()},
+            data=msgpack.packb(values, use_bin_type=True),
+        )
+
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        cls = COMPACT_TYPES[payload.metadata["type"].decode()]
+        return cls(*msgpack.unpackb(payload.data, raw=False))
+
+
+class CompactPayloadConverter(CompositePayloadConverter):
+    def __init__(self) -> None:
+        super().__init__(
+            CompactDataclassConverter(),
+            *DefaultPayloadConverter.default_encoding_payload_converters,
+        )
+
+
+class CompressionCodec(PayloadCodec):
+    """zlib-compresses payloads larger than ``threshold`` bytes when it saves space"""
+
+    def __init__(self, threshold: Optional[int] = None, level: int = 6) -> None:
+        self.threshold = threshold if threshold is not None else int(os.getenv("PAYLOAD_COMPRESSION_THRESHOLD", "1024"))
+        self.level = level
+
+    async def encode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        encoded = []
+        for payload in payloads:
+            if payload.ByteSize() > self.threshold:
+                compressed = zlib.compress(payload.SerializeToString(), self.level)
+                if len(compressed) < payload.ByteSize():
+                    payload = Payload(metadata={"encoding": ZLIB_ENCODING}, data=compressed)
+            encoded.append(payload)
+        return encoded
+
+    async def decode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        decoded = []
+        for payload in payloads:
+            if payload.metadata.get("encoding") == ZLIB_ENCODING:
+                payload = Payload.FromString(zlib.decompress(payload.data))
+            decoded.append(payload)
+        return decoded
+
+
+def compact_data_converter() -> DataConverter:
+    return dataclasses.replace(
+        DataConverter.default,
+        payload_converter_class=CompactPayloadConverter,
+        payload_codec=CompressionCodec(),
+    )
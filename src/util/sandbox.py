@@ -0,0 +1,40 @@
+import os
+from typing import Optional
+
+from temporalio.worker import UnsandboxedWorkflowRunner, WorkflowRunner
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner, SandboxRestrictions
+
+# Loaded once per worker process and shared with every sandboxed run instead
+# of being re-imported per run. Only side-effect-free modules belong here.
+PASSTHROUGH_MODULES = (
+    # Our own pure modules used by workflow code
+    "util.dataObject",
+    "activities.interfaces",
+    # Heavy third-party modules, in case anything reaches them from a workflow import
+    "msgpack",
+    "psycopg",
+    "psycopg_pool",
+    "dotenv",
+    "loguru",
+)
+
+SANDBOX_MODES = ("passthrough", "strict", "off")
+
+
+def workflow_runner(mode: Optional[str] = None) -> WorkflowRunner:
+    """Workflow runner for ``WORKFLOW_SANDBOX`` (default ``passthrough``).
+
+    ``strict`` is the SDK's default sandbox, which re-imports every
+    non-stdlib module per run; ``off`` disables the sandbox and is meant only
+    for measuring its overhead.
+    """
+    mode = mode or os.getenv("WORKFLOW_SANDBOX", "passthrough")
+    if mode == "passthrough":
+        return SandboxedWorkflowRunner(
+            restrictions=SandboxRestrictions.default.with_passthrough_modules(*PASSTHROUGH_MODULES)
+        )
+    if mode == "strict":
+        return SandboxedWorkflowRunner()
+    if mode == "off":
+        return UnsandboxedWorkflowRunner()
+    raise ValueError(f"Unknown sandbox mode: {mode}")
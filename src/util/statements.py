@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Statement:
+    """A parameterized SQL statement.
+
+    Statements are executed with bound parameters and prepared once per
+    pooled connection, so the hot order/payment writes skip parse and plan
+    after the first call on each connection.
+    """
+    sql: str
+
+
+INSERT_ORDER = Statement(
+    """INSERT INTO orders (id, order_data, address_json, order_status)
+    VALUES (%s, %s, %s, 'Received')
+    ON CONFLICT (id) DO NOTHING""",
+)
+
+SET_ORDER_STATUS = Statement(
+    """UPDATE orders SET
+    order_status = %s,
+    updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s""",
+)
+
+INSERT_PAYMENT = Statement(
+    """INSERT INTO payments (id, order_id, payment_status, amount)
+    VALUES (%s, %s, 1, %s)
+    ON CONFLICT DO NOTHING""",
+)
+
+LOOKUP_LEDGER = Statement(
+    """SELECT result FROM idempotency_ledger
+    WHERE workflow_id = %s AND activity_type = %s AND idempotency_key = %s
+    AND expires_at > NOW()""",
+)
+
+INSERT_LEDGER = Statement(
+    """INSERT INTO idempotency_ledger (workflow_id, activity_type, idempotency_key, result, expires_at)
+    VALUES (%s, %s, %s, %s, NOW() + %s)
+    ON CONFLICT DO NOTHING""",
+)
+
+PURGE_LEDGER = Statement(
+    """DELETE FROM idempotency_ledger
+    WHERE ctid IN (
+        SELECT ctid FROM idempotency_ledger
+        WHERE expires_at <= NOW()
+        LIMIT %s
+    )""",
+)
+
+UPSERT_ORDER_STATUS_VIEW = Statement(
+    """INSERT INTO order_status_view
+    (order_id, workflow_id, status, version, is_cancelled, manual_review_completed, shipping_address, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (order_id) DO UPDATE SET
+    workflow_id = EXCLUDED.workflow_id,
+    status = EXCLUDED.status,
+    version = EXCLUDED.version,
+    is_cancelled = EXCLUDED.is_cancelled,
+    manual_review_completed = EXCLUDED.manual_review_completed,
+    shipping_address = EXCLUDED.shipping_address,
+    updated_at = EXCLUDED.updated_at
+    WHERE order_status_view.version < EXCLUDED.version""",
+)
+
+GET_ORDER_STATUS_VIEW = Statement(
+    """SELECT order_id, workflow_id, status, version, is_cancelled, manual_review_completed,
+    shipping_address, created_at, updated_at
+    FROM order_status_view WHERE order_id = %s""",
+)
+
+COUNT_ORDER_STATUS_VIEW = Statement(
+    """SELECT status, count(*) FROM order_status_view GROUP BY status""",
+)
+
+# Keyset chunks by primary key; rows touched within the grace period are left
+# to their still-running workflows
+SCAN_ORDERS = Statement(
+    """SELECT o.id::text, o.order_status,
+    EXISTS (SELECT 1 FROM payments p WHERE p.order_id = o.id)
+    FROM orders o
+    WHERE o.id > %s::uuid AND o.updated_at >= %s AND o.updated_at < %s
+    ORDER BY o.id
+    LIMIT %s""",
+)
+
+# Returns every payment in the chunk, with NULL order_status where no order row exists
+SCAN_PAYMENTS = Statement(
+    """SELECT p.id::text, p.order_id::text, o.order_status
+    FROM payments p
+    LEFT JOIN orders o ON o.id = p.order_id
+    WHERE p.id > %s::uuid AND p.created_at >= %s AND p.created_at < %s
+    ORDER BY p.id
+    LIMIT %s""",
+)
+
+# Only moves an order from the status the sweep saw, so it never undoes newer progress
+REPAIR_ORDER_STATUS = Statement(
+    """UPDATE orders SET
+    order_status = %s,
+    updated_at = CURRENT_TIMESTAMP
+    WHERE id = %s::uuid AND order_status = %s""",
+)
+
+UPSERT_RECONCILIATION_ISSUE = Statement(
+    """INSERT INTO reconciliation_issues (order_id, kind, action, detail)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (order_id, kind) DO UPDATE SET
+    action = EXCLUDED.action,
+    detail = EXCLUDED.detail,
+    last_seen = NOW()""",
+)
@@ -0,0 +1,110 @@
+"""Read-only queries over the `order_status_view` read model.
+
+OrderWorkflow projects every status change into the table, so dashboards
+can list and search orders without querying workflows (and so without a
+live worker). Listings use keyset pagination on (updated_at, order_id),
+newest first: each page is one index range scan, however deep it is.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from util.db import PostgresPool
+from util.statements import COUNT_ORDER_STATUS_VIEW, GET_ORDER_STATUS_VIEW
+
+COLUMNS = (
+    "order_id, workflow_id, status, version, is_cancelled, manual_review_completed, "
+    "shipping_address, created_at, updated_at"
+)
+MAX_PAGE_SIZE = 1000
+
+
+@dataclass
+class OrderStatusRow:
+    order_id: str
+    workflow_id: str
+    status: str
+    version: int
+    is_cancelled: bool
+    manual_review_completed: bool
+    shipping_address: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass
+class StatusPage:
+    rows: List[OrderStatusRow]
+    # Pass back as ``after`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+def _row(record: tuple) -> OrderStatusRow:
+    order_id, *rest = record
+    return OrderStatusRow(str(order_id), *rest)
+
+
+def encode_cursor(row: OrderStatusRow) -> str:
+    return f"{row.updated_at.isoformat()}|{row.order_id}"
+
+
+def decode_cursor(cursor: str) -> tuple:
+    updated_at, _, order_id = cursor.partition("|")
+    if not order_id:
+        raise ValueError(f"Invalid status cursor: {cursor}")
+    return datetime.fromisoformat(updated_at), order_id
+
+
+class OrderStatusView:
+    """List and look up orders by their latest projected status"""
+
+    def __init__(self, db: PostgresPool):
+        self.db = db
+
+    async def get(self, order_id: str) -> Optional[OrderStatusRow]:
+        rows = await self.db.query(GET_ORDER_STATUS_VIEW, (order_id,))
+        return _row(rows[0]) if rows else None
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        updated_from: Optional[datetime] = None,
+        updated_to: Optional[datetime] = None,
+        after: Optional[str] = None,
+        limit: int = 100,
+    ) -> StatusPage:
+        """One page of orders, newest change first.
+
+        ``status`` and the half-open ``[updated_from, updated_to)`` range
+        filter the listing; ``after`` is the previous page's ``next_cursor``.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        # Only fixed fragments are concatenated; every value is a bound parameter
+        conditions: List[str] = []
+        params: list = []
+        if status is not None:
+            conditions.append("status = %s")
+            params.append(status)
+        if updated_from is not None:
+            conditions.append("updated_at >= %s")
+            params.append(updated_from)
+        if updated_to is not None:
+            conditions.append("updated_at < %s")
+            params.append(updated_to)
+        if after is not None:
+            conditions.append("(updated_at, order_id) < (%s, %s)")
+            params.extend(decode_cursor(after))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # One extra row tells whether another page exists
+        records = await self.db.fetch(
+            f"SELECT {COLUMNS} FROM order_status_view {where} "
+            f"ORDER BY updated_at DESC, order_id DESC LIMIT %s",
+            (*params, limit + 1),
+        )
+        rows = [_row(record) for record in records[:limit]]
+        next_cursor = encode_cursor(rows[-1]) if len(records) > limit else None
+        return StatusPage(rows=rows, next_cursor=next_cursor)
+
+    async def counts(self) -> Dict[str, int]:
+        """Orders per status"""
+        return {status: count for status, count in await self.db.query(COUNT_ORDER_STATUS_VIEW, ())}
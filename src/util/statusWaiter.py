@@ -0,0 +1,60 @@
+import asyncio
+from typing import Optional
+
+from temporalio.client import WorkflowHandle, WorkflowUpdateFailedError
+from temporalio.exceptions import ApplicationError
+
+from util.dataObject import OrderStatusRecord, TERMINAL_STATUSES
+
+# Pause before retrying a wait rejected while the run continues as new
+CONTINUE_AS_NEW_RETRY_DELAY = 0.5
+
+
+def continuing_as_new(error: WorkflowUpdateFailedError) -> bool:
+    return isinstance(error.cause, ApplicationError) and error.cause.type == "ContinuingAsNew"
+
+
+async def wait_for_status(
+    handle: WorkflowHandle,
+    target_status: Optional[str] = None,
+    known_version: int = -1,
+    timeout: Optional[float] = None,
+    poll_timeout: float = 60,
+) -> OrderStatusRecord:
+    """Wait on OrderWorkflow's ``wait_for_status`` update instead of polling queries.
+
+    With ``target_status`` this returns once the order reaches it (or a
+    terminal status); without one it returns on the first status change
+    after ``known_version``. Each update call long-polls for up to
+    ``poll_timeout`` seconds server-side; ``timeout`` bounds the total wait.
+    A wait rejected because the run is continuing as new is retried against
+    the next run, so ``handle`` should not pin a run id. Each call adds events
+    to the workflow's history; use the ``get_status`` query for frequent polls.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout is not None else None
+    while True:
+        wait = poll_timeout
+        if deadline is not None:
+            wait = min(wait, max(deadline - loop.time(), 0))
+        try:
+            record = await handle.execute_update(
+                "wait_for_status",
+                args=[target_status, known_version, wait],
+                result_type=OrderStatusRecord,
+            )
+        except WorkflowUpdateFailedError as e:
+            if not continuing_as_new(e) or (deadline is not None and loop.time() >= deadline):
+                raise
+            await asyncio.sleep(CONTINUE_AS_NEW_RETRY_DELAY)
+            continue
+        if record.workflow_status in TERMINAL_STATUSES:
+            return record
+        if target_status is not None and record.workflow_status == target_status:
+            return record
+        if target_status is None and record.version > known_version:
+            return record
+        if deadline is not None and loop.time() >= deadline:
+            raise TimeoutError(
+                f"Workflow {handle.id} still {record.workflow_status!r} after {timeout}s"
+            )
@@ -1,24 +1,7 @@
-CREATE TABLE orders (
-    id UUID PRIMARY KEY,
-    order_data jsonb NOT NULL,
-    address_json jsonb NOT NULL,
-    order_status VARCHAR(255) NOT NULL,
-    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-    updated_at TIMESTAMP NULL DEFAULT NOW()
-);
-
-CREATE TABLE payments (
-    id UUID PRIMARY KEY,
-    order_id UUID NOT NULL,
-    payment_status int4 NOT NULL,
-    amount DECIMAL(10, 2) NOT NULL,
-    created_at TIMESTAMP NOT NULL DEFAULT NOW()
-);
-
-CREATE TABLE events(
-    id int4 GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-    order_id UUID NOT NULL,
-    type text NOT NULL,
-    payload jsonb NOT NULL,
-    created_at TIMESTAMP NOT NULL DEFAULT NOW()
-)
+-- The schema is managed by the versioned migrations in src/migrations.
+-- Apply them (idempotently) with:
+--
+--     cd src
+--     python migrate.py up
+--
+-- 0001_baseline.sql holds the tables that used to be created from this file.
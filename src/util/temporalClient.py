@@ -0,0 +1,36 @@
+import dataclasses
+import os
+from typing import Optional
+
+from temporalio.client import Client
+from temporalio.converter import DataConverter
+
+
+def data_converter(record_payload_sizes: bool = False) -> DataConverter:
+    """Compact msgpack + compression converter when TEMPORAL_COMPACT_PAYLOADS=1.
+
+    Clients and workers must agree on this setting. ``record_payload_sizes``
+    adds a pass-through codec that feeds payload sizes into util.metrics.
+    """
+    if os.getenv("TEMPORAL_COMPACT_PAYLOADS", "0") == "1":
+        from util.payloadConverter import compact_data_converter
+        converter = compact_data_converter()
+    else:
+        converter = DataConverter.default
+    if record_payload_sizes:
+        from util.metrics import PayloadSizeCodec
+        converter = dataclasses.replace(converter, payload_codec=PayloadSizeCodec(converter.payload_codec))
+    return converter
+
+
+async def connect_client(
+    target: Optional[str] = None,
+    namespace: Optional[str] = None,
+    record_payload_sizes: bool = False,
+) -> Client:
+    """Connect once and share the client; it multiplexes calls over one channel"""
+    return await Client.connect(
+        target or os.getenv("TEMPORAL_ADDRESS", "localhost:7233"),
+        namespace=namespace or os.getenv("TEMPORAL_NAMESPACE", "default"),
+        data_converter=data_converter(record_payload_sizes),
+    )
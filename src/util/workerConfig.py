@@ -0,0 +1,104 @@
+import json
+import os
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+DEFAULT_QUEUES = ["order-tq", "shipping-tq"]
+
+
+@dataclass
+class QueueConfig:
+    """Worker tuning for one task queue; field names match temporalio.worker.Worker"""
+    task_queue: str
+    max_concurrent_activities: int = 100
+    max_concurrent_workflow_tasks: int = 100
+    max_cached_workflows: int = 1000
+    max_concurrent_workflow_task_polls: int = 5
+    max_concurrent_activity_task_polls: int = 5
+    graceful_shutdown_seconds: float = 30.0
+
+
+@dataclass
+class WorkerConfig:
+    temporal_address: str = "localhost:7233"
+    namespace: str = "default"
+    # Each process runs a worker for every queue; more processes spread
+    # workflow task processing across cores
+    processes: int = 1
+    queues: List[QueueConfig] = field(default_factory=list)
+    # Prometheus endpoint port (process N listens on port + N); 0 disables it
+    metrics_port: int = 0
+    # Periodic metrics dump (JSON, or Prometheus text for *.prom); "" disables it
+    metrics_file: str = ""
+    metrics_dump_seconds: float = 15.0
+
+
+def _env_key(task_queue: str, name: str) -> str:
+    return f"{task_queue}_{name}".upper().replace("-", "_")
+
+
+def _coerce(annotation: Any, value: str) -> Any:
+    """Parse an env string as the field's declared type, not its default's"""
+    if get_origin(annotation) is Union:
+        # Optional[X]: an empty value means None
+        if value == "" and type(None) in get_args(annotation):
+            return None
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if annotation is bool:
+        if value.lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.lower() in ("0", "false", "no", "off", ""):
+            return False
+        raise ValueError(f"Not a boolean: {value!r}")
+    return annotation(value)
+
+
+def load_worker_config(path: Optional[str] = None, queues: Optional[List[str]] = None) -> WorkerConfig:
+    """Build the launcher config from a JSON file, then apply env overrides.
+
+    File layout (every key optional)::
+
+        {"processes": 4,
+         "queues": {"order-tq": {"max_concurrent_activities": 200},
+                    "shipping-tq": {}}}
+
+    Env overrides: ``TEMPORAL_ADDRESS``, ``TEMPORAL_NAMESPACE``,
+    ``WORKER_PROCESSES``, ``WORKER_QUEUES`` (comma separated), ``METRICS_PORT``,
+    ``METRICS_FILE`` and per-queue fields such as
+    ``ORDER_TQ_MAX_CONCURRENT_ACTIVITIES``.
+    """
+    path = path or os.getenv("WORKER_CONFIG")
+    raw: Dict[str, Any] = {}
+    if path:
+        with open(path) as f:
+            raw = json.load(f)
+
+    queue_settings: Dict[str, Dict[str, Any]] = raw.get("queues", {})
+    if queues is None:
+        env_queues = os.getenv("WORKER_QUEUES")
+        if env_queues:
+            queues = [q.strip() for q in env_queues.split(",") if q.strip()]
+        else:
+            queues = list(queue_settings) or DEFAULT_QUEUES
+
+    hints = get_type_hints(QueueConfig)
+    queue_configs = []
+    for task_queue in queues:
+        queue_config = QueueConfig(task_queue=task_queue, **queue_settings.get(task_queue, {}))
+        for f in fields(QueueConfig):
+            if f.name == "task_queue":
+                continue
+            value = os.getenv(_env_key(task_queue, f.name))
+            if value is not None:
+                setattr(queue_config, f.name, _coerce(hints[f.name], value))
+        queue_configs.append(queue_config)
+
+    return WorkerConfig(
+        temporal_address=os.getenv("TEMPORAL_ADDRESS", raw.get("temporal_address", "localhost:7233")),
+        namespace=os.getenv("TEMPORAL_NAMESPACE", raw.get("namespace", "default")),
+        processes=int(os.getenv("WORKER_PROCESSES", raw.get("processes", 1))),
+        queues=queue_configs,
+        metrics_port=int(os.getenv("METRICS_PORT", raw.get("metrics_port", 0))),
+        metrics_file=os.getenv("METRICS_FILE", raw.get("metrics_file", "")),
+        metrics_dump_seconds=float(os.getenv("METRICS_DUMP_SECONDS", raw.get("metrics_dump_seconds", 15))),
+    )
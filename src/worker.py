@@ -0,0 +1,257 @@
+"""Unified worker launcher for order-tq and shipping-tq.
+
+    cd src
+    python worker.py                          # both queues, one process
+    WORKER_PROCESSES=4 python worker.py       # both queues, four processes
+    python worker.py --config worker.json --queues order-tq
+
+See util/workerConfig.py for the config file layout and env overrides.
+SIGTERM/SIGINT drain in-flight tasks before exiting.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import signal
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Awaitable, Callable, Dict, List
+
+from temporalio.client import Client
+from temporalio.worker import Interceptor, Worker
+
+from util.flakyCall import get_injector
+from util.logDecorator import configure_logging
+from util.metrics import (
+    MetricsInterceptor,
+    MetricsWorkflowRunner,
+    REGISTRY,
+    dump_metrics_periodically,
+    start_metrics_server,
+)
+from util.sandbox import workflow_runner
+from util.temporalClient import connect_client
+from util.workerConfig import QueueConfig, WorkerConfig, load_worker_config
+
+logger = logging.getLogger("worker")
+
+
+def worker_options(queue: QueueConfig, interceptors: List[Interceptor]) -> Dict:
+    runner = workflow_runner()
+    if any(isinstance(interceptor, MetricsInterceptor) for interceptor in interceptors):
+        # Workflow task latency and cached runs are measured around the runner
+        runner = MetricsWorkflowRunner(runner)
+    return {
+        "task_queue": queue.task_queue,
+        "interceptors": interceptors,
+        "max_concurrent_activities": queue.max_concurrent_activities,
+        "max_concurrent_workflow_tasks": queue.max_concurrent_workflow_tasks,
+        "max_cached_workflows": queue.max_cached_workflows,
+        "max_concurrent_workflow_task_polls": queue.max_concurrent_workflow_task_polls,
+        "max_concurrent_activity_task_polls": queue.max_concurrent_activity_task_polls,
+        "graceful_shutdown_timeout": timedelta(seconds=queue.graceful_shutdown_seconds),
+        "workflow_runner": runner,
+    }
+
+
+async def report_pool_stats(db, events, interval: float):
+    """Log pool saturation periodically so min/max can be sized from real load"""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"DB pool stats: {db.stats()}")
+        logger.info(f"Event writer stats: {events.stats()}")
+
+
+async def build_order_worker(
+    client: Client,
+    queue: QueueConfig,
+    interceptors: List[Interceptor],
+    stack: contextlib.AsyncExitStack,
+) -> Worker:
+    from activities.orderActivities import OrderActivities
+    from activities.reconcileActivities import ReconcileActivities
+    from dbWriter import DBWriterActivities
+    from migrate import maintain_partitions_periodically
+    from util.claimCheck import ClaimCheck
+    from util.db import PostgresPool
+    from util.eventWriter import EventWriter
+    from util.idempotency import IdempotencyLedger, purge_ledger_periodically
+    from workflows.orderWorkflow import OrderWorkflow
+    from workflows.reconcileWorkflow import ReconciliationWorkflow
+
+    # The pool and event writer live exactly as long as the worker; the
+    # writer is closed (and flushed) before the pool it writes through
+    db = await stack.enter_async_context(PostgresPool())
+    events = await stack.enter_async_context(EventWriter(db))
+    stats_task = asyncio.create_task(
+        report_pool_stats(db, events, float(os.getenv("DB_POOL_STATS_INTERVAL", "60")))
+    )
+    stack.callback(stats_task.cancel)
+
+    ledger = IdempotencyLedger(db)
+    purge_task = asyncio.create_task(
+        purge_ledger_periodically(ledger, float(os.getenv("LEDGER_PURGE_INTERVAL", "3600")))
+    )
+    stack.callback(purge_task.cancel)
+
+    partition_interval = float(os.getenv("EVENTS_PARTITION_INTERVAL", "3600"))
+    if partition_interval:
+        partition_task = asyncio.create_task(maintain_partitions_periodically(
+            partition_interval,
+            ahead=int(os.getenv("EVENTS_PARTITIONS_AHEAD", "3")),
+            retain_months=int(os.getenv("EVENTS_RETAIN_MONTHS", "0")),
+        ))
+        stack.callback(partition_task.cancel)
+
+    order_activities = OrderActivities(db, events, ClaimCheck.from_env(db), ledger)
+    db_writer = DBWriterActivities(events)
+    reconcile_activities = ReconcileActivities(db, client)
+    return Worker(
+        client,
+        workflows=[OrderWorkflow, ReconciliationWorkflow],
+        activities=[
+            order_activities.order_received,
+            order_activities.order_validated,
+            order_activities.payment_charged,
+            order_activities.status_projected,
+            db_writer.write_event,
+            reconcile_activities.reconcile_rows_scanned,
+            reconcile_activities.order_workflows_described,
+            reconcile_activities.reconciliation_applied,
+        ],
+        **worker_options(queue, interceptors),
+    )
+
+
+async def build_shipping_worker(
+    client: Client,
+    queue: QueueConfig,
+    interceptors: List[Interceptor],
+    stack: contextlib.AsyncExitStack,
+) -> Worker:
+    from activities.dispatchActivities import DispatchActivities
+    from activities.shippingActivities import package_prepared, carrier_dispatched, carriers_dispatched_bulk
+    from workflows.dispatchWorkflow import CarrierDispatchWorkflow
+    from workflows.shippingWorkflow import ShippingWorkflow
+
+    dispatch_activities = DispatchActivities(client)
+    return Worker(
+        client,
+        workflows=[ShippingWorkflow, CarrierDispatchWorkflow],
+        activities=[
+            package_prepared,
+            carrier_dispatched,
+            carriers_dispatched_bulk,
+            dispatch_activities.request_dispatch,
+            dispatch_activities.dispatch_status_checked,
+        ],
+        **worker_options(queue, interceptors),
+    )
+
+
+QueueBuilder = Callable[[Client, QueueConfig, List[Interceptor], contextlib.AsyncExitStack], Awaitable[Worker]]
+
+QUEUE_BUILDERS: Dict[str, QueueBuilder] = {
+    "order-tq": build_order_worker,
+    "shipping-tq": build_shipping_worker,
+}
+
+
+async def run_workers(config: WorkerConfig, process_index: int = 0) -> None:
+    """Run a worker per configured queue in this process until SIGTERM/SIGINT"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    metrics_enabled = bool(config.metrics_port or config.metrics_file)
+    client = await connect_client(config.temporal_address, config.namespace, record_payload_sizes=metrics_enabled)
+    interceptors: List[Interceptor] = [MetricsInterceptor()] if metrics_enabled else []
+    async with contextlib.AsyncExitStack() as stack:
+        if config.metrics_port:
+            server = await start_metrics_server(config.metrics_port + process_index)
+            stack.push_async_callback(server.wait_closed)
+            stack.callback(server.close)
+        if config.metrics_file:
+            # Each process writes its own file; the final dump runs at shutdown
+            path = config.metrics_file if config.processes <= 1 else f"{config.metrics_file}.{process_index}"
+            dump_task = asyncio.create_task(dump_metrics_periodically(path, config.metrics_dump_seconds))
+            stack.callback(REGISTRY.dump, path)
+            stack.callback(dump_task.cancel)
+
+        workers: List[Worker] = []
+        for queue in config.queues:
+            builder = QUEUE_BUILDERS.get(queue.task_queue)
+            if builder is None:
+                raise ValueError(f"No worker registered for task queue {queue.task_queue!r}")
+            workers.append(await builder(client, queue, interceptors, stack))
+
+        runs = [asyncio.create_task(worker.run()) for worker in workers]
+        logger.info(f"Process {process_index} (pid {os.getpid()}) running {[q.task_queue for q in config.queues]}")
+        await asyncio.wait([asyncio.create_task(stop.wait()), *runs], return_when=asyncio.FIRST_COMPLETED)
+
+        logger.info(f"Process {process_index} draining workers...")
+        await asyncio.gather(*(worker.shutdown() for worker in workers))
+        await asyncio.gather(*runs, return_exceptions=True)
+    injector = get_injector()
+    if injector is not None:
+        logger.info(f"Process {process_index} injected faults: {injector.stats()}")
+    logger.info(f"Process {process_index} stopped")
+
+
+def _setup_logging() -> None:
+    logging.basicConfig(level=logging.INFO)
+    # Activity call logs (@ioLogger) go through loguru's queued sink
+    configure_logging(level=os.getenv("LOG_LEVEL", "INFO"))
+
+
+def _process_main(config: WorkerConfig, process_index: int) -> None:
+    _setup_logging()
+    asyncio.run(run_workers(config, process_index))
+
+
+def launch(config: WorkerConfig) -> None:
+    _setup_logging()
+    logger.info(f"Effective worker config: {json.dumps(asdict(config), indent=2)}")
+    if config.processes <= 1:
+        asyncio.run(run_workers(config))
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=_process_main, args=(config, index), name=f"worker-{index}")
+        for index in range(config.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default=None, help="JSON config file (or WORKER_CONFIG)")
+    parser.add_argument("--queues", default=None, help="Comma separated task queues (or WORKER_QUEUES)")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (or WORKER_PROCESSES)")
+    args = parser.parse_args()
+
+    queues = args.queues.split(",") if args.queues else None
+    config = load_worker_config(args.config, queues=queues)
+    if args.processes is not None:
+        config.processes = args.processes
+    launch(config)
+
+
+if __name__ == "__main__":
+    main()
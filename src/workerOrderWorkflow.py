@@ -1,30 +1,6 @@
-import asyncio
-from temporalio.client import Client
-from temporalio.worker import Worker
-from workflows.orderWorkflow import OrderWorkflow
-from activities.orderActivities import order_received, order_validated, payment_charged
-
-async def main():
-    client = await Client.connect("localhost:7233")
-    
-    # Main worker for order processing
-    order_worker = Worker(
-        client,
-        task_queue="order-tq",
-        workflows=[OrderWorkflow],
-        activities=[order_received, order_validated, payment_charged],
-    )
-
-    
-    print("Starting order worker...")
-    order_worker_task = asyncio.create_task(order_worker.run())
-    
-
-    
-    print("All workers started.")
-    
-    # Wait for both workers
-    await asyncio.gather(order_worker_task)
+from util.workerConfig import load_worker_config
+from worker import launch
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Order queue only; tuning comes from WORKER_CONFIG / env like worker.py
+    launch(load_worker_config(queues=["order-tq"]))
@@ -1,28 +1,6 @@
-import asyncio
-from temporalio.client import Client
-from temporalio.worker import Worker
-from workflows.shippingWorkflow import ShippingWorkflow
-from activities.shippingActivities import package_prepared, carrier_dispatched
-
-async def main():
-    client = await Client.connect("localhost:7233")
-
-    # Separate worker for shipping operations
-    shipping_worker = Worker(
-        client,
-        task_queue="shipping-tq",
-        workflows=[ShippingWorkflow],
-        activities=[package_prepared, carrier_dispatched],
-    )
-    
-    
-    print("Starting shipping worker...")
-    shipping_worker_task = asyncio.create_task(shipping_worker.run())
-    
-    print("All workers started.")
-    
-    # Wait for both workers
-    await asyncio.gather(shipping_worker_task)
+from util.workerConfig import load_worker_config
+from worker import launch
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Shipping queue only; tuning comes from WORKER_CONFIG / env like worker.py
+    launch(load_worker_config(queues=["shipping-tq"]))
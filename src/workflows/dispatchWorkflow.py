@@ -0,0 +1,143 @@
+import asyncio
+from collections import deque
+from datetime import timedelta
+from typing import Any, Deque, Dict, List, Optional, Set
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+from activities.interfaces import carriers_dispatched_bulk
+from util.dataObject import DispatchRequest, DispatchResult, DispatchState
+
+# Continue-as-new well before the server's history limits
+MAX_HISTORY_EVENTS = 10_000
+
+
+@workflow.defn
+class CarrierDispatchWorkflow:
+    """Long-running per-carrier aggregator that dispatches parcels in bulk.
+
+    ShippingWorkflows hand parcels over with signal-with-start on
+    ``dispatch-<carrier>``. A batch is flushed to one bulk activity once it
+    has ``batch_size`` parcels or ``flush_seconds`` after its first parcel,
+    and each result is signalled back to the ShippingWorkflow waiting on it.
+    The ids of recently dispatched parcels are kept, bounded by
+    ``max_dispatched_ids``, so a redelivered request is not dispatched twice.
+    """
+
+    def __init__(self):
+        # Signals can arrive before run() starts, so the queue lives here
+        self._pending: List[DispatchRequest] = []
+        self._queued_ids: Set[str] = set()
+        self._dispatched_order: Deque[str] = deque()
+        self._dispatched_ids: Set[str] = set()
+        self._state: Optional[DispatchState] = None
+
+    @workflow.run
+    async def run(self, carrier: str, state: Optional[DispatchState] = None) -> None:
+        self._state = state or DispatchState(carrier=carrier)
+        for order_id in self._state.dispatched_ids:
+            self._mark_dispatched(order_id)
+        self._state.dispatched_ids = []
+        carried = self._state.pending
+        self._state.pending = []
+        early = self._pending
+        self._pending, self._queued_ids = [], set()
+        for request in carried + early:
+            self.enqueue(request)
+
+        while True:
+            await workflow.wait_condition(lambda: bool(self._pending))
+            # The first parcel opens the batch window
+            try:
+                await workflow.wait_condition(
+                    lambda: len(self._pending) >= self._state.batch_size,
+                    timeout=timedelta(seconds=self._state.flush_seconds),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+            batch = self._pending[:self._state.batch_size]
+            del self._pending[:self._state.batch_size]
+            for request in batch:
+                self._queued_ids.discard(request.order_id)
+            await self._flush(batch)
+            self._state.batches_flushed += 1
+
+            info = workflow.info()
+            if info.is_continue_as_new_suggested() or info.get_current_history_length() > MAX_HISTORY_EVENTS:
+                await workflow.wait_condition(workflow.all_handlers_finished)
+                self._state.pending = list(self._pending)
+                self._state.dispatched_ids = list(self._dispatched_order)
+                workflow.continue_as_new(args=[carrier, self._state])
+
+    async def _flush(self, batch: List[DispatchRequest]):
+        carrier = self._state.carrier
+        batch_id = f"{carrier}-{workflow.info().run_id[:8]}-{self._state.batches_flushed}"
+        try:
+            results: List[DispatchResult] = await workflow.execute_activity(
+                carriers_dispatched_bulk,
+                args=[carrier, batch_id, batch],
+                start_to_close_timeout=timedelta(minutes=10),
+                retry_policy=RetryPolicy(
+                    initial_interval=timedelta(seconds=2),
+                    maximum_interval=timedelta(minutes=2),
+                    maximum_attempts=3,
+                ),
+            )
+        except ActivityError as e:
+            workflow.logger.error(f"Bulk dispatch {batch_id} failed: {e}")
+            results = [
+                DispatchResult(order_id=request.order_id, status="DispatchFailed", carrier=carrier, batch_id=batch_id)
+                for request in batch
+            ]
+
+        by_order = {result.order_id: result for result in results}
+        for result in results:
+            if result.status == "Dispatched":
+                self._mark_dispatched(result.order_id)
+        # A ShippingWorkflow that has already gone away just misses its signal
+        await asyncio.gather(
+            *(
+                workflow.get_external_workflow_handle(request.reply_to).signal(
+                    "dispatch_completed",
+                    by_order.get(request.order_id) or DispatchResult(
+                        order_id=request.order_id, status="DispatchFailed", carrier=carrier, batch_id=batch_id
+                    ),
+                )
+                for request in batch
+            ),
+            return_exceptions=True,
+        )
+
+    def _mark_dispatched(self, order_id: str):
+        if order_id in self._dispatched_ids:
+            return
+        self._dispatched_order.append(order_id)
+        self._dispatched_ids.add(order_id)
+        while len(self._dispatched_order) > self._state.max_dispatched_ids:
+            self._dispatched_ids.discard(self._dispatched_order.popleft())
+
+    @workflow.signal
+    def enqueue(self, request: DispatchRequest):
+        """Signal to add a parcel to the next batch; repeats for a queued or dispatched order are ignored"""
+        if request.order_id in self._queued_ids or request.order_id in self._dispatched_ids:
+            return
+        self._queued_ids.add(request.order_id)
+        self._pending.append(request)
+
+    @workflow.query
+    def get_status(self) -> Dict[str, Any]:
+        """Query aggregator backlog"""
+        return {
+            "pending": len(self._pending),
+            "batches_flushed": self._state.batches_flushed if self._state else 0,
+        }
+
+    @workflow.query
+    def dispatch_status(self, order_id: str) -> str:
+        """Query whether an order is queued, was recently dispatched, or is unknown here"""
+        if order_id in self._queued_ids:
+            return "queued"
+        if order_id in self._dispatched_ids:
+            return "dispatched"
+        return "unknown"
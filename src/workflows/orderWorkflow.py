@@ -1,16 +1,28 @@
-from datetime import timedelta
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from activities.orderActivities import order_received, order_validated, payment_charged
+from temporalio.exceptions import ActivityError, ApplicationError, TimeoutError as ActivityTimeoutError
 from workflows.shippingWorkflow import ShippingWorkflow
-from util.dataObject import OrderObject
+from util.dataObject import (
+    ORDER_STATUS_SEARCH_ATTRIBUTE,
+    OrderCarryOver,
+    OrderObject,
+    OrderOptions,
+    OrderStatusProjection,
+    OrderStatusRecord,
+    TERMINAL_STATUSES,
+)
 from temporalio.workflow import ParentClosePolicy
 from asyncio import CancelledError
 
-import logging
+from activities.interfaces import order_received, order_validated, payment_charged, status_projected
 
-logging.basicConfig(level=logging.INFO)
+MANUAL_REVIEW_TIMEOUT = timedelta(seconds=24)  # 24 hour timeout for manual review
+# Signal request ids remembered for deduplication
+RECENT_SIGNAL_IDS = 256
 
 
 @workflow.defn
@@ -23,73 +35,79 @@ class OrderWorkflow:
         self._is_cancelled = False
         self._shipping_address: Optional[str] = None
         self._manual_review_completed = False
+        self._order_id: Optional[str] = None
         self._workflow_status = "started"
+        self._status_version = 0
+        self._status_changed_at: Optional[datetime] = None
+        self._projected_version = 0
+        self._projector: Optional[asyncio.Task] = None
+        self._index_status = False
+        self._rejection_reason: Optional[str] = None
+        self._options = OrderOptions()
+        self._review_deadline: Optional[datetime] = None
+        self._recent_signal_ids: deque = deque(maxlen=RECENT_SIGNAL_IDS)
+        # Set once continue-as-new is pending so status waits can't hold it up
+        self._continuing_as_new = False
 
     @workflow.run
-    async def run(self, order_id: str, payment_id:str,initial_address: str = "Default Address") -> Dict[str, Any]:
+    async def run(
+        self,
+        order_id: str,
+        payment_id:str,
+        initial_address: str = "Default Address",
+        options: Optional[OrderOptions] = None,
+        carry_over: Optional[OrderCarryOver] = None,
+    ) -> Dict[str, Any]:
         """Main order workflow execution"""
+        if options is not None:
+            self._options = options
+        self._order_id = order_id
+        if self._options.project_status and workflow.patched("status-projection"):
+            self._projector = asyncio.create_task(self._project_status_changes())
+        if self._options.status_search_attribute and workflow.patched("status-search-attribute"):
+            self._index_status = True
+            if self._status_version:
+                # A signal changed the status before run() started
+                self._upsert_status_attribute()
+        result = await self._process_order(order_id, payment_id, initial_address, carry_over)
+        # Let pending wait_for_status updates observe the final status
+        await workflow.wait_condition(workflow.all_handlers_finished)
+        await self._await_status_projection()
+        if self._projector is not None:
+            self._projector.cancel()
+        return result
+
+    async def _process_order(
+        self,
+        order_id: str,
+        payment_id: str,
+        initial_address: str,
+        carry_over: Optional[OrderCarryOver],
+    ) -> Dict[str, Any]:
         try:
-            self._shipping_address = initial_address
-            self._workflow_status = "processing"
-            
-            # Step 1: Receive Order
-            workflow.logger.info(f"Executing order_received activity for order_id: {order_id}")
-            self._order_data = await workflow.execute_activity(
-                order_received,
-                [order_id,payment_id],
-                start_to_close_timeout=timedelta(seconds=60),
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=1),
-                    maximum_interval=timedelta(minutes=1),
-                    maximum_attempts=3,
-                )
-            )
-            
-            # Check for cancellation after order received
-            if self._is_cancelled:
-                return {"status": "cancelled", "reason": "Order cancelled by user"}
-            
-            # Step 2: Validate Order
-            workflow.logger.info(f"Executing order_validated activity for order_id: {order_id}")
-            self._validation_result = await workflow.execute_activity(
-                order_validated,
-                self._order_data,
-                start_to_close_timeout=timedelta(minutes=5),
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=1),
-                    maximum_interval=timedelta(minutes=1),
-                    maximum_attempts=3,
-                )
-            )
-            
-            if not self._validation_result:
-                workflow.logger.info(f"Order validation failed for order_id: {order_id}")
-                return {"status": "failed", "reason": "Order validation failed"}
-            
-            # Check for cancellation after validation
-            if self._is_cancelled:
-                workflow.logger.info(f"Order cancelled by user for order_id: {order_id}")
-                return {"status": "cancelled", "reason": "Order cancelled by user"}
-            
-            workflow.logger.info(f"Waiting for manual review for order_id: {order_id}")
-            
+            if carry_over is not None:
+                self._restore(carry_over)
+            else:
+                early_result = await self._receive_and_validate(order_id, payment_id, initial_address)
+                if early_result is not None:
+                    return early_result
+
+                workflow.logger.info(f"Waiting for manual review for order_id: {order_id}")
+                self._review_deadline = workflow.now() + MANUAL_REVIEW_TIMEOUT
+                self._set_status("awaiting_manual_review")
+
             # Step 3: Timer for Manual Review (simulated human approval)
-            self._workflow_status = "awaiting_manual_review"
-            await workflow.wait_condition(
-                lambda: self._manual_review_completed,
-                timeout=timedelta(seconds=24)  # 24 hour timeout for manual review
-            )
+            await self._wait_for_manual_review(order_id, payment_id)
             
             # Check for cancellation after manual review
             if self._is_cancelled:
                 workflow.logger.info(f"Order cancelled by user for order_id: {order_id}")
-                return {"status": "cancelled", "reason": "Order cancelled by user"}
+                return {"status": "cancelled", "reason": self._rejection_reason or "Order cancelled by user"}
             
             # Step 4: Charge Payment
-            self._workflow_status = "processing_payment"
-            payment_id = f"PAY-{order_id}-{workflow.info().workflow_id}"
+            self._set_status("processing_payment")
             workflow.logger.info(f"Executing payment_charged activity for order_id: {order_id}")
-            self._payment_result = await workflow.execute_activity(
+            self._payment_result = await self._execute_step(
                 payment_charged,
                 self._order_data,  # db parameter - replace with actual DB connection
                 start_to_close_timeout=timedelta(minutes=10),
@@ -106,11 +124,11 @@ class OrderWorkflow:
                 return {"status": "cancelled", "reason": "Order cancelled by user"}
             
             # Step 5: Execute Shipping Workflow (Child Workflow)
-            self._workflow_status = "shipping"
+            self._set_status("shipping")
             workflow.logger.info(f"Executing ShippingWorkflow for order_id: {order_id}")
             self._shipping_result = await workflow.execute_child_workflow(
                 ShippingWorkflow.run,
-                self._order_data,
+                args=[self._order_data, self._options.dispatch_carrier],
                 id=f"shipping-{order_id}",
                 task_queue="shipping-tq",
                 # start_to_close_timeout=timedelta(hours=2),
@@ -123,7 +141,7 @@ class OrderWorkflow:
                 )
             
             
-            self._workflow_status = "completed"
+            self._set_status("completed")
             return {
                 "status": "completed",
                 "order_id": order_id,
@@ -135,22 +153,22 @@ class OrderWorkflow:
             
         except TimeoutError:
             workflow.logger.info(f"Activity:{self._workflow_status} timed out for order_id: {order_id}")
+            self._set_status("cancelled")
             return {"status": "cancelled", "reason": "Activity Timed out!"}
         
         except CancelledError:
             workflow.logger.info(f"Order cancelled for order_id: {order_id}")
-            self._workflow_status = "cancelled"
+            self._set_status("cancelled")
             return {"status": "cancelled", "reason": "Order cancelled by user"}
         
         except Exception as e:
             # raise e
-            self._workflow_status = "failed"
             if  self._workflow_status == "cancelled":
                 return {"status": "cancelled", "reason": "Order cancelled by user"}
             if  self._workflow_status == "manual_review_timed_out":
                 return {"status": "manual_review_timed_out", "reason": "Manual review timed out"}
+            self._set_status("failed")
             workflow.logger.info(f"Order failed for order_id: {order_id}")
-            logging.error(e)
             workflow.logger.error(f"Error in {self._workflow_status}: {e}")
             return {
                 "status": "failed",
@@ -158,22 +176,315 @@ class OrderWorkflow:
                 "order_id": order_id
             }
 
+    async def _receive_and_validate(
+        self,
+        order_id: str,
+        payment_id: str,
+        initial_address: str,
+    ) -> Optional[Dict[str, Any]]:
+        """Steps 1-2; returns a result dict when the order stops early"""
+        self._shipping_address = initial_address
+        self._set_status("processing")
+        
+        # Step 1: Receive Order
+        workflow.logger.info(f"Executing order_received activity for order_id: {order_id}")
+        self._order_data = await self._execute_step(
+            order_received,
+            [order_id,payment_id],
+            start_to_close_timeout=timedelta(seconds=60),
+            retry_policy=RetryPolicy(
+                initial_interval=timedelta(seconds=1),
+                maximum_interval=timedelta(minutes=1),
+                maximum_attempts=3,
+            )
+        )
+        
+        # Check for cancellation after order received
+        if self._is_cancelled:
+            return {"status": "cancelled", "reason": "Order cancelled by user"}
+        
+        # Step 2: Validate Order
+        workflow.logger.info(f"Executing order_validated activity for order_id: {order_id}")
+        self._validation_result = await self._execute_step(
+            order_validated,
+            self._order_data,
+            start_to_close_timeout=timedelta(minutes=5),
+            retry_policy=RetryPolicy(
+                initial_interval=timedelta(seconds=1),
+                maximum_interval=timedelta(minutes=1),
+                maximum_attempts=3,
+            )
+        )
+        
+        if not self._validation_result:
+            workflow.logger.info(f"Order validation failed for order_id: {order_id}")
+            self._set_status("failed")
+            return {"status": "failed", "reason": "Order validation failed"}
+        
+        # Check for cancellation after validation
+        if self._is_cancelled:
+            workflow.logger.info(f"Order cancelled by user for order_id: {order_id}")
+            return {"status": "cancelled", "reason": "Order cancelled by user"}
+        return None
+
+    async def _wait_for_manual_review(self, order_id: str, payment_id: str):
+        """Wait for review until the deadline, continuing as new if history grows too large"""
+        while not self._manual_review_completed:
+            remaining = self._review_deadline - workflow.now()
+            if remaining <= timedelta(0):
+                raise TimeoutError("Manual review timed out")
+            await workflow.wait_condition(
+                lambda: self._manual_review_completed or self._history_too_large(),
+                timeout=remaining,
+            )
+            if not self._manual_review_completed:
+                await self._continue_as_new(order_id, payment_id)
+
+    def _history_too_large(self) -> bool:
+        info = workflow.info()
+        return (
+            info.is_continue_as_new_suggested()
+            or info.get_current_history_length() >= self._options.max_history_events
+            or info.get_current_history_size() >= self._options.max_history_bytes
+        )
+
+    async def _continue_as_new(self, order_id: str, payment_id: str):
+        # In-flight wait_for_status calls return now and new ones are rejected;
+        # otherwise back-to-back long-polls would postpone this indefinitely
+        self._continuing_as_new = True
+        # Handlers finishing first means no signal or update is lost at the boundary
+        await workflow.wait_condition(workflow.all_handlers_finished)
+        await self._await_status_projection()
+        workflow.logger.info(f"Continuing as new during manual review for order_id: {order_id}")
+        workflow.continue_as_new(args=[
+            order_id,
+            payment_id,
+            self._shipping_address,
+            self._options,
+            OrderCarryOver(
+                order_data=self._order_data,
+                validation_result=self._validation_result,
+                shipping_address=self._shipping_address,
+                workflow_status=self._workflow_status,
+                status_version=self._status_version,
+                is_cancelled=self._is_cancelled,
+                manual_review_completed=self._manual_review_completed,
+                review_deadline=self._review_deadline.isoformat(),
+                recent_signal_ids=list(self._recent_signal_ids),
+            ),
+        ])
+
+    def _restore(self, carry_over: OrderCarryOver):
+        # Signals delivered before run() started apply on top of the carried state
+        early_status = self._workflow_status if self._status_version else None
+        self._order_data = carry_over.order_data
+        self._validation_result = carry_over.validation_result
+        if self._shipping_address is None:
+            self._shipping_address = carry_over.shipping_address
+        self._workflow_status = carry_over.workflow_status
+        self._status_version = carry_over.status_version
+        # The previous run projected everything up to here before continuing as new
+        self._projected_version = carry_over.status_version
+        if early_status is not None:
+            self._set_status(early_status)
+        self._is_cancelled = self._is_cancelled or carry_over.is_cancelled
+        self._manual_review_completed = self._manual_review_completed or carry_over.manual_review_completed
+        self._review_deadline = datetime.fromisoformat(carry_over.review_deadline)
+        self._recent_signal_ids.extend(carry_over.recent_signal_ids)
+
+    async def _execute_step(
+        self,
+        step,
+        arg: Any,
+        start_to_close_timeout: timedelta,
+        retry_policy: RetryPolicy,
+    ) -> Any:
+        """Run a step as a local activity when configured, otherwise as a regular one.
+
+        Local attempts are capped at ``local_attempt_timeout_seconds``; retries
+        with backoff past the local retry threshold are scheduled with a durable
+        timer by the SDK. If the local attempts all time out, the step gets one
+        more chance as a regular activity with its full timeout.
+        """
+        local = step.__name__ in self._options.local_steps and workflow.patched("local-activity-steps")
+        if local:
+            attempt_timeout = min(
+                start_to_close_timeout,
+                timedelta(seconds=self._options.local_attempt_timeout_seconds),
+            )
+            try:
+                return await workflow.execute_local_activity(
+                    step,
+                    arg,
+                    start_to_close_timeout=attempt_timeout,
+                    retry_policy=retry_policy,
+                    local_retry_threshold=timedelta(seconds=10),
+                )
+            except ActivityError as e:
+                if not isinstance(e.cause, ActivityTimeoutError):
+                    raise
+                workflow.logger.info(f"Local {step.__name__} timed out, retrying as a regular activity")
+        return await workflow.execute_activity(
+            step,
+            arg,
+            start_to_close_timeout=start_to_close_timeout,
+            retry_policy=retry_policy,
+        )
+
+    def _set_status(self, status: str):
+        if status != self._workflow_status:
+            self._workflow_status = status
+            self._status_version += 1
+            self._status_changed_at = workflow.now()
+            if self._index_status:
+                self._upsert_status_attribute()
+
+    def _upsert_status_attribute(self):
+        workflow.upsert_search_attributes([ORDER_STATUS_SEARCH_ATTRIBUTE.value_set(self._workflow_status)])
+
+    async def _project_status_changes(self):
+        """Write each status change to `order_status_view`.
+
+        Runs alongside the workflow; changes made while a write is in flight
+        are coalesced into the next one. A write that keeps failing is logged
+        and skipped, and the next change brings the row up to date.
+        """
+        while True:
+            await workflow.wait_condition(lambda: self._status_version > self._projected_version)
+            projection = OrderStatusProjection(
+                order_id=self._order_id,
+                workflow_id=workflow.info().workflow_id,
+                status=self._workflow_status,
+                version=self._status_version,
+                is_cancelled=self._is_cancelled,
+                manual_review_completed=self._manual_review_completed,
+                shipping_address=self._shipping_address,
+                changed_at=(self._status_changed_at or workflow.now()).isoformat(),
+            )
+            try:
+                await workflow.execute_local_activity(
+                    status_projected,
+                    projection,
+                    start_to_close_timeout=timedelta(seconds=10),
+                    retry_policy=RetryPolicy(
+                        initial_interval=timedelta(seconds=1),
+                        maximum_interval=timedelta(seconds=10),
+                        maximum_attempts=5,
+                    ),
+                )
+            except ActivityError as e:
+                workflow.logger.warning(f"Status projection v{projection.version} failed for order_id: {self._order_id}: {e}")
+            self._projected_version = projection.version
+
+    async def _await_status_projection(self):
+        if self._projector is not None:
+            await workflow.wait_condition(lambda: self._projected_version >= self._status_version)
+
+    def _status_record(self) -> OrderStatusRecord:
+        return OrderStatusRecord(
+            workflow_status=self._workflow_status,
+            version=self._status_version,
+            is_cancelled=self._is_cancelled,
+            manual_review_completed=self._manual_review_completed,
+            validation_result=self._validation_result,
+        )
+
     @workflow.signal
     def cancel_order(self):
         """Signal to cancel the order before shipment"""
         self._is_cancelled = True
-        self._workflow_status = "cancelled"
+        self._set_status("cancelled")
 
     @workflow.signal
-    def update_address(self, new_address: str):
-        """Signal to update shipping address prior to dispatch"""
+    def update_address(self, new_address: str, request_id: Optional[str] = None):
+        """Signal to update shipping address prior to dispatch.
+
+        Redelivered signals (same ``request_id``) and repeats of the current
+        address are dropped; otherwise the latest address wins.
+        """
+        if request_id is not None:
+            if request_id in self._recent_signal_ids:
+                return
+            self._recent_signal_ids.append(request_id)
+        if new_address == self._shipping_address:
+            return
         self._shipping_address = new_address
 
     @workflow.signal
     def complete_manual_review(self):
         """Signal to complete manual review and proceed to payment"""
         self._manual_review_completed = True
-        self._workflow_status = "manual_review_completed"
+        self._set_status("manual_review_completed")
+
+    @workflow.signal
+    def reject_manual_review(self, reason: Optional[str] = None):
+        """Signal to reject the order in manual review; it ends cancelled without payment"""
+        self._rejection_reason = reason or "Rejected in manual review"
+        self._is_cancelled = True
+        # The review is over, so the review wait ends now rather than at its deadline
+        self._manual_review_completed = True
+        self._set_status("cancelled")
+
+    @workflow.update
+    def review_order(self, approved: bool, reason: Optional[str] = None) -> OrderStatusRecord:
+        """Approve or reject the order, returning the resulting status.
+
+        Unlike the review signals, this is refused (by the validator, before
+        anything is written to history) unless the order is awaiting review,
+        so bulk reviewers get an accurate per-order outcome.
+        """
+        if approved:
+            self.complete_manual_review()
+        else:
+            self.reject_manual_review(reason)
+        return self._status_record()
+
+    @review_order.validator
+    def validate_review_order(self, approved: bool, reason: Optional[str] = None):
+        if self._workflow_status != "awaiting_manual_review":
+            raise ValueError(f"Order is {self._workflow_status}, not awaiting manual review")
+
+    @workflow.update
+    async def wait_for_status(
+        self,
+        target_status: Optional[str] = None,
+        known_version: int = -1,
+        timeout_seconds: float = 60,
+    ) -> OrderStatusRecord:
+        """Long-poll for a status change.
+
+        Returns once the status reaches ``target_status`` (or a terminal
+        status), or, without a target, once the version moves past
+        ``known_version``. Returns the current record after ``timeout_seconds``
+        so callers can poll again, and early when the run is about to continue
+        as new.
+
+        Every call adds update events to history; a caller polling at a high
+        rate should use the ``get_status`` query instead.
+        """
+        def reached() -> bool:
+            if self._workflow_status in TERMINAL_STATUSES or self._continuing_as_new:
+                return True
+            if target_status is not None:
+                return self._workflow_status == target_status
+            return self._status_version > known_version
+
+        try:
+            await workflow.wait_condition(reached, timeout=timedelta(seconds=timeout_seconds))
+        except TimeoutError:
+            pass
+        return self._status_record()
+
+    @wait_for_status.validator
+    def validate_wait_for_status(
+        self,
+        target_status: Optional[str] = None,
+        known_version: int = -1,
+        timeout_seconds: float = 60,
+    ):
+        if self._continuing_as_new:
+            # The caller retries and reaches the next run
+            raise ApplicationError("Order is continuing as new, retry", type="ContinuingAsNew")
 
     @workflow.query
     def get_status(self) -> Dict[str, Any]:
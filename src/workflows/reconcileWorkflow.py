@@ -0,0 +1,124 @@
+from datetime import timedelta
+from typing import Dict, List, Optional
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from activities.interfaces import order_workflows_described, reconcile_rows_scanned, reconciliation_applied
+from util.dataObject import ReconcileIssue, ReconcileRow, ReconcileState, WorkflowCheck, ZERO_UUID
+
+# Execution statuses of a run that ended without returning a result
+ABNORMAL_RUNS = ("FAILED", "TERMINATED", "TIMED_OUT", "CANCELED")
+# Orders rows that never got past validation
+UNCHARGED_STATUSES = ("Received", "Validated")
+
+SWEEP_RETRY = RetryPolicy(
+    initial_interval=timedelta(seconds=5),
+    maximum_interval=timedelta(minutes=5),
+    maximum_attempts=10,
+)
+
+
+def classify(row: ReconcileRow, check: WorkflowCheck) -> List[ReconcileIssue]:
+    """Compare one orders row with its workflows; repair what is safe, flag the rest"""
+    if check.order_run is None:
+        return [ReconcileIssue(row.order_id, "missing_workflow", f"Row is {row.order_status} but order-{row.order_id} does not exist")]
+    if check.order_run == "RUNNING":
+        return []
+    # OrderWorkflow catches step failures and completes with a failed or cancelled result
+    ended_early = check.order_run in ABNORMAL_RUNS or check.order_status in ("failed", "cancelled")
+    issues = []
+    if ended_early:
+        if check.shipping_run == "RUNNING":
+            issues.append(ReconcileIssue(row.order_id, "orphaned_shipment", f"Shipping is running but the order ended {check.order_status or check.order_run}"))
+        if row.has_payment:
+            issues.append(ReconcileIssue(row.order_id, "charged_not_completed", f"Payment recorded but the order ended {check.order_status or check.order_run}"))
+        elif row.order_status in UNCHARGED_STATUSES:
+            issues.append(ReconcileIssue(
+                row.order_id,
+                "stale_order_status",
+                f"Row is {row.order_status} but the order ended {check.order_status or check.order_run}",
+                repair_status="Cancelled",
+                expected_status=row.order_status,
+            ))
+    elif row.has_payment or check.order_status == "completed":
+        # Without the search attribute a completed run may still be an early exit, so only charged orders are checked
+        if check.shipping_run is None:
+            issues.append(ReconcileIssue(row.order_id, "missing_shipment", "Order completed but no shipping workflow exists"))
+        elif check.shipping_run in ABNORMAL_RUNS:
+            issues.append(ReconcileIssue(row.order_id, "shipment_failed", f"Shipping workflow ended {check.shipping_run}"))
+        if not row.has_payment:
+            issues.append(ReconcileIssue(row.order_id, "completed_without_payment", "Order completed but no payment is recorded"))
+    return issues
+
+
+@workflow.defn
+class ReconciliationWorkflow:
+    """Sweeps orders and payments for rows out of step with workflow state.
+
+    Each chunk is read by keyset on the primary key, checked against the
+    order and shipping workflows in one batch, and its issues repaired or
+    flagged in `reconciliation_issues` by one bulk activity. Only the
+    ReconcileState cursor is carried across continue-as-new, so a sweep
+    over millions of rows keeps one chunk in memory and a short history.
+    Started on a schedule by `reconcile.py`.
+    """
+
+    def __init__(self):
+        self._state: Optional[ReconcileState] = None
+
+    @workflow.run
+    async def run(self, state: Optional[ReconcileState] = None) -> ReconcileState:
+        self._state = state = state or ReconcileState()
+        if state.cutoff is None:
+            now = workflow.now()
+            state.since = (now - timedelta(hours=state.lookback_hours)).isoformat()
+            state.cutoff = (now - timedelta(minutes=state.grace_minutes)).isoformat()
+
+        for _ in range(state.chunks_per_run):
+            chunk = await workflow.execute_activity(
+                reconcile_rows_scanned,
+                args=[state.phase, state.after_id, state.since, state.cutoff, state.chunk_size],
+                start_to_close_timeout=timedelta(minutes=2),
+                retry_policy=SWEEP_RETRY,
+            )
+            issues = await self._issues(state.phase, chunk.rows)
+            if issues:
+                counts: Dict[str, int] = await workflow.execute_activity(
+                    reconciliation_applied,
+                    issues,
+                    start_to_close_timeout=timedelta(minutes=2),
+                    retry_policy=SWEEP_RETRY,
+                )
+                state.repaired += counts["repaired"]
+                state.flagged += counts["flagged"]
+            state.scanned += chunk.scanned
+
+            if chunk.last_id is not None:
+                state.after_id = chunk.last_id
+            elif state.phase == "orders":
+                state.phase, state.after_id = "payments", ZERO_UUID
+            else:
+                workflow.logger.info(f"Reconciliation finished: {state}")
+                return state
+
+        workflow.continue_as_new(args=[state])
+
+    async def _issues(self, phase: str, rows: List[ReconcileRow]) -> List[ReconcileIssue]:
+        if phase == "payments":
+            return [
+                ReconcileIssue(row.order_id, "payment_without_order", f"Payment {row.payment_id} has no orders row")
+                for row in rows
+            ]
+        if not rows:
+            return []
+        checks: List[WorkflowCheck] = await workflow.execute_activity(
+            order_workflows_described,
+            [row.order_id for row in rows],
+            start_to_close_timeout=timedelta(minutes=5),
+            retry_policy=SWEEP_RETRY,
+        )
+        return [issue for row, check in zip(rows, checks) for issue in classify(row, check)]
+
+    @workflow.query
+    def progress(self) -> Optional[ReconcileState]:
+        """Sweep cursor and running totals"""
+        return self._state
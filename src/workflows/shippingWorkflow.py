@@ -1,9 +1,14 @@
+import asyncio
 from datetime import timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from temporalio import workflow, activity
 from temporalio.common import RetryPolicy
-from activities.shippingActivities import package_prepared, carrier_dispatched
-from util.dataObject import OrderObject
+from temporalio.exceptions import ActivityError
+from activities.interfaces import carrier_dispatched, dispatch_status_checked, package_prepared, request_dispatch
+from util.dataObject import DispatchRequest, DispatchResult, OrderObject
+
+# How long to wait on a carrier aggregator before dispatching directly
+BATCH_DISPATCH_WAIT = timedelta(hours=1)
 
 @workflow.defn
 class ShippingWorkflow:
@@ -11,9 +16,10 @@ class ShippingWorkflow:
         self._package_status = "pending"
         self._dispatch_status = "pending"
         self._dispatch_failed_reason = None
+        self._dispatch_result: Optional[DispatchResult] = None
 
     @workflow.run
-    async def run(self, order: OrderObject) -> Dict[str, Any]:
+    async def run(self, order: OrderObject, dispatch_carrier: Optional[str] = None) -> Dict[str, Any]:
         """Main shipping workflow execution"""
         try:
             # Prepare package
@@ -29,18 +35,11 @@ class ShippingWorkflow:
                 task_queue="shipping-tq"
             )
             
-            # Dispatch carrier with retry policy
-            self._dispatch_status = await workflow.execute_activity(
-                carrier_dispatched,
-                order,
-                start_to_close_timeout=timedelta(minutes=10),
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=2),
-                    maximum_interval=timedelta(minutes=2),
-                    maximum_attempts=3,
-                ),
-                task_queue="shipping-tq"
-            )
+            # Dispatch carrier, batched with other orders when a carrier is given
+            if dispatch_carrier:
+                self._dispatch_status = await self._dispatch_batched(order, dispatch_carrier)
+            else:
+                self._dispatch_status = await self._dispatch_direct(order)
             
             return {
                 "status": "shipped",
@@ -57,6 +56,84 @@ class ShippingWorkflow:
             })
             raise
 
+    async def _dispatch_direct(self, order: OrderObject) -> str:
+        # Dispatch carrier with retry policy
+        return await workflow.execute_activity(
+            carrier_dispatched,
+            order,
+            start_to_close_timeout=timedelta(minutes=10),
+            retry_policy=RetryPolicy(
+                initial_interval=timedelta(seconds=2),
+                maximum_interval=timedelta(minutes=2),
+                maximum_attempts=3,
+            ),
+            task_queue="shipping-tq"
+        )
+
+    async def _dispatch_batched(self, order: OrderObject, carrier: str) -> str:
+        """Hand the parcel to the carrier's CarrierDispatchWorkflow and wait for its result"""
+        await workflow.execute_activity(
+            request_dispatch,
+            args=[carrier, DispatchRequest(
+                order_id=order.id,
+                reply_to=workflow.info().workflow_id,
+                shipping_address=order.shipping_address,
+            )],
+            start_to_close_timeout=timedelta(minutes=1),
+            retry_policy=RetryPolicy(
+                initial_interval=timedelta(seconds=1),
+                maximum_interval=timedelta(minutes=1),
+                maximum_attempts=3,
+            ),
+            task_queue="shipping-tq"
+        )
+        while True:
+            try:
+                await workflow.wait_condition(
+                    lambda: self._dispatch_result is not None,
+                    timeout=BATCH_DISPATCH_WAIT,
+                )
+                break
+            except asyncio.TimeoutError:
+                pass
+            # The result signal may have been lost; ask the batcher before dispatching a second time
+            status = await self._batcher_status(order, carrier)
+            if self._dispatch_result is not None:
+                break
+            if status == "dispatched":
+                return "Dispatched"
+            if status != "queued":
+                workflow.logger.info(f"Batcher has no record of order_id: {order.id}, dispatching directly")
+                return await self._dispatch_direct(order)
+        if self._dispatch_result.status != "Dispatched":
+            workflow.logger.info(
+                f"Batch {self._dispatch_result.batch_id} could not dispatch order_id: {order.id}, dispatching directly"
+            )
+            return await self._dispatch_direct(order)
+        return self._dispatch_result.status
+
+    async def _batcher_status(self, order: OrderObject, carrier: str) -> str:
+        try:
+            return await workflow.execute_activity(
+                dispatch_status_checked,
+                args=[carrier, order.id],
+                start_to_close_timeout=timedelta(minutes=1),
+                retry_policy=RetryPolicy(
+                    initial_interval=timedelta(seconds=1),
+                    maximum_interval=timedelta(minutes=1),
+                    maximum_attempts=3,
+                ),
+                task_queue="shipping-tq"
+            )
+        except ActivityError as e:
+            workflow.logger.warning(f"Could not check batcher for order_id: {order.id}: {e}")
+            return "unknown"
+
+    @workflow.signal
+    def dispatch_completed(self, result: DispatchResult):
+        """Signal from CarrierDispatchWorkflow with this order's dispatch result"""
+        self._dispatch_result = result
+
     @workflow.query
     def get_status(self) -> Dict[str, Any]:
         """Query current shipping status"""